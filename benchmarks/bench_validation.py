@@ -0,0 +1,66 @@
+"""
+Benchmark cold versus warm pytest validation latency.
+
+Cold runs spawn a new ``python -m pytest`` process, as CodeExecutor does by
+default; warm runs go through the preloading pytest daemon.
+
+Usage:
+    python benchmarks/bench_validation.py [-n RUNS] [pytest args...]
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, ROOT)
+
+from selfgrow.pytest_daemon import WarmPytestRunner  # noqa: E402
+
+
+def measure(run, runs: int) -> list:
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        proc = run()
+        timings.append(time.perf_counter() - start)
+        if proc.returncode not in (0, 5):
+            print(proc.stdout, proc.stderr, file=sys.stderr)
+            raise SystemExit(f"pytest failed with exit code {proc.returncode}")
+    return timings
+
+
+def report(label: str, timings: list) -> None:
+    print(
+        f"{label:<6} mean {statistics.mean(timings) * 1000:8.1f} ms   "
+        f"median {statistics.median(timings) * 1000:8.1f} ms   "
+        f"min {min(timings) * 1000:8.1f} ms"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("-n", "--runs", type=int, default=10)
+    parser.add_argument("pytest_args", nargs="*", default=["-q", "tests"])
+    options = parser.parse_args()
+
+    runner = WarmPytestRunner()
+    cold = measure(lambda: runner.run_cold(options.pytest_args, ROOT), options.runs)
+    # The first warm run pays the daemon's one-off startup
+    start = time.perf_counter()
+    runner.run(options.pytest_args, ROOT)
+    startup = time.perf_counter() - start
+    warm = measure(lambda: runner.run(options.pytest_args, ROOT), options.runs)
+    runner.close()
+
+    print(f"pytest {' '.join(options.pytest_args)} x {options.runs}")
+    report("cold", cold)
+    report("warm", warm)
+    print(f"daemon startup (first run) {startup * 1000:.1f} ms")
+    print(f"speedup {statistics.mean(cold) / statistics.mean(warm):.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -5,15 +5,30 @@ Provides commands to run the agent, inspect task memory, and manage tasks.
 """
 
 import os
-import subprocess
+import textwrap
+import time
 import yaml
 import typer
 from .openai_client import OpenAIClient
-from .memory import Memory
+from .memory import Memory, DEFAULT_AGING_SECONDS, DEFAULT_DEDUP_THRESHOLD
 from .task_manager import TaskManager
 from .code_executor import CodeExecutor
+from .test_impact import TestImpactAnalyzer, DEFAULT_FULL_RUN_EVERY
+from .pytest_daemon import WarmPytestRunner
 from .journal import Journal
+from .local_handlers import LocalDispatcher
+from .git_backend import GitBackend
+from .project_index import ProjectIndex
+from .pipeline import TaskPipeline
+from .refiner import (
+    BackgroundRefiner,
+    DEFAULT_REFINE_BATCH_SIZE,
+    DEFAULT_REFINE_WINDOW,
+)
+from .push_queue import PushQueue, DEFAULT_PUSH_WINDOW, DEFAULT_MAX_BACKLOG
 from .metrics import Metrics
+from .worker_pool import WorktreePool
+from .usage import BudgetExceeded, DEFAULT_THROTTLE_SECONDS
 
 from .logger import setup_logging
 
@@ -33,7 +48,13 @@ def load_configuration(config_file: str = "config.yaml") -> dict:
 def run(
     iterations: int = typer.Option(
         None, "-n", "--iterations", help="Max iterations to run"
-    )
+    ),
+    workers: int = typer.Option(
+        1,
+        "-w",
+        "--workers",
+        help="Execute up to N tasks in parallel, each in its own git worktree",
+    ),
 ):
     """
     Run the self-growing loop: generate, execute, and refine tasks.
@@ -46,46 +67,98 @@ def run(
     except ValueError as e:
         typer.secho(f"Configuration error: {e}", fg=typer.colors.RED)
         raise typer.Exit(code=1)
-    memory_store = Memory()
+    memory_cfg = config.get("memory", {}) or {}
+    memory_store = Memory(
+        dedup_threshold=memory_cfg.get("dedup_threshold", DEFAULT_DEDUP_THRESHOLD),
+        aging_seconds=memory_cfg.get("aging_seconds", DEFAULT_AGING_SECONDS),
+        # "create file a.txt ..." and "create file b.txt ..." are distinct tasks
+        dedup_exempt=lambda description: LocalDispatcher.match(description) is not None,
+    )
     agent_cfg = config.get("agent", {})
+    # Record every LLM call, tied to its task, alongside the tasks
+    client.usage.memory = memory_store
+    throttle_seconds = (config.get("budgets", {}) or {}).get(
+        "throttle_seconds", DEFAULT_THROTTLE_SECONDS
+    )
 
     logger.info("Configuring version control remote...")
     vc_cfg = config.get("version_control", {})
     remote_name = vc_cfg.get("remote_name", "origin")
     remote_url = vc_cfg.get("remote_url")
     branch = vc_cfg.get("branch", "main")
+    # All git operations on the main working tree share one backend
+    git = GitBackend()
+    push_queue = None
     if remote_url:
-        existing = subprocess.run(
-            ["git", "remote"], cwd=os.getcwd(), capture_output=True, text=True
-        ).stdout.split()
-        if remote_name not in existing:
-            subprocess.run(
-                ["git", "remote", "add", remote_name, remote_url],
-                cwd=os.getcwd(),
-                check=True,
-            )
-        else:
-            subprocess.run(
-                ["git", "remote", "set-url", remote_name, remote_url],
-                cwd=os.getcwd(),
-                check=True,
-            )
+        git.ensure_remote(remote_name, remote_url)
+        # Executor, journal, and worker pool commits are pushed in the background
+        push_queue = PushQueue(
+            git,
+            remote_name,
+            branch,
+            window=vc_cfg.get("push_window", DEFAULT_PUSH_WINDOW),
+            max_backlog=vc_cfg.get("push_max_backlog", DEFAULT_MAX_BACKLOG),
+        )
 
     # Initialize the Task Manager and Code Executor
-    task_manager = TaskManager(memory_store, client, agent_cfg)
-    executor = CodeExecutor(
-        openai_client=client,
-        work_directory=None,
+    project_index = ProjectIndex(git_backend=git)
+    task_manager = TaskManager(
+        memory_store, client, agent_cfg, git_backend=git, project_index=project_index
+    )
+    executor_cfg = config.get("executor", {}) or {}
+
+    impact_cfg = executor_cfg.get("test_impact", {}) or {}
+    # One warm pytest daemon serves every executor; it exits with this process
+    test_runner = WarmPytestRunner() if executor_cfg.get("warm_pytest") else None
+
+    # One analyzer, rooted at the main tree, selects tests for every executor
+    test_selector = None
+    if impact_cfg.get("enabled"):
+        test_selector = TestImpactAnalyzer(
+            full_run_every=impact_cfg.get("full_run_every", DEFAULT_FULL_RUN_EVERY),
+            use_coverage=impact_cfg.get("use_coverage", True),
+        )
+
+    def make_executor(work_directory=None, git_remote=None) -> CodeExecutor:
+        executor = CodeExecutor(
+            openai_client=client,
+            work_directory=work_directory,
+            git_remote=git_remote,
+            git_branch=branch,
+            stream=executor_cfg.get("stream", False),
+            test_selector=test_selector,
+            test_runner=test_runner,
+            # Worktree executors get a backend of their own; their commits are
+            # cherry-picked and pushed by the pool
+            git_backend=None if work_directory else git,
+            push_queue=None if work_directory else push_queue,
+            project_index=None if work_directory else project_index,
+            format_on_write=executor_cfg.get("format_on_write", False),
+        )
+        return executor
+
+    executor = make_executor(git_remote=remote_name if remote_url else None)
+    # Initialize Journal for logging events
+    journal = Journal(
         git_remote=remote_name if remote_url else None,
         git_branch=branch,
+        git_backend=git,
+        push_queue=push_queue,
     )
-    # Initialize Journal for logging events
-    journal = Journal(git_remote=remote_name if remote_url else None, git_branch=branch)
     # Initialize metrics tracking
     metrics = Metrics()
 
+    # Tasks left 'running' by an interrupted run are retried
+    requeued = memory_store.requeue_running_tasks()
+    if requeued:
+        logger.info(f"Requeued {requeued} interrupted task(s).")
+    # Results replaced by retries leave blobs no task refers to
+    pruned = memory_store.prune_result_blobs()
+    if pruned:
+        logger.info(f"Pruned {pruned} unreferenced result blob(s).")
+
     # Generate initial tasks if none exist
-    if not memory_store.get_pending_tasks():
+    if not memory_store.has_pending_tasks():
         logger.info("Generating initial tasks...")
         typer.echo("Generating initial tasks...")
         try:
@@ -99,22 +172,48 @@ def run(
         iterations if iterations is not None else agent_cfg.get("max_iterations", 10)
     )
     logger.info(f"Starting run loop for {max_iters} iterations.")
-    for i in range(1, max_iters + 1):
-        next_item = task_manager.get_next_task()
-        if not next_item:
-            typer.echo("All tasks completed.")
-            journal.log("All tasks completed")
-            # Output metrics summary
-            summary = metrics.summary()
-            logger.info(f"Metrics summary: {summary}")
-            typer.echo(f"Metrics: {summary}")
-            journal.log(f"Metrics summary: {summary}")
-            return
-        task_id, desc = next_item
-        logger.info(f"Executing task {task_id}/{max_iters}: {desc}")
-        typer.echo(f"[{i}/{max_iters}] Task {task_id}: {desc}")
+    # Refinement overlaps with execution; get_next_task waits for it when idle
+    refiner = BackgroundRefiner(
+        task_manager,
+        batch_size=agent_cfg.get("refine_batch_size", DEFAULT_REFINE_BATCH_SIZE),
+        window=agent_cfg.get("refine_window", DEFAULT_REFINE_WINDOW),
+    )
+    task_manager.refiner = refiner
+
+    def finish() -> None:
+        """Refine what is still queued, report the run's metrics, and clean up."""
+        refiner.close()
+        metrics.record_counters("refiner", refiner.stats)
+        _report_metrics(metrics, memory_store, client, journal, [executor])
+        executor.close()
+        if test_runner is not None:
+            test_runner.close()
+        git.close()
+
+    def within_budget() -> bool:
+        """Pause while a soft budget is exceeded; False once a hard one is."""
+        level, reason = client.usage.status()
+        if level == "hard":
+            logger.warning(f"Stopping run: {reason}")
+            typer.secho(f"Stopping run: {reason}", fg=typer.colors.YELLOW)
+            journal.log(f"Stopped run: {reason}")
+            return False
+        if level == "soft":
+            logger.info(f"Throttling for {throttle_seconds}s: {reason}")
+            time.sleep(throttle_seconds)
+        return True
+
+    # HEAD after the previous task's journal commit; later commits are the task's
+    last_head = git.rev_parse("HEAD")
+
+    def complete_task(task_id: int, desc: str, execute) -> None:
+        """Run execute() for a task and record its outcome."""
+        nonlocal last_head
         try:
-            result = executor.execute(desc)
+            with client.usage.task(task_id):
+                result = execute()
+            head = git.rev_parse("HEAD")
+            commits = (last_head, head) if last_head and head != last_head else None
             memory_store.update_task(task_id, "done", result)
             logger.info(f"Task {task_id} result: {result}")
             typer.echo(f"Result: {result}")
@@ -122,49 +221,180 @@ def run(
             metrics.record_success()
             # Log successful execution
             journal.log(f"Applied patch for task {task_id}: {desc}")
-            # Generate follow-up tasks
-            task_manager.refine_tasks(desc, result)
-            journal.log(f"Refined tasks after task {task_id}")
+            # Generate follow-up tasks in the background, batched with others
+            refiner.submit(desc, result, commits)
+        except BudgetExceeded as e:
+            # Not the task's fault: retry it in a later run instead of failing
+            # it and its dependents
+            memory_store.update_task(task_id, "pending")
+            logger.warning(f"Task {task_id} postponed: {e}")
+            typer.secho(f"Task {task_id} postponed: {e}", fg=typer.colors.YELLOW)
+            journal.log(f"Postponed task {task_id} over budget: {desc}")
         except Exception as e:
             memory_store.update_task(task_id, "error", str(e))
             logger.error(f"Error in Task {task_id}: {e}")
             typer.secho(f"Error in Task {task_id}: {e}", fg=typer.colors.RED)
             # Record failure and log
             metrics.record_failure()
-            journal.log(f"Failed to apply patch for task {task_id}: {desc}")
-            continue
+            try:
+                journal.log(f"Failed to apply patch for task {task_id}: {desc}")
+            except Exception as journal_error:
+                # A broken journal must not end the run
+                logger.error(f"Could not journal Task {task_id}: {journal_error}")
+        # One journal commit per task rather than one per entry
+        journal.flush()
+        last_head = git.rev_parse("HEAD")
+
+    if workers > 1:
+        logger.info(f"Executing tasks with {workers} parallel worktrees.")
+        pool = WorktreePool(
+            make_executor,
+            workers,
+            git_remote=remote_name if remote_url else None,
+            git_branch=branch,
+            git_backend=git,
+            push_queue=push_queue,
+            usage=client.usage,
+            # Re-test integrated commits on the main tree's HEAD
+            validator=executor,
+        )
+        outcomes = pool.run(task_manager, max_iters)
+        for i, outcome in enumerate(outcomes, start=1):
+            task_id, desc = outcome.task_id, outcome.description
+            logger.info(f"Integrating task {task_id}/{max_iters}: {desc}")
+            typer.echo(f"[{i}/{max_iters}] Task {task_id}: {desc}")
+            # Integrated commits changed the main tree behind the index
+            project_index.invalidate()
+            complete_task(task_id, desc, outcome.get)
+            if not within_budget():
+                break
+        outcomes.close()
+        if pool.exhausted:
+            typer.echo("All tasks completed.")
+            journal.log("All tasks completed")
+        # Worktree executors are closed by the pool; only their counters remain
+        metrics.record_counters("edits", pool.edit_stats)
+        metrics.record_counters("local", pool.local_stats)
+        metrics.record_counters("git", {"processes": pool.git_processes})
+        finish()
+        return
+
+    if executor_cfg.get("pipeline"):
+        logger.info("Executing tasks with speculative next-task generation.")
+        pipeline = TaskPipeline(executor, usage=client.usage)
+        outcomes = pipeline.run(task_manager, max_iters)
+        for i, outcome in enumerate(outcomes, start=1):
+            task_id, desc = outcome.task_id, outcome.description
+            logger.info(f"Executed task {task_id}/{max_iters}: {desc}")
+            typer.echo(f"[{i}/{max_iters}] Task {task_id}: {desc}")
+            complete_task(task_id, desc, outcome.get)
+            if not within_budget():
+                break
+        outcomes.close()
+        if pipeline.exhausted:
+            typer.echo("All tasks completed.")
+            journal.log("All tasks completed")
+        metrics.record_counters("pipeline", pipeline.stats)
+        finish()
+        return
+
+    for i in range(1, max_iters + 1):
+        if not within_budget():
+            break
+        next_item = task_manager.get_next_task()
+        if not next_item:
+            typer.echo("All tasks completed.")
+            journal.log("All tasks completed")
+            finish()
+            return
+        task_id, desc = next_item
+        logger.info(f"Executing task {task_id}/{max_iters}: {desc}")
+        typer.echo(f"[{i}/{max_iters}] Task {task_id}: {desc}")
+        complete_task(task_id, desc, lambda: executor.execute(desc))
     # If max iterations complete without exhausting tasks, report metrics
+    finish()
+
+
+def _report_metrics(
+    metrics: Metrics,
+    memory_store: Memory,
+    client: OpenAIClient,
+    journal: Journal,
+    executors: list = (),
+) -> None:
+    """Output the metrics summary to the log, console, and journal."""
+    metrics.record_llm_calls_saved(memory_store.duplicates_skipped)
+    metrics.record_counters("llm_cache", client.cache_stats())
+    # Calls, tokens and latency for the run and per stage
+    metrics.record_counters("usage", client.usage.counters())
+    for executor in executors:
+        metrics.record_counters("edits", executor.edit_stats)
+        metrics.record_counters("local", executor.local_stats)
+    backends = {id(b): b for b in [journal.git] + [e.git for e in executors]}
+    metrics.record_counters(
+        "git",
+        {"processes": sum(b.processes_spawned for b in backends.values())},
+    )
+    if journal.push_queue is not None:
+        metrics.record_counters("push", journal.push_queue.stats)
     summary = metrics.summary()
     logger.info(f"Metrics summary: {summary}")
     typer.echo(f"Metrics: {summary}")
     journal.log(f"Metrics summary: {summary}")
+    journal.flush()
+    if journal.push_queue is not None:
+        # Flush on exit: push whatever the window has not pushed yet
+        journal.push_queue.close()
 
 
 @app.command("list-tasks")
 def list_tasks(
     status: str = typer.Option(
-        None, "-s", "--status", help="Filter by status: pending, done, error"
-    )
+        None, "-s", "--status", help="Filter by status: pending, running, done, error"
+    ),
+    limit: int = typer.Option(
+        None, "-l", "--limit", help="Maximum number of tasks to show"
+    ),
+    after_id: int = typer.Option(
+        0, "--after-id", help="Only show tasks with an id greater than this"
+    ),
+    with_result: bool = typer.Option(
+        False, "-r", "--with-result", help="Also print each task's result"
+    ),
 ):
     """
     List tasks in memory, optionally filtered by status.
+
+    Tasks are streamed page by page, so large backlogs print in constant memory.
     """
     memory_store = Memory()
-    if status:
-        tasks = memory_store.get_tasks_by_status(status)
-    else:
-        tasks = memory_store.get_all_tasks()
-    if not tasks:
-        typer.echo("No tasks found.")
-        return
+    tasks = memory_store.iter_tasks(
+        status=status, after_id=after_id, limit=limit, with_result=with_result
+    )
+    shown = 0
+    last_id = None
     for task in tasks:
-        task_id, desc, stat, result, created = task
+        if with_result:
+            task_id, desc, stat, result, created = task
+        else:
+            task_id, desc, stat, created = task
         typer.echo(f"[{task_id}] {stat} - {desc} (created at {created})")
+        if with_result and result:
+            typer.echo(textwrap.indent(result, "    "))
+        shown += 1
+        last_id = task_id
+    if not shown:
+        typer.echo("No tasks found.")
+    elif limit is not None and shown == limit:
+        typer.echo(f"Showing {shown} tasks; continue with --after-id {last_id}")
 
 
 @app.command("clear-tasks")
 def clear_tasks(
-    yes: bool = typer.Option(False, "-y", "--yes", help="Confirm clearing all tasks")
+    yes: bool = typer.Option(False, "-y", "--yes", help="Confirm clearing all tasks"),
+    usage: bool = typer.Option(
+        False, "--usage", help="Also delete the recorded LLM usage"
+    ),
 ):
     """
     Clear all tasks from memory.
@@ -174,5 +404,5 @@ def clear_tasks(
             "Are you sure you want to delete all tasks?", abort=True
         )
     memory_store = Memory()
-    memory_store.clear_all_tasks()
+    memory_store.clear_all_tasks(clear_usage=usage)
     typer.secho("All tasks cleared.", fg=typer.colors.GREEN)
@@ -7,11 +7,56 @@ Executes tasks by generating file changes via function-calling and applying them
 import os
 import subprocess
 import json
-from typing import Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, NamedTuple, Optional
 from datetime import datetime
 from .openai_client import OpenAIClient
+from .stream_parser import ChangeStreamParser
+from .test_impact import TestImpactAnalyzer
+from .pytest_daemon import WarmPytestRunner
+from .staging import StagingArea
+from .edits import HunkMismatch, apply_edits
+from .git_backend import GitBackend
+from .push_queue import PushQueue
+from .project_index import ProjectIndex
+from .local_handlers import LocalDispatcher
+from .formatter import Formatter
+from .tokens import estimate_tokens
 import re
 
+# pytest exit code when no tests were collected
+PYTEST_NO_TESTS_COLLECTED = 5
+
+
+def _check_syntax(path: str, content: str) -> Optional[str]:
+    """Compile Python source, returning an error description or None if valid."""
+    try:
+        compile(content, path, "exec")
+    except (SyntaxError, ValueError) as e:
+        return f"{path}: {e}"
+    return None
+
+
+def _strip_fence(content: Optional[str]) -> str:
+    """Unwrap a reply held in a single Markdown code fence."""
+    fenced = re.match(r"^```[^\n]*\n(.*?)\n?```\s*$", content or "", re.DOTALL)
+    if fenced:
+        return fenced.group(1) + "\n"
+    return content or ""
+
+
+class StaleSpeculation(RuntimeError):
+    """Raised when pre-generated changes no longer apply to the current HEAD."""
+
+
+class GeneratedChanges(NamedTuple):
+    """File changes generated for a task ahead of staging them."""
+
+    task_description: str
+    changes: List[dict]
+    # HEAD the changes were generated against
+    base: Optional[str]
+
 
 class CodeExecutor:
     """
@@ -24,6 +69,13 @@ class CodeExecutor:
         work_directory: Optional[str] = None,
         git_remote: Optional[str] = None,
         git_branch: str = "main",
+        stream: bool = False,
+        test_selector: Optional[TestImpactAnalyzer] = None,
+        test_runner: Optional[WarmPytestRunner] = None,
+        git_backend: Optional[GitBackend] = None,
+        push_queue: Optional[PushQueue] = None,
+        project_index: Optional[ProjectIndex] = None,
+        format_on_write: bool = False,
     ):
         """
         Initialize the executor.
@@ -33,110 +85,116 @@ class CodeExecutor:
             work_directory: Directory to write files; defaults to CWD.
             git_remote: Git remote name for pushing (e.g., 'origin').
             git_branch: Git branch to push to.
+            stream: Stream the AI response and write each file as soon as it
+                is complete, syntax-checking Python files meanwhile.
+            test_selector: Optional TestImpactAnalyzer; when given, validation
+                runs only the tests affected by the applied files.
+            test_runner: Optional WarmPytestRunner used instead of spawning a
+                fresh pytest process for every validation.
+            git_backend: GitBackend for work_directory; one is created if
+                omitted.
+            push_queue: Optional PushQueue; commits are then pushed in the
+                background instead of synchronously.
+            project_index: Optional ProjectIndex of work_directory, updated
+                with the files each task commits.
+            format_on_write: Format generated Python files with Black before
+                they are validated and committed.
         """
         self.client = openai_client
         self.work_directory = work_directory or os.getcwd()
         self.git_remote = git_remote
         self.git_branch = git_branch
+        self.stream = stream
+        self.test_selector = test_selector
+        self.test_runner = test_runner
+        self.git = git_backend or GitBackend(self.work_directory)
+        # A backend created here is closed with the executor
+        self._owns_git = git_backend is None
+        self.push_queue = push_queue
+        self.project_index = project_index
+        self.formatter = Formatter(self.work_directory, self.git)
+        self.format_on_write = format_on_write
+        self._staging: Optional[StagingArea] = None
+        # Output-token accounting for hunk edits versus whole-file rewrites
+        self.edit_stats = {
+            "hunk_files": 0,
+            "full_files": 0,
+            "hunk_fallbacks": 0,
+            "output_tokens": 0,
+            "output_tokens_saved": 0,
+        }
+        # Tasks completed by a local handler instead of the LLM
+        self.local_stats = {"handled": 0}
 
-    def execute(self, task_description: str) -> str:
+    @property
+    def staging(self) -> StagingArea:
+        """Private mirror of the work directory that changes are validated in."""
+        if self._staging is None:
+            self._staging = StagingArea(self.work_directory, self.git)
+        return self._staging
+
+    def close(self) -> None:
+        """Remove the staging mirror and stop a git backend created here."""
+        if self._staging is not None:
+            self._staging.close()
+            self._staging = None
+        if self._owns_git:
+            self.git.close()
+
+    def execute(
+        self, task_description: str, generated: Optional[GeneratedChanges] = None
+    ) -> str:
         """
         Execute a task by requesting file changes and applying them.
 
+        Args:
+            task_description: The task to execute.
+            generated: Changes already generated for the task by generate();
+                they are rebased onto the current HEAD instead of requesting
+                new ones.
+
         Returns:
             A summary of applied files.
 
         Raises:
             RuntimeError: If no valid function_call or JSON parse error.
+            StaleSpeculation: If generated no longer applies to HEAD; nothing
+                is written or committed.
         """
-        # Handle 'format code' fallback: run Black on the codebase
-        if re.match(r"^format code$", task_description, re.IGNORECASE):
-            # Attempt to run Black; if unavailable, log and skip
-            try:
-                subprocess.run(["black", "."], cwd=self.work_directory, check=True)
-            except FileNotFoundError:
-                # Black not installed
-                return "Black not installed, formatting skipped"
-            # Stage all changes
-            subprocess.run(["git", "add", "-A"], cwd=self.work_directory, check=True)
-            fmt_msg = "Apply code formatting via Black"
-            try:
-                subprocess.run(
-                    ["git", "commit", "-a", "-m", fmt_msg],
-                    cwd=self.work_directory,
-                    check=True,
-                )
-            except subprocess.CalledProcessError:
-                subprocess.run(
-                    ["git", "commit", "--allow-empty", "-m", fmt_msg],
-                    cwd=self.work_directory,
-                    check=True,
-                )
-            # Push if configured
-            if self.git_remote:
-                subprocess.run(
-                    ["git", "push", self.git_remote, self.git_branch],
-                    cwd=self.work_directory,
-                    check=False,
-                )
-            return "Code formatted with Black"
-        # Handle 'install black' fallback: install package and commit requirements.txt
-        if re.match(r"^install black", task_description, re.IGNORECASE):
-            # Install via pip
-            subprocess.run(
-                ["pip", "install", "black"], cwd=self.work_directory, check=True
+        # Deterministic tasks are handled locally without an LLM round trip
+        local = LocalDispatcher.match(task_description)
+        if local is not None:
+            handler, groups = local
+            result = handler.func(self, *groups)
+            self.local_stats["handled"] += 1
+            summary = result.summary
+            if result.staged:
+                # Staged changes pass the same test gate as generated ones
+                test_summary = self._validate_staged(task_description, result.paths)
+                summary = f"{summary}; {test_summary}"
+            if result.commit_message is not None:
+                self._commit(result.commit_message, result.paths)
+            return summary
+        self.staging.reset()
+        saved_before = self.edit_stats["output_tokens_saved"]
+        if generated is not None:
+            applied_files = self._stage_generated(generated)
+        elif self.stream:
+            applied_files = self._apply_streamed_changes(
+                task_description, *self._change_request(task_description)
             )
-            # Stage requirements.txt
-            subprocess.run(
-                ["git", "add", "requirements.txt"], cwd=self.work_directory, check=True
+        else:
+            applied_files = self._apply_changes(
+                task_description, *self._change_request(task_description)
             )
-            commit_msg = "Install Black (fallback)"
-            subprocess.run(
-                ["git", "commit", "-m", commit_msg], cwd=self.work_directory, check=True
-            )
-            # Push if configured
-            if self.git_remote:
-                subprocess.run(
-                    ["git", "push", self.git_remote, self.git_branch],
-                    cwd=self.work_directory,
-                    check=False,
-                )
-            return "Installed Black via pip"
-        # If task is a local fallback 'create file' command, handle directly
-        m = re.match(
-            r"create file (.+) with content '(.+)'", task_description, re.IGNORECASE
-        )
-        if m:
-            file_rel, content = m.groups()
-            file_path = os.path.join(self.work_directory, file_rel)
-            os.makedirs(os.path.dirname(file_path), exist_ok=True)
-            with open(file_path, "w", encoding="utf-8") as f:
-                f.write(content)
-            # Commit fallback file creation
-            # Stage all changes to capture new and modified files
-            subprocess.run(["git", "add", "-A"], cwd=self.work_directory, check=True)
-            commit_msg = f"Create {file_rel} (fallback)"[:50]
-            try:
-                subprocess.run(
-                    ["git", "commit", "-a", "-m", commit_msg],
-                    cwd=self.work_directory,
-                    check=True,
-                )
-            except subprocess.CalledProcessError:
-                # If no changes to commit (file existed and content identical), create empty commit
-                subprocess.run(
-                    ["git", "commit", "--allow-empty", "-m", commit_msg],
-                    cwd=self.work_directory,
-                    check=True,
-                )
-            # Push if configured
-            if self.git_remote:
-                subprocess.run(
-                    ["git", "push", self.git_remote, self.git_branch],
-                    cwd=self.work_directory,
-                    check=False,
-                )
-            return f"Created file {file_rel} with content."
+        summary = self._commit_and_validate(task_description, applied_files)
+        saved = self.edit_stats["output_tokens_saved"] - saved_before
+        if saved:
+            summary += f"; hunk edits saved ~{saved} output tokens"
+        return summary
+
+    def _change_request(self, task_description: str):
+        """Build the messages and function schema requesting a task's changes."""
         # Define function schema for file changes
         functions = [
             {
@@ -151,9 +209,28 @@ class CodeExecutor:
                                 "type": "object",
                                 "properties": {
                                     "path": {"type": "string"},
-                                    "content": {"type": "string"},
+                                    "content": {
+                                        "type": "string",
+                                        "description": "Complete file content; "
+                                        "use for new files or large rewrites.",
+                                    },
+                                    "edits": {
+                                        "type": "array",
+                                        "description": "Search/replace hunks "
+                                        "applied in order to the existing file; "
+                                        "each search must match exactly one "
+                                        "location. Prefer this for small changes.",
+                                        "items": {
+                                            "type": "object",
+                                            "properties": {
+                                                "search": {"type": "string"},
+                                                "replace": {"type": "string"},
+                                            },
+                                            "required": ["search", "replace"],
+                                        },
+                                    },
                                 },
-                                "required": ["path", "content"],
+                                "required": ["path"],
                             },
                         }
                     },
@@ -165,13 +242,87 @@ class CodeExecutor:
         user_prompt = (
             f"Task: {task_description}. Provide a function_call to apply_file_changes."
         )
+        messages = [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": user_prompt},
+        ]
+        return messages, functions
+
+    def can_generate(self, task_description: str) -> bool:
+        """True if the task needs LLM-generated changes (no local handler)."""
+        return LocalDispatcher.match(task_description) is None
+
+    def generate(self, task_description: str) -> GeneratedChanges:
+        """
+        Request a task's file changes without staging them.
+
+        Touches neither the staging area nor the work directory, so it can run
+        on another thread while a previous task is validated.
+
+        Raises:
+            RuntimeError: If the response is missing or malformed.
+        """
+        base = self.git.rev_parse("HEAD")
+        messages, functions = self._change_request(task_description)
+        if self.stream:
+            parser = ChangeStreamParser()
+            changes = []
+            for fragment in self.client.stream_function_call(
+                messages, functions, stage="execution", temperature=0
+            ):
+                changes.extend(parser.feed(fragment))
+            if not parser.text:
+                raise RuntimeError("AI did not return function_call for file changes.")
+            try:
+                parser.close()
+            except json.JSONDecodeError as e:
+                raise RuntimeError(f"Invalid JSON in function_call arguments: {e}")
+        else:
+            changes = self._request_changes(messages, functions)
+        if not changes:
+            raise RuntimeError("No file changes provided by AI.")
+        return GeneratedChanges(task_description, changes, base)
+
+    def _stage_generated(self, generated: GeneratedChanges) -> list:
+        """
+        Stage pre-generated changes on top of the current HEAD.
+
+        If HEAD moved since they were generated, hunk edits are re-applied to
+        the new file contents; a whole-file rewrite of a file changed meanwhile,
+        or a hunk that no longer matches, makes the changes stale.
+
+        Raises:
+            StaleSpeculation: If the changes cannot be rebased.
+        """
+        strict = generated.base != self.git.rev_parse("HEAD")
+        if strict:
+            moved = self.git.changed_since(generated.base) if generated.base else None
+            if moved is None:
+                raise StaleSpeculation("Base of the generated changes is unknown.")
+            moved = set(moved)
+            for change in generated.changes:
+                if not change.get("edits") and change["path"] in moved:
+                    raise StaleSpeculation(
+                        f"{change['path']} changed since its rewrite was generated."
+                    )
+        return self._stage_changes(
+            generated.task_description, generated.changes, strict
+        )
+
+    def _request_changes(self, messages: list, functions: list) -> list:
+        """
+        Request the execution-stage response in one piece.
+
+        Returns:
+            The change objects of the apply_file_changes call.
+
+        Raises:
+            RuntimeError: If the response is missing or malformed.
+        """
         # Call AI with function definitions
         # Request file changes via AI function-calling, using 'execution' model for detailed code
         message = self.client.chat(
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_prompt},
-            ],
+            messages=messages,
             functions=functions,
             stage="execution",
             temperature=0,
@@ -187,45 +338,327 @@ class CodeExecutor:
         changes = args.get("changes")
         if not isinstance(changes, list) or not changes:
             raise RuntimeError("No file changes provided by AI.")
+        return changes
+
+    def _apply_changes(
+        self, task_description: str, messages: list, functions: list
+    ) -> list:
+        """
+        Request the execution-stage response in one piece and stage its changes.
+
+        Returns:
+            The relative paths written.
+
+        Raises:
+            RuntimeError: If the response is missing, malformed, or produces
+                Python files with syntax errors; the work directory is untouched.
+        """
+        changes = self._request_changes(messages, functions)
+        return self._stage_changes(task_description, changes)
+
+    def _stage_changes(
+        self, task_description: str, changes: list, strict: bool = False
+    ) -> list:
+        """
+        Resolve and stage change objects, syntax-checking Python files.
+
+        Args:
+            task_description: The task the changes implement.
+            changes: apply_file_changes change objects.
+            strict: Raise StaleSpeculation instead of falling back when a
+                hunk does not match.
+
+        Returns:
+            The relative paths written.
+
+        Raises:
+            RuntimeError: If a generated Python file has syntax errors.
+        """
         applied_files = []
+        errors = []
+        prefetched = (
+            {} if strict else self._prefetch_full_contents(task_description, changes)
+        )
+        for change in changes:
+            path = change["path"]
+            content = self._resolve_change(
+                task_description, change, strict, prefetched.get(path)
+            )
+            self._write_file(path, content)
+            applied_files.append(path)
+            if path.endswith(".py"):
+                errors.append(_check_syntax(path, content))
+        errors = [error for error in errors if error]
+        if errors:
+            raise RuntimeError(
+                "Syntax errors in generated files:\n" + "\n".join(errors)
+            )
+        return applied_files
+
+    def _apply_streamed_changes(
+        self, task_description: str, messages: list, functions: list
+    ) -> list:
+        """
+        Stream the execution-stage response, staging each file as soon as its
+        change object is complete and syntax-checking finished Python files in
+        the background while later files are still generating.
+
+        Returns:
+            The relative paths written.
+
+        Raises:
+            RuntimeError: If the response is missing, malformed, or produces
+                Python files with syntax errors; the work directory is untouched.
+        """
+        parser = ChangeStreamParser()
+        applied_files = []
+        checks = []
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            for fragment in self.client.stream_function_call(
+                messages, functions, stage="execution", temperature=0
+            ):
+                for change in parser.feed(fragment):
+                    path = change["path"]
+                    content = self._resolve_change(task_description, change)
+                    self._write_file(path, content)
+                    applied_files.append(path)
+                    if path.endswith(".py"):
+                        checks.append(pool.submit(_check_syntax, path, content))
+            errors = [error for error in (c.result() for c in checks) if error]
+        if not parser.text:
+            raise RuntimeError("AI did not return function_call for file changes.")
+        try:
+            parser.close()
+        except json.JSONDecodeError as e:
+            raise RuntimeError(f"Invalid JSON in function_call arguments: {e}")
+        if not applied_files:
+            raise RuntimeError("No file changes provided by AI.")
+        if errors:
+            raise RuntimeError(
+                "Syntax errors in generated files:\n" + "\n".join(errors)
+            )
+        return applied_files
+
+    def _prefetch_full_contents(self, task_description: str, changes: list) -> dict:
+        """
+        Request the full contents of every file whose hunks do not match the
+        staged file and that has no content to fall back to, concurrently via
+        one chat_many() batch when there are several.
+
+        Returns:
+            Mapping of path to the full content received.
+        """
+        paths = [change["path"] for change in changes]
+        failed = []
         for change in changes:
-            file_path = os.path.join(self.work_directory, change["path"])
-            os.makedirs(os.path.dirname(file_path), exist_ok=True)
-            with open(file_path, "w", encoding="utf-8") as f:
-                f.write(change["content"])
-            applied_files.append(change["path"])
-        # Commit file changes
-        subprocess.run(
-            ["git", "add"] + applied_files, cwd=self.work_directory, check=True
+            path = change["path"]
+            if not change.get("edits") or change.get("content") is not None:
+                continue
+            # A file changed twice in one response is resolved in order instead
+            if paths.count(path) > 1:
+                continue
+            try:
+                apply_edits(self.staging.read(path), change["edits"])
+            except (HunkMismatch, OSError) as e:
+                failed.append((path, e))
+        if len(failed) < 2:
+            return {}
+        replies = self.client.chat_many(
+            [
+                {
+                    "messages": self._full_content_messages(
+                        task_description, path, reason
+                    ),
+                    "stage": "execution",
+                    "temperature": 0,
+                }
+                for path, reason in failed
+            ],
+            return_exceptions=True,
         )
-        commit_msg = f"AI: {task_description}"[:50]
-        subprocess.run(
-            ["git", "commit", "-m", commit_msg], cwd=self.work_directory, check=True
+        # A failed request is retried on its own when the change is resolved
+        return {
+            path: _strip_fence(reply)
+            for (path, _), reply in zip(failed, replies)
+            if not isinstance(reply, BaseException)
+        }
+
+    def _resolve_change(
+        self,
+        task_description: str,
+        change: dict,
+        strict: bool = False,
+        full_content: Optional[str] = None,
+    ) -> str:
+        """
+        Return the new content for a change, applying its hunks to the staged
+        file. If a hunk does not match, the change's full content is used, or
+        full_content (prefetched) or content requested from the model when the
+        change has none.
+
+        Raises:
+            RuntimeError: If the change has neither content nor edits.
+            StaleSpeculation: If strict and a hunk does not match.
+        """
+        path = change["path"]
+        stats = self.edit_stats
+        emitted = estimate_tokens(json.dumps(change))
+        edits = change.get("edits")
+        content = change.get("content")
+        if edits:
+            try:
+                content = apply_edits(self.staging.read(path), edits)
+                stats["hunk_files"] += 1
+            except (HunkMismatch, OSError) as e:
+                if strict:
+                    raise StaleSpeculation(f"Edits to {path} no longer apply: {e}")
+                stats["hunk_fallbacks"] += 1
+                if content is None:
+                    content = full_content
+                    if content is None:
+                        content = self._request_full_content(task_description, path, e)
+                    emitted += estimate_tokens(content)
+        elif content is not None:
+            stats["full_files"] += 1
+        else:
+            raise RuntimeError(f"Change for {path} has neither content nor edits.")
+        # A whole-file rewrite would have emitted the full content instead
+        rewrite = estimate_tokens(json.dumps({"path": path, "content": content}))
+        stats["output_tokens"] += emitted
+        if edits:
+            stats["output_tokens_saved"] += rewrite - emitted
+        return content
+
+    def _full_content_messages(
+        self, task_description: str, path: str, reason: Exception
+    ) -> list:
+        """Messages asking for the complete content of a file whose hunks failed."""
+        return [
+            {
+                "role": "system",
+                "content": "You output complete file contents only, "
+                "without code fences or commentary.",
+            },
+            {
+                "role": "user",
+                "content": f"Task: {task_description}. Your edits to {path} could "
+                f"not be applied ({reason}). Reply with the complete new content "
+                f"of {path}.",
+            },
+        ]
+
+    def _request_full_content(
+        self, task_description: str, path: str, reason: Exception
+    ) -> str:
+        """Ask the model for the complete content of a file whose hunks failed."""
+        messages = self._full_content_messages(task_description, path, reason)
+        return _strip_fence(
+            self.client.chat(messages, stage="execution", temperature=0)
         )
-        # Run test suite to validate changes
+
+    def _commit(self, message: str, paths: Optional[list] = None) -> None:
+        """
+        Commit pipeline shared by LLM and local tasks: commit the given paths
+        (every change if None), update the project index, and push.
+        """
+        if paths is None:
+            self.git.commit_all(message)
+            if self.project_index is not None:
+                self.project_index.invalidate()
+        else:
+            self.git.commit(paths, message)
+            if self.project_index is not None:
+                self.project_index.update(paths)
+        # Push if configured, through the push queue when one is set
+        if self.push_queue is not None:
+            self.push_queue.request()
+        elif self.git_remote:
+            self.git.push(self.git_remote, self.git_branch)
+
+    def _write_file(self, rel_path: str, content: str) -> None:
+        """Stage a file; the work directory is only written once validated."""
+        if self.format_on_write:
+            content = self.formatter.format_source(rel_path, content)
+        self.staging.write(rel_path, content)
+
+    def _validate_staged(self, task_description: str, changed_files: list) -> str:
+        """
+        Run the tests affected by the staged files inside the staging mirror
+        and, only if they pass, apply the staged changes to the work directory.
+
+        Returns:
+            The test summary.
+
+        Raises:
+            RuntimeError: If tests fail; the work directory is untouched.
+        """
         try:
-            test_proc = subprocess.run(
-                ["pytest", "-q"],
-                cwd=self.work_directory,
-                check=True,
-                capture_output=True,
-                text=True,
-            )
+            test_summary = self.run_tests(changed_files, self.staging.path)
         except subprocess.CalledProcessError as e:
-            # Tests failed: revert commit
-            subprocess.run(
-                ["git", "reset", "--hard", "HEAD~1"],
-                cwd=self.work_directory,
-                check=True,
-            )
             raise RuntimeError(
                 f"Tests failed for task '{task_description}':\n{e.stdout}\n{e.stderr}"
             )
-        # Push commit if configured
-        if self.git_remote:
-            subprocess.run(
-                ["git", "push", self.git_remote, self.git_branch],
-                cwd=self.work_directory,
-                check=False,
-            )
-        return f"Applied changes to: {', '.join(applied_files)}; tests passed"
+        self.staging.apply()
+        return test_summary
+
+    def _commit_and_validate(self, task_description: str, applied_files: list) -> str:
+        """
+        Run the test suite against the staged files and, only if it passes,
+        copy them into the work directory, commit, and push.
+
+        Raises:
+            RuntimeError: If tests fail; neither the work directory nor git is
+                touched.
+        """
+        test_summary = self._validate_staged(task_description, applied_files)
+        # Validated and applied to the work directory: commit
+        self._commit(f"AI: {task_description}"[:50], applied_files)
+        return f"Applied changes to: {', '.join(applied_files)}; {test_summary}"
+
+    def run_tests(self, changed_files: list, cwd: Optional[str] = None) -> str:
+        """
+        Run the tests affected by changed_files (all tests without a selector).
+
+        Args:
+            changed_files: Relative paths of the changed files.
+            cwd: Tree to run the tests in; defaults to the work directory.
+
+        Returns:
+            A summary of the validation, e.g. 'tests passed (ran 2 of 9 ...)'.
+
+        Raises:
+            subprocess.CalledProcessError: If any selected test fails.
+        """
+        cwd = cwd or self.work_directory
+        selection = None
+        command = ["pytest", "-q"]
+        if self.test_selector is not None:
+            # Select tests from the tree being validated, not the live one
+            selection = self.test_selector.select(changed_files, source_root=cwd)
+            if not selection.full:
+                if not selection.tests:
+                    return f"no affected tests ({selection.describe()})"
+                command += selection.tests
+        try:
+            if self.test_runner is not None:
+                proc = self.test_runner.run(command[1:], cwd)
+                if proc.returncode != 0:
+                    raise subprocess.CalledProcessError(
+                        proc.returncode, command, proc.stdout, proc.stderr
+                    )
+            else:
+                subprocess.run(
+                    command,
+                    cwd=cwd,
+                    check=True,
+                    capture_output=True,
+                    text=True,
+                )
+        except subprocess.CalledProcessError as e:
+            # Selected files may hold no tests; a full run must collect some
+            selective = selection is not None and not selection.full
+            if not (selective and e.returncode == PYTEST_NO_TESTS_COLLECTED):
+                raise
+        if selection is None:
+            return "tests passed"
+        return f"tests passed ({selection.describe()})"
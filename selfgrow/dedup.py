@@ -0,0 +1,79 @@
+"""
+Dedup Module
+
+MinHash signatures and LSH banding used to detect near-duplicate task descriptions.
+"""
+
+import hashlib
+import random
+import re
+import struct
+from typing import List, Tuple
+
+NUM_PERM = 64
+BANDS = 16
+ROWS_PER_BAND = NUM_PERM // BANDS
+SHINGLE_SIZE = 5
+
+_PRIME = (1 << 61) - 1
+_rng = random.Random(0x5E1F)
+# Fixed seed: signatures are persisted, so the permutations must never change.
+_PERMUTATIONS = [
+    (_rng.randrange(1, _PRIME), _rng.randrange(0, _PRIME)) for _ in range(NUM_PERM)
+]
+_SIGNATURE_FORMAT = f"<{NUM_PERM}Q"
+
+
+def shingles(text: str, size: int = SHINGLE_SIZE) -> set:
+    """
+    Split normalized text into overlapping character shingles.
+
+    Case, punctuation and runs of whitespace are ignored so cosmetic variations
+    of the same task produce the same shingles.
+    """
+    normalized = " ".join(re.findall(r"[a-z0-9]+", text.lower()))
+    if len(normalized) <= size:
+        return {normalized}
+    return {normalized[i : i + size] for i in range(len(normalized) - size + 1)}
+
+
+def signature(text: str) -> Tuple[int, ...]:
+    """Compute the MinHash signature of text."""
+    hashes = [
+        int.from_bytes(hashlib.blake2b(s.encode(), digest_size=8).digest(), "little")
+        for s in shingles(text)
+    ]
+    return tuple(min((a * h + b) % _PRIME for h in hashes) for a, b in _PERMUTATIONS)
+
+
+def similarity(sig_a: Tuple[int, ...], sig_b: Tuple[int, ...]) -> float:
+    """Estimate the Jaccard similarity of two signatures."""
+    return sum(1 for a, b in zip(sig_a, sig_b) if a == b) / NUM_PERM
+
+
+def band_buckets(sig: Tuple[int, ...]) -> List[Tuple[int, int]]:
+    """
+    Hash each LSH band of a signature to a bucket.
+
+    Returns:
+        A list of (band, bucket) pairs; buckets are signed 64-bit integers so
+        they can be stored directly in SQLite.
+    """
+    buckets = []
+    for band in range(BANDS):
+        rows = sig[band * ROWS_PER_BAND : (band + 1) * ROWS_PER_BAND]
+        digest = hashlib.blake2b(
+            struct.pack(f"<{ROWS_PER_BAND}Q", *rows), digest_size=8
+        ).digest()
+        buckets.append((band, int.from_bytes(digest, "little", signed=True)))
+    return buckets
+
+
+def pack(sig: Tuple[int, ...]) -> bytes:
+    """Serialize a signature for storage."""
+    return struct.pack(_SIGNATURE_FORMAT, *sig)
+
+
+def unpack(data: bytes) -> Tuple[int, ...]:
+    """Deserialize a signature produced by pack()."""
+    return struct.unpack(_SIGNATURE_FORMAT, data)
@@ -0,0 +1,256 @@
+"""
+Diff Summary Module
+
+Compacts `git diff` output to a token budget for prompts: whitespace-only
+hunks and generated files are collapsed, the remaining hunks are ranked, and
+whatever does not fit is summarised in one line. Results are cached by the
+commit SHAs they were computed for.
+"""
+
+import fnmatch
+import re
+from collections import OrderedDict
+from typing import List, Optional
+
+from .git_backend import GitBackend
+from .tokens import CHARS_PER_TOKEN, estimate_tokens
+
+# Token budget for the diff pasted into refinement prompts
+DEFAULT_DIFF_TOKENS = 2000
+# Token budget for each previous task result in refinement prompts
+DEFAULT_RESULT_TOKENS = 500
+# Compacted diffs kept per summarizer
+SUMMARY_CACHE_SIZE = 32
+# Files whose changes are machine-made; only their size is reported
+GENERATED_PATTERNS = (
+    "*.lock",
+    "*-lock.json",
+    "*.min.js",
+    "*.min.css",
+    "*.map",
+    "*.pyc",
+    "*.log",
+    ".selfgrow_*",
+)
+
+_HUNK_HEADER = re.compile(r"^@@ .* @@")
+
+
+class FileDiff:
+    """The header lines and hunks of one file in a diff."""
+
+    def __init__(self, header: List[str]):
+        self.header = header
+        self.hunks: List[List[str]] = []
+        match = re.match(r"^diff --git a/(.*?) b/(.*)$", header[0])
+        self.path = match.group(2) if match else header[0]
+
+    @property
+    def binary(self) -> bool:
+        return any(line.startswith("Binary files ") for line in self.header)
+
+    @property
+    def generated(self) -> bool:
+        name = self.path.rsplit("/", 1)[-1]
+        return any(fnmatch.fnmatch(name, p) for p in GENERATED_PATTERNS)
+
+    def counts(self) -> tuple:
+        """(added, removed) line counts over all hunks."""
+        added = removed = 0
+        for hunk in self.hunks:
+            for line in hunk[1:]:
+                if line.startswith("+"):
+                    added += 1
+                elif line.startswith("-"):
+                    removed += 1
+        return added, removed
+
+
+def parse_diff(text: str) -> List[FileDiff]:
+    """Split unified `git diff` output into per-file hunks."""
+    files: List[FileDiff] = []
+    for line in text.splitlines():
+        if line.startswith("diff --git "):
+            files.append(FileDiff([line]))
+        elif not files:
+            continue
+        elif _HUNK_HEADER.match(line):
+            files[-1].hunks.append([line])
+        elif files[-1].hunks:
+            files[-1].hunks[-1].append(line)
+        else:
+            files[-1].header.append(line)
+    return files
+
+
+def _whitespace_only(hunk: List[str]) -> bool:
+    """True if the hunk's removed and added lines differ only in whitespace."""
+    removed = "".join(
+        re.sub(r"\s", "", line[1:]) for line in hunk if line.startswith("-")
+    )
+    added = "".join(
+        re.sub(r"\s", "", line[1:]) for line in hunk if line.startswith("+")
+    )
+    return removed == added
+
+
+def _hunk_score(file_diff: FileDiff, hunk: List[str]) -> float:
+    """Rank hunks by changed lines, preferring source over tests and docs."""
+    changed = sum(1 for line in hunk[1:] if line[:1] in ("+", "-"))
+    path = file_diff.path
+    if path.endswith(".py"):
+        weight = 1.0 if "test" in path.rsplit("/", 1)[-1] else 2.0
+    else:
+        weight = 0.5
+    # Small hunks are cheap to include, so favour density over raw size
+    return weight * changed / (len(hunk) ** 0.5)
+
+
+def compact_diff(text: str, max_tokens: int = DEFAULT_DIFF_TOKENS) -> str:
+    """
+    Compact a unified diff to roughly max_tokens.
+
+    Every file is listed with its +/- line counts. Hunks of generated or
+    binary files and whitespace-only hunks are replaced by a note; the other
+    hunks are included, highest ranked first, while they fit the budget.
+    Omitted hunks are reported per file.
+    """
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    files = parse_diff(text)
+    stat = []
+    for file_diff in files:
+        added, removed = file_diff.counts()
+        stat.append(f"{file_diff.path} | +{added} -{removed}")
+    stat_text = "\n".join(stat) + "\n"
+    used = estimate_tokens(stat_text)
+    if used > max_tokens:
+        return _truncate_lines(stat_text, max_tokens)
+    notes = {}
+    candidates = []
+    for i, file_diff in enumerate(files):
+        if file_diff.binary or file_diff.generated:
+            notes[i] = "(generated or binary file, hunks omitted)"
+        else:
+            for j, hunk in enumerate(file_diff.hunks):
+                if _whitespace_only(hunk):
+                    notes.setdefault(i, "(whitespace-only hunks omitted)")
+                else:
+                    candidates.append((_hunk_score(file_diff, hunk), i, j))
+    shown_files = set()
+    for i, note in notes.items():
+        used += estimate_tokens(files[i].header[0] + note) + 2
+        shown_files.add(i)
+    included = set()
+    for _, i, j in sorted(candidates, key=lambda c: -c[0]):
+        cost = estimate_tokens("\n".join(files[i].hunks[j])) + 1
+        # A file's header is paid for once, with its first shown hunk
+        if i not in shown_files:
+            cost += estimate_tokens(files[i].header[0]) + 1
+        if used + cost > max_tokens:
+            continue
+        included.add((i, j))
+        shown_files.add(i)
+        used += cost
+    out = [stat_text]
+    for i, file_diff in enumerate(files):
+        shown = [j for j in range(len(file_diff.hunks)) if (i, j) in included]
+        skipped = len(file_diff.hunks) - len(shown)
+        if not shown and i not in notes:
+            continue
+        out.append(file_diff.header[0])
+        for j in shown:
+            out.extend(file_diff.hunks[j])
+        if i in notes:
+            out.append(notes[i])
+        elif skipped:
+            out.append(f"... {skipped} more hunk(s) omitted")
+    return "\n".join(out) + "\n"
+
+
+def _truncate_lines(text: str, max_tokens: int) -> str:
+    lines = []
+    used = 0
+    for line in text.splitlines():
+        cost = estimate_tokens(line) + 1
+        if used + cost > max_tokens:
+            lines.append("... (truncated)")
+            break
+        lines.append(line)
+        used += cost
+    return "\n".join(lines) + "\n"
+
+
+def truncate_middle(text: str, max_tokens: int = DEFAULT_RESULT_TOKENS) -> str:
+    """
+    Cut text to about max_tokens, keeping its beginning and end.
+
+    Task results put the summary first and test failures last, so the middle
+    is the least informative part.
+    """
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    lines = text.splitlines()
+    # Reserve room for the truncation marker
+    budget = max_tokens - 8
+    head: List[str] = []
+    tail: List[str] = []
+    lo, hi = 0, len(lines) - 1
+    used = 0
+    while lo <= hi:
+        from_head = len(head) <= len(tail)
+        line = lines[lo] if from_head else lines[hi]
+        cost = estimate_tokens(line) + 1
+        if used + cost > budget:
+            break
+        used += cost
+        if from_head:
+            head.append(line)
+            lo += 1
+        else:
+            tail.append(line)
+            hi -= 1
+    if not head:
+        # A single oversized line: keep its prefix rather than nothing
+        head.append(lines[0][: max(budget, 0) * CHARS_PER_TOKEN])
+    tail.reverse()
+    marker = f"... [{hi - lo + 1} lines truncated] ..."
+    return "\n".join(head + [marker] + tail)
+
+
+class DiffSummarizer:
+    """
+    Compacted `git diff old new` output, cached by the SHAs the revisions
+    resolve to and the token budget.
+
+    The cache lives in memory and is lost when the process exits; a new run
+    compacts each diff again, once.
+    """
+
+    def __init__(self, git_backend: Optional[GitBackend] = None):
+        """
+        Args:
+            git_backend: Backend of the repository; one is created if omitted.
+        """
+        self.git = git_backend or GitBackend()
+        self._cache: "OrderedDict[tuple, str]" = OrderedDict()
+
+    def summary(
+        self, old: str, new: str = "HEAD", max_tokens: int = DEFAULT_DIFF_TOKENS
+    ) -> str:
+        """
+        Return the compacted diff between two revisions.
+
+        Raises:
+            subprocess.CalledProcessError: If a revision is invalid.
+        """
+        key = (self.git.rev_parse(old), self.git.rev_parse(new), max_tokens)
+        if None not in key and key in self._cache:
+            self._cache.move_to_end(key)
+            return self._cache[key]
+        text = compact_diff(self.git.diff(old, new), max_tokens)
+        if None not in key:
+            self._cache[key] = text
+            if len(self._cache) > SUMMARY_CACHE_SIZE:
+                self._cache.popitem(last=False)
+        return text
@@ -0,0 +1,90 @@
+"""
+Edits Module
+
+Applies search/replace hunks produced by the model to existing file contents.
+"""
+
+from typing import Iterable, List, Optional, Tuple
+
+
+class HunkMismatch(ValueError):
+    """Raised when a hunk's search text does not identify exactly one location."""
+
+
+def _locate_lines(
+    lines: List[str], search: List[str], normalize
+) -> Optional[Tuple[int, int]]:
+    """Find the unique run of lines equal to search under normalize."""
+    wanted = [normalize(line) for line in search]
+    # Leading/trailing blank lines in the hunk carry no location information
+    while wanted and not wanted[0]:
+        wanted.pop(0)
+    while wanted and not wanted[-1]:
+        wanted.pop()
+    if not wanted:
+        return None
+    first = wanted[0]
+    found = None
+    for start in range(len(lines) - len(wanted) + 1):
+        if normalize(lines[start]) != first:
+            continue
+        if all(normalize(lines[start + i]) == wanted[i] for i in range(1, len(wanted))):
+            if found is not None:
+                raise HunkMismatch(
+                    f"search text is ambiguous: {search[0].strip()!r}..."
+                )
+            found = (start, start + len(wanted))
+    return found
+
+
+def apply_hunk(text: str, search: str, replace: str) -> str:
+    """
+    Replace the single occurrence of search in text with replace.
+
+    An exact substring match is tried first. Failing that, lines are compared
+    ignoring trailing whitespace and then ignoring indentation, so hunks that
+    differ from the file only in whitespace still apply.
+
+    Raises:
+        HunkMismatch: If search is empty, missing, or matches more than once.
+    """
+    if not search:
+        raise HunkMismatch("empty search text")
+    count = text.count(search)
+    if count == 1:
+        return text.replace(search, replace, 1)
+    if count > 1:
+        raise HunkMismatch(f"search text matches {count} locations")
+    lines = text.splitlines(keepends=True)
+    search_lines = search.splitlines()
+    for normalize in (str.rstrip, str.strip):
+        span = _locate_lines(lines, search_lines, normalize)
+        if span is None:
+            continue
+        start, end = span
+        replacement = replace
+        # Keep the line break the replaced block ended with
+        if replacement and not replacement.endswith("\n"):
+            if lines[end - 1].endswith("\n"):
+                replacement += "\n"
+        return "".join(lines[:start]) + replacement + "".join(lines[end:])
+    raise HunkMismatch(f"search text not found: {search_lines[0].strip()!r}...")
+
+
+def apply_edits(text: str, edits: Iterable[dict]) -> str:
+    """
+    Apply search/replace edits to text in order.
+
+    Args:
+        text: Current file contents.
+        edits: Dicts with 'search' and 'replace' keys.
+
+    Returns:
+        The edited contents.
+
+    Raises:
+        HunkMismatch: If any edit fails to apply; text is left as given.
+    """
+    for edit in edits:
+        text = apply_hunk(text, edit.get("search", ""), edit.get("replace", ""))
+    return text
@@ -0,0 +1,181 @@
+"""
+Formatter Module
+
+Formats Python files in-process through Black's API, only touching files that
+changed since the last formatting run and skipping contents already known to
+be formatted.
+"""
+
+import hashlib
+import json
+import os
+from typing import Dict, List, Optional
+
+from .git_backend import GitBackend
+
+try:
+    import black
+except ImportError:  # pragma: no cover - Black is listed in requirements.txt
+    black = None
+
+DEFAULT_FORMAT_CACHE = ".selfgrow_format_cache.json"
+# Formatted-content hashes kept before the cache starts over
+MAX_CACHED_HASHES = 20000
+
+
+def _digest(content: str) -> str:
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+
+class Formatter:
+    """
+    In-process Black formatter with a content-hash cache.
+
+    The cache records the hashes of file contents Black left unchanged (or
+    produced), so re-formatting an unchanged file costs one hash. It also
+    records the commit the last whole-tree run started from, so the next run
+    only considers files changed since then.
+    """
+
+    def __init__(
+        self,
+        root: Optional[str] = None,
+        git_backend: Optional[GitBackend] = None,
+        cache_path: str = DEFAULT_FORMAT_CACHE,
+    ):
+        """
+        Args:
+            root: Project root; defaults to CWD.
+            git_backend: Backend for root; one is created if omitted.
+            cache_path: Cache file, relative to root.
+        """
+        self.root = root or os.getcwd()
+        self.git = git_backend or GitBackend(self.root)
+        self.cache_path = os.path.join(self.root, cache_path)
+        self._mode = None
+        self._cache = None
+
+    @property
+    def available(self) -> bool:
+        """True if Black can be imported."""
+        return black is not None
+
+    @property
+    def mode(self):
+        """Black mode built from the project's pyproject.toml, if any."""
+        if self._mode is None:
+            options = {}
+            pyproject = os.path.join(self.root, "pyproject.toml")
+            if os.path.exists(pyproject):
+                try:
+                    config = black.parse_pyproject_toml(pyproject)
+                except Exception:
+                    config = {}
+                if "line_length" in config:
+                    options["line_length"] = int(config["line_length"])
+                if config.get("skip_string_normalization"):
+                    options["string_normalization"] = False
+                if config.get("skip_magic_trailing_comma"):
+                    options["magic_trailing_comma"] = False
+            self._mode = black.Mode(**options)
+        return self._mode
+
+    def _load_cache(self) -> dict:
+        if self._cache is None:
+            # Hashes are only valid for the Black version and mode that made them
+            key = f"{black.__version__}:{self.mode!r}"
+            try:
+                with open(self.cache_path, "r", encoding="utf-8") as f:
+                    cache = json.load(f)
+            except (OSError, ValueError):
+                cache = {}
+            if not isinstance(cache, dict) or cache.get("key") != key:
+                cache = {"key": key, "base": None, "formatted": []}
+            self._cache = cache
+            self._formatted = set(cache["formatted"])
+        return self._cache
+
+    def _save_cache(self) -> None:
+        if len(self._formatted) > MAX_CACHED_HASHES:
+            self._formatted = set()
+        self._cache["formatted"] = sorted(self._formatted)
+        try:
+            with open(self.cache_path, "w", encoding="utf-8") as f:
+                json.dump(self._cache, f)
+        except OSError:
+            pass
+
+    def format_source(self, path: str, content: str) -> str:
+        """
+        Return content formatted by Black, or unchanged if it already is,
+        Black is unavailable, or the source cannot be parsed.
+        """
+        if black is None or not path.endswith(".py"):
+            return content
+        self._load_cache()
+        if _digest(content) in self._formatted:
+            return content
+        try:
+            formatted = black.format_file_contents(content, fast=False, mode=self.mode)
+        except black.NothingChanged:
+            formatted = content
+        except Exception:
+            # Invalid source is left for the syntax gate to report
+            return content
+        self._formatted.add(_digest(formatted))
+        return formatted
+
+    def _candidates(self) -> List[str]:
+        """Python files changed since the last run (all of them on the first)."""
+        base = self._cache.get("base")
+        changed = self.git.changed_since(base) if base else None
+        if changed is None:
+            changed = self.git.list_files()
+        return sorted(path for path in set(changed) if path.endswith(".py"))
+
+    def format_changes(self) -> Dict[str, str]:
+        """
+        Format the Python files changed since the last run without writing
+        them.
+
+        The run is only recorded as the new starting point when nothing needed
+        rewriting; otherwise the next run reconsiders the same files, which
+        the hash cache makes cheap once the rewrites were applied.
+
+        Returns:
+            Mapping of each relative path Black would rewrite to its new
+            content.
+        """
+        if black is None:
+            return {}
+        self._load_cache()
+        head = self.git.rev_parse("HEAD")
+        rewritten = {}
+        for rel_path in self._candidates():
+            file_path = os.path.join(self.root, rel_path)
+            try:
+                with open(file_path, "r", encoding="utf-8") as f:
+                    content = f.read()
+            except (OSError, UnicodeDecodeError):
+                continue
+            formatted = self.format_source(rel_path, content)
+            if formatted != content:
+                rewritten[rel_path] = formatted
+        if not rewritten:
+            # Everything changed up to HEAD is formatted
+            self._cache["base"] = head
+        self._save_cache()
+        return rewritten
+
+    def format_tree(self) -> List[str]:
+        """
+        Format the Python files changed since the last run in place.
+
+        Returns:
+            The relative paths Black rewrote.
+        """
+        rewritten = self.format_changes()
+        for rel_path, formatted in rewritten.items():
+            with open(os.path.join(self.root, rel_path), "w", encoding="utf-8") as f:
+                f.write(formatted)
+        return sorted(rewritten)
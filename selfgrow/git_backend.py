@@ -0,0 +1,231 @@
+"""
+Git Backend Module
+
+A single gateway for the agent's git operations. Lookups (rev-parse, "is this
+path tracked?") are answered by one long-lived `git cat-file --batch-check`
+process instead of a fork each, and diffs between two commits are cached by
+their SHAs. Staging and committing still run one-off git processes: one for
+commits of tracked files, two when new files must be added first.
+"""
+
+import os
+import subprocess
+import threading
+from collections import OrderedDict
+from typing import List, Optional
+
+# Number of (old, new) commit pairs whose diff text is kept
+DIFF_CACHE_SIZE = 32
+# Directories never listed when the tree is not a git checkout
+SKIP_DIRS = {".git", "__pycache__", ".pytest_cache", ".venv", "venv", "node_modules"}
+
+
+class GitBackend:
+    """
+    Runs git commands for one working tree, counting the processes it spawns.
+    """
+
+    def __init__(self, repo_dir: Optional[str] = None):
+        """
+        Args:
+            repo_dir: Working tree the commands run in; defaults to CWD.
+        """
+        self.repo_dir = repo_dir or os.getcwd()
+        self.processes_spawned = 0
+        self._batch = None
+        # Set once the helper fails right after starting (e.g. not a repository)
+        self._batch_unavailable = False
+        self._batch_lock = threading.Lock()
+        # Guards processes_spawned and the diff cache across threads
+        self._state_lock = threading.Lock()
+        self._diff_cache: "OrderedDict[tuple, str]" = OrderedDict()
+
+    def run(
+        self, *args: str, cwd: Optional[str] = None, check: bool = True
+    ) -> subprocess.CompletedProcess:
+        """Run a one-off git command, capturing its output as text."""
+        self._count_process()
+        return subprocess.run(
+            ["git", *args],
+            cwd=cwd or self.repo_dir,
+            check=check,
+            capture_output=True,
+            text=True,
+        )
+
+    def _count_process(self) -> None:
+        with self._state_lock:
+            self.processes_spawned += 1
+
+    def _batch_check(self, name: str) -> Optional[List[str]]:
+        """
+        Resolve an object name through the persistent cat-file process.
+
+        Returns:
+            [sha, type, size], or None if the object does not exist or the
+            helper is unavailable (e.g. not a git repository).
+        """
+        if "\n" in name or self._batch_unavailable:
+            return None
+        with self._batch_lock:
+            for _ in range(2):
+                fresh = self._batch is None or self._batch.poll() is not None
+                if fresh:
+                    try:
+                        self._count_process()
+                        self._batch = subprocess.Popen(
+                            ["git", "cat-file", "--batch-check"],
+                            cwd=self.repo_dir,
+                            stdin=subprocess.PIPE,
+                            stdout=subprocess.PIPE,
+                            stderr=subprocess.DEVNULL,
+                            text=True,
+                        )
+                    except OSError:
+                        self._batch_unavailable = True
+                        return None
+                try:
+                    self._batch.stdin.write(name + "\n")
+                    self._batch.stdin.flush()
+                    line = self._batch.stdout.readline()
+                except (BrokenPipeError, ValueError):
+                    line = ""
+                if line:
+                    fields = line.split()
+                    return None if fields[-1] == "missing" else fields
+                self._close_batch()
+                if fresh:
+                    self._batch_unavailable = True
+                    return None
+                # A long-lived helper died; restart it once
+            return None
+
+    def rev_parse(self, rev: str) -> Optional[str]:
+        """Return the object SHA a revision names, or None if it does not exist."""
+        fields = self._batch_check(rev)
+        if fields:
+            return fields[0]
+        if self._batch_unavailable:
+            proc = self.run("rev-parse", "--verify", "-q", rev, check=False)
+            return proc.stdout.strip() or None
+        return None
+
+    def is_tracked(self, path: str) -> bool:
+        """True if path exists in the HEAD commit."""
+        fields = self._batch_check(f"HEAD:{path}")
+        return bool(fields) and fields[1] == "blob"
+
+    def commit(self, paths: List[str], message: str) -> None:
+        """
+        Commit exactly the given paths.
+
+        Paths already in HEAD are committed with a single `git commit --
+        <paths>`; new files are staged with `git add` first. Either way, other
+        staged changes are left out of the commit.
+
+        Raises:
+            subprocess.CalledProcessError: If git fails.
+        """
+        if not all(self.is_tracked(path) for path in paths):
+            self.run("add", *paths)
+        self.run("commit", "-m", message, "--", *paths)
+
+    def commit_all(self, message: str) -> None:
+        """
+        Stage every change and commit, creating an empty commit if there is
+        nothing to commit.
+        """
+        self.run("add", "-A")
+        try:
+            self.run("commit", "-a", "-m", message)
+        except subprocess.CalledProcessError:
+            self.run("commit", "--allow-empty", "-m", message)
+
+    def push(self, remote: str, branch: str) -> bool:
+        """Push branch to remote; returns False instead of raising on failure."""
+        return self.run("push", remote, branch, check=False).returncode == 0
+
+    def diff(self, old: str, new: str) -> str:
+        """
+        Return `git diff old new`, cached by the SHAs the revisions resolve to.
+
+        Raises:
+            subprocess.CalledProcessError: If a revision is invalid.
+        """
+        key = (self.rev_parse(old), self.rev_parse(new))
+        if None not in key:
+            with self._state_lock:
+                if key in self._diff_cache:
+                    self._diff_cache.move_to_end(key)
+                    return self._diff_cache[key]
+        text = self.run("diff", old, new).stdout
+        if None not in key:
+            with self._state_lock:
+                self._diff_cache[key] = text
+                if len(self._diff_cache) > DIFF_CACHE_SIZE:
+                    self._diff_cache.popitem(last=False)
+        return text
+
+    def ls_files(self) -> Optional[List[str]]:
+        """Tracked and untracked, non-ignored files; None outside a repository."""
+        proc = self.run(
+            "ls-files", "-z", "--cached", "--others", "--exclude-standard", check=False
+        )
+        if proc.returncode != 0 or not proc.stdout:
+            return None
+        return [p for p in proc.stdout.split("\0") if p]
+
+    def list_files(self) -> List[str]:
+        """
+        Files of the working tree: ls_files() in a repository, otherwise a
+        walk that skips VCS, cache, and virtualenv directories.
+        """
+        listed = self.ls_files()
+        if listed is not None:
+            return listed
+        files = []
+        for dirpath, dirnames, filenames in os.walk(self.repo_dir):
+            dirnames[:] = [d for d in dirnames if d not in SKIP_DIRS]
+            for name in filenames:
+                rel = os.path.relpath(os.path.join(dirpath, name), self.repo_dir)
+                files.append(rel.replace(os.sep, "/"))
+        return files
+
+    def changed_since(self, rev: str) -> Optional[List[str]]:
+        """
+        Paths changed between rev and the working tree, plus untracked files.
+
+        Returns:
+            The relative paths, or None if rev cannot be diffed against.
+        """
+        diff = self.run("diff", "--name-only", rev, "--", check=False)
+        if diff.returncode != 0:
+            return None
+        untracked = self.run(
+            "ls-files", "-z", "--others", "--exclude-standard", check=False
+        )
+        paths = diff.stdout.splitlines()
+        paths += [p for p in untracked.stdout.split("\0") if p]
+        return paths
+
+    def ensure_remote(self, name: str, url: str) -> None:
+        """Point remote name at url, adding it if missing."""
+        current = self.run("config", "--get", f"remote.{name}.url", check=False)
+        if current.returncode != 0:
+            self.run("remote", "add", name, url)
+        elif current.stdout.strip() != url:
+            self.run("remote", "set-url", name, url)
+
+    def _close_batch(self) -> None:
+        if self._batch is not None:
+            try:
+                self._batch.stdin.close()
+            except OSError:
+                pass
+            self._batch.wait()
+            self._batch = None
+
+    def close(self) -> None:
+        """Stop the persistent helper process."""
+        with self._batch_lock:
+            self._close_batch()
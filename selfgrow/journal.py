@@ -5,9 +5,11 @@ Handles appending entries to the Lab Journal (README.md) and committing them to
 """
 
 import re
-import os
 import datetime
-import subprocess
+from typing import List, Optional
+
+from .git_backend import GitBackend
+from .push_queue import PushQueue
 
 README_PATH = "README.md"
 ENTRY_REGEX = re.compile(r"## Entry (\d+)")
@@ -16,12 +18,25 @@ ENTRY_REGEX = re.compile(r"## Entry (\d+)")
 class Journal:
     """
     Append chronicle entries to the Lab Journal in README.md, commit, and push.
+
+    Entries are written immediately but committed in batches by flush(), so
+    a burst of log lines costs one commit and one push.
     """
 
-    def __init__(self, git_remote: str = None, git_branch: str = "main"):
+    def __init__(
+        self,
+        git_remote: str = None,
+        git_branch: str = "main",
+        git_backend: Optional[GitBackend] = None,
+        push_queue: Optional[PushQueue] = None,
+    ):
         self.readme_path = README_PATH
         self.git_remote = git_remote
         self.git_branch = git_branch
+        self.git = git_backend or GitBackend()
+        self.push_queue = push_queue
+        # Descriptions written to README.md but not committed yet
+        self.pending: List[str] = []
 
     def _get_next_entry_number(self) -> int:
         max_num = 0
@@ -40,6 +55,7 @@ class Journal:
     def log(self, description: str) -> None:
         """
         Append a new journal entry with the given description and current timestamp.
+        The entry is committed by the next flush().
 
         Args:
             description: Short description of the event.
@@ -63,18 +79,22 @@ class Journal:
         # Write back
         with open(self.readme_path, "w", encoding="utf-8") as f:
             f.writelines(new_lines)
-        # Commit and push
-        cwd = os.getcwd()
-        subprocess.run(["git", "add", self.readme_path], cwd=cwd, check=True)
-        commit_msg = f"Journal: {description[:50]}"
-        subprocess.run(["git", "commit", "-m", commit_msg], cwd=cwd, check=True)
+        self.pending.append(description)
+
+    def flush(self) -> None:
+        """Commit all pending entries in one commit and push it."""
+        if not self.pending:
+            return
+        if len(self.pending) == 1:
+            commit_msg = f"Journal: {self.pending[0][:50]}"
+        else:
+            commit_msg = f"Journal: {len(self.pending)} entries\n\n" + "\n".join(
+                f"- {description}" for description in self.pending
+            )
+        self.git.commit([self.readme_path], commit_msg)
+        self.pending = []
         # Attempt to push journal commit, ignore failures
-        if self.git_remote:
-            try:
-                subprocess.run(
-                    ["git", "push", self.git_remote, self.git_branch],
-                    cwd=cwd,
-                    check=True,
-                )
-            except subprocess.CalledProcessError:
-                pass
+        if self.push_queue is not None:
+            self.push_queue.request()
+        elif self.git_remote:
+            self.git.push(self.git_remote, self.git_branch)
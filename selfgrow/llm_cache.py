@@ -0,0 +1,144 @@
+"""
+LLM Cache Module
+
+Persistent, size-bounded LRU cache of chat completion responses keyed by request content.
+"""
+
+import hashlib
+import json
+import time
+from typing import Dict, Optional
+
+from .memory import ConnectionPool
+
+DEFAULT_CACHE_PATH = "selfgrow_llm_cache.db"
+DEFAULT_MAX_ENTRIES = 2000
+DEFAULT_MAX_BYTES = 50 * 1024 * 1024
+
+
+class ResponseCache:
+    """
+    Stores serialized chat responses in SQLite and evicts the least recently
+    used entries once the entry count or total payload size exceeds its bounds.
+    """
+
+    def __init__(
+        self,
+        path: str = DEFAULT_CACHE_PATH,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        stage_ttls: Optional[Dict[str, float]] = None,
+        default_ttl: Optional[float] = None,
+    ):
+        """
+        Args:
+            path: SQLite file holding the cache.
+            max_entries: Maximum number of cached responses.
+            max_bytes: Maximum total size of cached payloads.
+            stage_ttls: Seconds a response stays valid, per stage. Stages with
+                no TTL (or a TTL of 0) are not cached.
+            default_ttl: TTL for requests sent without a stage.
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.stage_ttls = stage_ttls or {}
+        self.default_ttl = default_ttl
+        self.hits = 0
+        self.misses = 0
+        self._pool = ConnectionPool(path)
+        with self._pool.write_lock:
+            with self._pool.connection() as conn:
+                conn.execute("""
+                    CREATE TABLE IF NOT EXISTS responses (
+                        key TEXT PRIMARY KEY,
+                        stage TEXT,
+                        payload TEXT NOT NULL,
+                        size INTEGER NOT NULL,
+                        created_at REAL NOT NULL,
+                        last_access REAL NOT NULL
+                    )
+                    """)
+                conn.execute(
+                    "CREATE INDEX IF NOT EXISTS idx_responses_last_access "
+                    "ON responses (last_access)"
+                )
+
+    @staticmethod
+    def make_key(request_args: dict) -> str:
+        """Hash the full request (model, messages, functions, and kwargs)."""
+        canonical = json.dumps(request_args, sort_keys=True, default=str)
+        return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+    def ttl_for(self, stage: Optional[str]) -> Optional[float]:
+        """Return the TTL in seconds for a stage, or None if it is not cached."""
+        ttl = (
+            self.stage_ttls.get(stage, self.default_ttl) if stage else self.default_ttl
+        )
+        return ttl or None
+
+    def get(self, key: str, stage: Optional[str] = None) -> Optional[str]:
+        """
+        Look up a cached payload, refreshing its LRU position on a hit.
+
+        Returns:
+            The stored payload, or None if missing or older than the stage TTL.
+        """
+        conn = self._pool.connection()
+        row = conn.execute(
+            "SELECT payload, created_at FROM responses WHERE key = ?", (key,)
+        ).fetchone()
+        now = time.time()
+        ttl = self.ttl_for(stage)
+        with self._pool.write_lock:
+            with conn:
+                if row is not None and (ttl is None or now - row[1] <= ttl):
+                    conn.execute(
+                        "UPDATE responses SET last_access = ? WHERE key = ?",
+                        (now, key),
+                    )
+                    self.hits += 1
+                    return row[0]
+                if row is not None:
+                    conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self.misses += 1
+        return None
+
+    def put(self, key: str, payload: str, stage: Optional[str] = None) -> None:
+        """Store a payload and evict least recently used entries if over bounds."""
+        now = time.time()
+        conn = self._pool.connection()
+        with self._pool.write_lock:
+            with conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO responses "
+                    "(key, stage, payload, size, created_at, last_access) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (key, stage, payload, len(payload), now, now),
+                )
+                self._evict(conn)
+
+    def _evict(self, conn) -> None:
+        """Delete the least recently used entries until within both bounds."""
+        count, total = conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses"
+        ).fetchone()
+        if count <= self.max_entries and total <= self.max_bytes:
+            return
+        victims = []
+        for key, size in conn.execute(
+            "SELECT key, size FROM responses ORDER BY last_access"
+        ):
+            if count <= self.max_entries and total <= self.max_bytes:
+                break
+            victims.append((key,))
+            count -= 1
+            total -= size
+        conn.executemany("DELETE FROM responses WHERE key = ?", victims)
+
+    def stats(self) -> Dict[str, int]:
+        """Return hit and miss counters for this process."""
+        return {"hits": self.hits, "misses": self.misses}
+
+    def close(self) -> None:
+        """Close the cache's database connections."""
+        self._pool.close()
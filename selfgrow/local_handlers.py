@@ -0,0 +1,182 @@
+"""
+Local Handlers Module
+
+Deterministic handlers for tasks that can be completed without an LLM round
+trip, matched by a single compiled dispatcher.
+"""
+
+import os
+import re
+import subprocess
+from typing import Callable, List, NamedTuple, Optional, Tuple
+
+from .journal import README_PATH
+from .llm_cache import DEFAULT_CACHE_PATH
+from .memory import DEFAULT_DB_PATH
+
+# Files the agent itself depends on; tasks may never delete them
+PROTECTED_PATHS = frozenset(
+    {README_PATH, "config.yaml", DEFAULT_DB_PATH, DEFAULT_CACHE_PATH}
+)
+
+
+class LocalResult(NamedTuple):
+    """
+    Outcome of a local handler.
+
+    summary is the task result. If staged is set, the handler made its
+    changes in the executor's staging area; they are tested and applied to
+    the work directory like generated changes. If commit_message is set, the
+    shared commit pipeline commits `paths` (or every change when paths is
+    None) and pushes.
+    """
+
+    summary: str
+    commit_message: Optional[str] = None
+    paths: Optional[List[str]] = None
+    staged: bool = False
+
+
+class LocalHandler(NamedTuple):
+    name: str
+    pattern: str
+    func: Callable[..., LocalResult]
+
+
+# Handlers in priority order: the first whose pattern matches wins
+LOCAL_HANDLERS: List[LocalHandler] = []
+
+
+def register(name: str, pattern: str):
+    """
+    Register a local handler for task descriptions matching pattern.
+
+    The pattern is matched case-insensitively at the start of the description;
+    its groups are passed to the handler after the executor.
+    """
+
+    def decorator(func):
+        LOCAL_HANDLERS.append(LocalHandler(name, pattern, func))
+        LocalDispatcher.reset()
+        return func
+
+    return decorator
+
+
+class LocalDispatcher:
+    """
+    Matches a task against every registered handler in one regex pass.
+
+    All handler patterns are compiled into a single alternation with a named
+    group per handler; the group offsets map each match back to the handler
+    and its own capture groups.
+    """
+
+    _compiled: Optional[Tuple[re.Pattern, list]] = None
+
+    @classmethod
+    def reset(cls) -> None:
+        """Drop the compiled dispatcher so it is rebuilt with new handlers."""
+        cls._compiled = None
+
+    @classmethod
+    def _compile(cls) -> Tuple[re.Pattern, list]:
+        if cls._compiled is None:
+            parts = []
+            for i, handler in enumerate(LOCAL_HANDLERS):
+                parts.append(f"(?P<_h{i}>{handler.pattern})")
+            regex = re.compile("|".join(parts) or r"(?!)", re.IGNORECASE)
+            slots = []
+            for i, handler in enumerate(LOCAL_HANDLERS):
+                start = regex.groupindex[f"_h{i}"]
+                slots.append((f"_h{i}", start, re.compile(handler.pattern).groups))
+            cls._compiled = (regex, slots)
+        return cls._compiled
+
+    @classmethod
+    def match(cls, task_description: str):
+        """
+        Find the handler for a task.
+
+        Returns:
+            (handler, groups) or None if the task needs the LLM.
+        """
+        regex, slots = cls._compile()
+        m = regex.match(task_description)
+        if not m:
+            return None
+        for handler, (name, start, count) in zip(LOCAL_HANDLERS, slots):
+            if m.group(name) is not None:
+                return handler, m.groups()[start : start + count]
+        return None
+
+
+@register("format_code", r"^format code$")
+def format_code(executor) -> LocalResult:
+    """
+    Stage the Black formatting of the Python files changed since the last run;
+    it is applied once the tests pass.
+    """
+    formatter = executor.formatter
+    if not formatter.available:
+        # Black not installed
+        return LocalResult("Black not installed, formatting skipped")
+    rewritten = formatter.format_changes()
+    if not rewritten:
+        return LocalResult("Code already formatted with Black")
+    executor.staging.reset()
+    for rel_path in sorted(rewritten):
+        executor.staging.write(rel_path, rewritten[rel_path])
+    return LocalResult(
+        f"Code formatted with Black ({len(rewritten)} files)",
+        "Apply code formatting via Black",
+        sorted(rewritten),
+        staged=True,
+    )
+
+
+@register("install_black", r"^install black")
+def install_black(executor) -> LocalResult:
+    """Install Black and commit requirements.txt."""
+    subprocess.run(["pip", "install", "black"], cwd=executor.work_directory, check=True)
+    return LocalResult(
+        "Installed Black via pip", "Install Black (fallback)", ["requirements.txt"]
+    )
+
+
+@register("create_file", r"create file (.+) with content '(.+)'")
+def create_file(executor, file_rel: str, content: str) -> LocalResult:
+    """Stage a file with the given content; it is written once the tests pass."""
+    file_path = os.path.join(executor.work_directory, file_rel)
+    try:
+        with open(file_path, "r", encoding="utf-8") as f:
+            unchanged = f.read() == content
+    except (OSError, UnicodeDecodeError):
+        unchanged = False
+    if unchanged:
+        return LocalResult(f"File {file_rel} already has this content.")
+    executor.staging.reset()
+    executor.staging.write(file_rel, content)
+    return LocalResult(
+        f"Created file {file_rel} with content.",
+        f"Create {file_rel} (fallback)"[:50],
+        [file_rel],
+        staged=True,
+    )
+
+
+@register("delete_file", r"^(?:delete|remove) (?:the )?file (\S+)$")
+def delete_file(executor, file_rel: str) -> LocalResult:
+    """Stage the deletion of a file; it is removed once the tests pass."""
+    normalized = os.path.normpath(file_rel)
+    if normalized in PROTECTED_PATHS or ".git" in normalized.split(os.sep):
+        return LocalResult(f"Refusing to delete protected file {file_rel}")
+    file_path = os.path.join(executor.work_directory, file_rel)
+    if not os.path.isfile(file_path):
+        return LocalResult(f"File {file_rel} does not exist, nothing to delete")
+    tracked = executor.git.is_tracked(file_rel)
+    executor.staging.reset()
+    executor.staging.delete(file_rel)
+    # An untracked file leaves nothing to commit
+    message = f"Delete {file_rel}"[:50] if tracked else None
+    return LocalResult(f"Deleted file {file_rel}", message, [file_rel], staged=True)
@@ -4,64 +4,473 @@ Memory Module
 Provides a persistent task memory using a SQLite database to track pending and completed tasks.
 """
 
+import hashlib
+import os
 import sqlite3
 import threading
-from datetime import datetime
+import zlib
+from datetime import datetime, timezone
+from typing import Callable, Optional
+
+from . import dedup
 
 DEFAULT_DB_PATH = "selfgrow_memory.db"
+# Estimated Jaccard similarity at or above which a new task counts as a duplicate
+DEFAULT_DEDUP_THRESHOLD = 0.85
+# Statuses whose tasks suppress near-duplicates ('running' is a claimed 'pending')
+DEDUP_STATUSES = ("pending", "running", "done", "error")
+# Rows fetched per query when streaming tasks with iter_tasks
+DEFAULT_PAGE_SIZE = 500
+# Seconds of waiting worth one priority level, so low-priority tasks still run
+DEFAULT_AGING_SECONDS = 300.0
+DEFAULT_PRIORITY = 0
+DEFAULT_COST = 1.0
+
+# Applied to every pooled connection. WAL lets readers run alongside a writer;
+# NORMAL sync is durable across application crashes in WAL mode.
+SQLITE_PRAGMAS = (
+    "PRAGMA journal_mode = WAL",
+    "PRAGMA synchronous = NORMAL",
+    "PRAGMA busy_timeout = 5000",
+    "PRAGMA cache_size = -16000",
+    "PRAGMA mmap_size = 268435456",
+    "PRAGMA temp_store = MEMORY",
+)
+
+# One write lock per database file, shared by every pool that opens it.
+_write_locks = {}
+_write_locks_guard = threading.Lock()
+
+
+def _index_signature(conn: sqlite3.Connection, task_id: int, sig: tuple) -> None:
+    """Store a task's MinHash signature and its LSH band buckets."""
+    conn.execute(
+        "INSERT OR REPLACE INTO task_minhash (task_id, signature) VALUES (?, ?)",
+        (task_id, dedup.pack(sig)),
+    )
+    conn.executemany(
+        "INSERT INTO task_lsh (band, bucket, task_id) VALUES (?, ?, ?)",
+        [(band, bucket, task_id) for band, bucket in dedup.band_buckets(sig)],
+    )
+
+
+def _backfill_signatures(conn: sqlite3.Connection) -> None:
+    """Index the descriptions of tasks created before deduplication existed."""
+    rows = conn.execute("SELECT id, description FROM tasks").fetchall()
+    for task_id, description in rows:
+        _index_signature(conn, task_id, dedup.signature(description))
+
+
+def _sched_key(
+    created_at: str, priority: float, cost: float, aging_seconds: float
+) -> float:
+    """
+    Scheduling key of a task; pending tasks run in ascending key order.
+
+    The key is the creation time moved earlier by one aging interval per
+    priority level and later by one per unit of estimated cost. It never
+    changes, yet a waiting task overtakes every task created more than
+    (its disadvantage in levels) * aging_seconds after it, so aging needs no
+    periodic updates and the ready queue stays a plain index.
+    """
+    created = datetime.fromisoformat(created_at).replace(tzinfo=timezone.utc)
+    return created.timestamp() - (priority - cost) * aging_seconds
+
+
+def _backfill_sched_keys(conn: sqlite3.Connection) -> None:
+    """Key tasks created before scheduling existed by their creation time."""
+    rows = conn.execute("SELECT id, created_at FROM tasks").fetchall()
+    conn.executemany(
+        "UPDATE tasks SET sched_key = ? WHERE id = ?",
+        [
+            (
+                _sched_key(
+                    created_at, DEFAULT_PRIORITY, DEFAULT_COST, DEFAULT_AGING_SECONDS
+                ),
+                task_id,
+            )
+            for task_id, created_at in rows
+        ],
+    )
+
+
+def _store_result_blob(conn: sqlite3.Connection, result: str) -> str:
+    """
+    Store a task result as a zlib-compressed, content-addressed blob.
+
+    Identical results (e.g. repeated test failure dumps) share one row.
+
+    Returns:
+        The SHA-256 hex digest identifying the blob.
+    """
+    raw = result.encode("utf-8")
+    digest = hashlib.sha256(raw).hexdigest()
+    conn.execute(
+        "INSERT OR IGNORE INTO result_blobs (hash, data, size) VALUES (?, ?, ?)",
+        (digest, zlib.compress(raw), len(raw)),
+    )
+    return digest
+
+
+def _load_result_blob(data: Optional[bytes]) -> Optional[str]:
+    """Decompress a blob stored by _store_result_blob."""
+    if data is None:
+        return None
+    return zlib.decompress(data).decode("utf-8")
+
+
+def _move_results_to_blobs(conn: sqlite3.Connection) -> None:
+    """
+    Move inline results written by older releases into result_blobs, a page
+    of rows at a time so large histories are not loaded at once.
+    """
+    last_id = 0
+    while True:
+        rows = conn.execute(
+            "SELECT id, result FROM tasks WHERE result IS NOT NULL AND id > ? "
+            "ORDER BY id LIMIT ?",
+            (last_id, DEFAULT_PAGE_SIZE),
+        ).fetchall()
+        if not rows:
+            return
+        for task_id, result in rows:
+            conn.execute(
+                "UPDATE tasks SET result = NULL, result_hash = ? WHERE id = ?",
+                (_store_result_blob(conn, result), task_id),
+            )
+        last_id = rows[-1][0]
+
+
+# Ordered schema migrations; entry N upgrades a database from user_version N to N + 1.
+# Each entry holds SQL statements or callables taking the connection.
+MIGRATIONS = [
+    [
+        """
+        CREATE TABLE IF NOT EXISTS tasks (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            description TEXT NOT NULL,
+            status TEXT NOT NULL,
+            result TEXT,
+            created_at TEXT NOT NULL
+        )
+        """,
+    ],
+    [
+        "CREATE INDEX IF NOT EXISTS idx_tasks_status_id ON tasks (status, id)",
+    ],
+    [
+        """
+        CREATE TABLE IF NOT EXISTS task_minhash (
+            task_id INTEGER PRIMARY KEY,
+            signature BLOB NOT NULL
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS task_lsh (
+            band INTEGER NOT NULL,
+            bucket INTEGER NOT NULL,
+            task_id INTEGER NOT NULL
+        )
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_task_lsh_bucket ON task_lsh (band, bucket)",
+        _backfill_signatures,
+    ],
+    [
+        """
+        CREATE TABLE IF NOT EXISTS result_blobs (
+            hash TEXT PRIMARY KEY,
+            data BLOB NOT NULL,
+            size INTEGER NOT NULL
+        )
+        """,
+        "ALTER TABLE tasks ADD COLUMN result_hash TEXT",
+        _move_results_to_blobs,
+    ],
+    [
+        f"ALTER TABLE tasks ADD COLUMN priority INTEGER NOT NULL "
+        f"DEFAULT {DEFAULT_PRIORITY}",
+        f"ALTER TABLE tasks ADD COLUMN cost REAL NOT NULL DEFAULT {DEFAULT_COST}",
+        "ALTER TABLE tasks ADD COLUMN sched_key REAL NOT NULL DEFAULT 0",
+        # Prerequisites not yet done; a pending task is ready when this is 0
+        "ALTER TABLE tasks ADD COLUMN unmet_deps INTEGER NOT NULL DEFAULT 0",
+        """
+        CREATE TABLE IF NOT EXISTS task_dependencies (
+            task_id INTEGER NOT NULL,
+            depends_on INTEGER NOT NULL,
+            PRIMARY KEY (task_id, depends_on)
+        )
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_task_dependencies_depends_on "
+        "ON task_dependencies (depends_on)",
+        _backfill_sched_keys,
+        # Ready queue: claiming reads the first entry of this partial index
+        "CREATE INDEX IF NOT EXISTS idx_tasks_ready ON tasks (sched_key, id) "
+        "WHERE status = 'pending' AND unmet_deps = 0",
+    ],
+    [
+        """
+        CREATE TABLE IF NOT EXISTS llm_usage (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            task_id INTEGER,
+            stage TEXT NOT NULL,
+            model TEXT NOT NULL,
+            prompt_tokens INTEGER NOT NULL,
+            completion_tokens INTEGER NOT NULL,
+            latency_ms INTEGER NOT NULL,
+            created_at TEXT NOT NULL
+        )
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_llm_usage_task ON llm_usage (task_id)",
+    ],
+]
+SCHEMA_VERSION = len(MIGRATIONS)
+
+
+def _write_lock_for(key: str) -> threading.Lock:
+    """Return the process-wide write lock for the database identified by key."""
+    with _write_locks_guard:
+        lock = _write_locks.get(key)
+        if lock is None:
+            lock = _write_locks[key] = threading.Lock()
+        return lock
+
+
+class ConnectionPool:
+    """
+    Hands each thread its own SQLite connection to a single database file.
+
+    Reads on different threads proceed concurrently; writers must hold
+    ``write_lock``, which is shared by all pools opened on the same file.
+    """
+
+    def __init__(self, db_path: str):
+        """
+        Args:
+            db_path: Path to the SQLite database file, or ':memory:'.
+        """
+        if db_path == ":memory:":
+            # Private in-memory databases are per-connection; use a named
+            # shared-cache database so every thread sees the same data.
+            self._target = f"file:selfgrow_{id(self)}?mode=memory&cache=shared"
+            self._uri = True
+            key = self._target
+        else:
+            self._target = db_path
+            self._uri = False
+            key = os.path.abspath(db_path)
+        self.write_lock = _write_lock_for(key)
+        self._local = threading.local()
+        self._connections = []
+        self._guard = threading.Lock()
+
+    def connection(self) -> sqlite3.Connection:
+        """Return the calling thread's connection, opening it on first use."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(
+                self._target, uri=self._uri, timeout=30, check_same_thread=False
+            )
+            for pragma in SQLITE_PRAGMAS:
+                conn.execute(pragma)
+            self._local.conn = conn
+            with self._guard:
+                self._connections.append(conn)
+        return conn
+
+    def close(self) -> None:
+        """Close every connection opened by this pool."""
+        with self._guard:
+            for conn in self._connections:
+                conn.close()
+            self._connections.clear()
+        self._local = threading.local()
 
 
 class Memory:
     """
     Task memory manager that stores tasks, statuses, and results in SQLite.
-    Thread-safe for concurrent access.
+    Thread-safe for concurrent access: each thread uses its own connection and
+    writes to the same database file are serialized.
     """
 
-    _lock = threading.Lock()
-
-    def __init__(self, db_path: str = None):
+    def __init__(
+        self,
+        db_path: str = None,
+        dedup_threshold: Optional[float] = DEFAULT_DEDUP_THRESHOLD,
+        aging_seconds: float = DEFAULT_AGING_SECONDS,
+        dedup_exempt: Optional[Callable[[str], bool]] = None,
+    ):
         """
-        Initialize the SQLite connection and ensure required tables exist.
+        Initialize the connection pool and ensure required tables exist.
 
         Args:
             db_path: Optional path to the SQLite database file. If None, uses DEFAULT_DB_PATH.
+            dedup_threshold: Similarity (0-1) at which a new task is dropped as a
+                near-duplicate of an existing one. None disables suppression.
+            aging_seconds: Waiting time that outweighs one priority level.
+            dedup_exempt: Optional predicate for templated descriptions (e.g.
+                local-handler tasks) that differ only in a file name or value;
+                these are dropped only as exact duplicates.
         """
         # Determine database path
         if not db_path:
             db_path = DEFAULT_DB_PATH
-        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.dedup_threshold = dedup_threshold
+        self.dedup_exempt = dedup_exempt
+        self.aging_seconds = aging_seconds
+        # Near-duplicate tasks dropped by this instance, each one a saved execution
+        self.duplicates_skipped = 0
+        self._pool = ConnectionPool(db_path)
+        self._write_lock = self._pool.write_lock
         self._ensure_tables()
 
+    @property
+    def conn(self) -> sqlite3.Connection:
+        """The SQLite connection owned by the calling thread."""
+        return self._pool.connection()
+
+    def close(self) -> None:
+        """Close all pooled connections."""
+        self._pool.close()
+
     def _ensure_tables(self) -> None:
         """
-        Create the tasks table if it does not already exist.
-        """
-        with self.conn:
-            self.conn.execute(
-                """
-                CREATE TABLE IF NOT EXISTS tasks (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    description TEXT NOT NULL,
-                    status TEXT NOT NULL,
-                    result TEXT,
-                    created_at TEXT NOT NULL
-                )
-                """
-            )
+        Create or upgrade the schema by applying any pending MIGRATIONS.
+
+        The applied version is tracked in SQLite's ``user_version`` pragma, so
+        databases created by older releases are upgraded in place. Each
+        migration runs in its own transaction and is rolled back as a whole
+        if any of its steps fails.
+        """
+        with self._write_lock:
+            version = self.conn.execute("PRAGMA user_version").fetchone()[0]
+            for index in range(version, SCHEMA_VERSION):
+                with self.conn:
+                    # sqlite3 opens no implicit transaction before DDL; without
+                    # this a failing step would leave the migration half applied
+                    self.conn.execute("BEGIN")
+                    for statement in MIGRATIONS[index]:
+                        if callable(statement):
+                            statement(self.conn)
+                        else:
+                            self.conn.execute(statement)
+                    self.conn.execute(f"PRAGMA user_version = {index + 1}")
 
-    def add_task(self, description: str) -> None:
+    def add_task(self, description, **fields) -> bool:
         """
         Add a new task to the memory with status 'pending'.
 
         Args:
             description: Text description of the task.
+            fields: Optional priority and cost, as accepted by add_tasks.
+
+        Returns:
+            False if the task was dropped as a near-duplicate.
         """
-        with Memory._lock:
+        return self.add_tasks([{"description": description, **fields}]) == 1
+
+    def add_tasks(self, descriptions) -> int:
+        """
+        Add a batch of tasks with status 'pending' in a single transaction.
+
+        All rows share one creation timestamp and one commit, so a large plan
+        costs a single fsync instead of one per task. Tasks too similar to an
+        existing task, or to an earlier one in the same batch, are dropped.
+
+        Args:
+            descriptions: Iterable of task description strings, or of dicts
+                with a 'description' and optional 'priority' (higher runs
+                sooner), 'cost' (estimated effort, in priority levels), and
+                'depends_on' (indexes of earlier tasks in the same batch that
+                must be done first).
+
+        Returns:
+            The number of tasks inserted.
+        """
+        created_at = datetime.utcnow().isoformat()
+        batch = []
+        for task in descriptions:
+            if isinstance(task, str):
+                task = {"description": task}
+            batch.append((task, dedup.signature(task["description"])))
+        if not batch:
+            return 0
+        inserted = 0
+        with self._write_lock:
             with self.conn:
-                self.conn.execute(
-                    "INSERT INTO tasks (description, status, created_at) VALUES (?, ?, ?)",
-                    (description, "pending", datetime.utcnow().isoformat()),
-                )
+                accepted = []
+                # Batch index -> id of the inserted row
+                ids = {}
+                for index, (task, sig) in enumerate(batch):
+                    exact = self.dedup_exempt is not None and self.dedup_exempt(
+                        task["description"]
+                    )
+                    if self._is_duplicate(sig, accepted, exact):
+                        self.duplicates_skipped += 1
+                        continue
+                    priority = task.get("priority", DEFAULT_PRIORITY)
+                    cost = task.get("cost", DEFAULT_COST)
+                    # Only earlier tasks of this batch that were kept count
+                    deps = {
+                        ids[d]
+                        for d in task.get("depends_on") or ()
+                        if isinstance(d, int) and d in ids
+                    }
+                    cursor = self.conn.execute(
+                        "INSERT INTO tasks (description, status, created_at, "
+                        "priority, cost, sched_key, unmet_deps) "
+                        "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                        (
+                            task["description"],
+                            "pending",
+                            created_at,
+                            priority,
+                            cost,
+                            _sched_key(created_at, priority, cost, self.aging_seconds),
+                            len(deps),
+                        ),
+                    )
+                    ids[index] = cursor.lastrowid
+                    self.conn.executemany(
+                        "INSERT INTO task_dependencies (task_id, depends_on) "
+                        "VALUES (?, ?)",
+                        [(cursor.lastrowid, dep) for dep in deps],
+                    )
+                    _index_signature(self.conn, cursor.lastrowid, sig)
+                    accepted.append(sig)
+                    inserted += 1
+        return inserted
+
+    def _is_duplicate(
+        self, sig: tuple, batch_signatures: list, exact: bool = False
+    ) -> bool:
+        """
+        Check a signature against the LSH index and the current batch.
+
+        Only tasks sharing at least one band bucket are compared, so the cost
+        does not grow with the size of the task table. With exact set, only
+        identical signatures count as duplicates.
+        """
+        if self.dedup_threshold is None:
+            return False
+        threshold = 1.0 if exact else self.dedup_threshold
+        for other in batch_signatures:
+            if dedup.similarity(sig, other) >= threshold:
+                return True
+        buckets = dedup.band_buckets(sig)
+        placeholders = ", ".join("(?, ?)" for _ in buckets)
+        statuses = ", ".join("?" for _ in DEDUP_STATUSES)
+        params = [value for pair in buckets for value in pair]
+        rows = self.conn.execute(
+            "SELECT m.signature FROM task_minhash m JOIN tasks t ON t.id = m.task_id "
+            "WHERE m.task_id IN (SELECT task_id FROM task_lsh "
+            f"WHERE (band, bucket) IN (VALUES {placeholders})) "
+            f"AND t.status IN ({statuses})",
+            params + list(DEDUP_STATUSES),
+        )
+        return any(
+            dedup.similarity(sig, dedup.unpack(blob)) >= threshold for (blob,) in rows
+        )
 
     def get_pending_tasks(self) -> list:
         """
@@ -76,38 +485,278 @@ class Memory:
         )
         return cursor.fetchall()
 
+    def has_pending_tasks(self) -> bool:
+        """
+        Check whether at least one task is waiting to be executed.
+
+        Returns:
+            True if a 'pending' task exists.
+        """
+        cursor = self.conn.execute(
+            "SELECT 1 FROM tasks WHERE status = 'pending' LIMIT 1"
+        )
+        return cursor.fetchone() is not None
+
+    def claim_next_task(self):
+        """
+        Atomically claim the next ready task by flipping it to 'running'.
+
+        The ready task with the lowest scheduling key (see _sched_key) wins:
+        higher priority and lower cost first, older first among equals. Tasks
+        with unfinished prerequisites are not ready. The first row of the
+        partial ready index is read, so a claim costs O(log n). The update is
+        guarded on the row still being 'pending', so concurrent claimers never
+        receive the same task.
+
+        Returns:
+            A tuple (task_id, task_description), or None if no tasks are pending.
+        """
+        with self._write_lock:
+            while True:
+                row = self.conn.execute(
+                    "SELECT id, description FROM tasks INDEXED BY idx_tasks_ready "
+                    "WHERE status = 'pending' AND unmet_deps = 0 "
+                    "ORDER BY sched_key, id LIMIT 1"
+                ).fetchone()
+                if row is None:
+                    return None
+                with self.conn:
+                    cursor = self.conn.execute(
+                        "UPDATE tasks SET status = 'running' "
+                        "WHERE id = ? AND status = 'pending'",
+                        (row[0],),
+                    )
+                if cursor.rowcount == 1:
+                    return row[0], row[1]
+
+    def requeue_running_tasks(self) -> int:
+        """
+        Return tasks left in 'running' state (e.g. by a crashed run) to 'pending'.
+
+        Returns:
+            The number of tasks requeued.
+        """
+        with self._write_lock:
+            with self.conn:
+                cursor = self.conn.execute(
+                    "UPDATE tasks SET status = 'pending' WHERE status = 'running'"
+                )
+        return cursor.rowcount
+
     def update_task(self, task_id: int, status: str, result: str = None) -> None:
         """
         Update the status and optional result of a task.
 
+        The result is stored compressed in the result_blobs table, keeping the
+        tasks table small and fast to scan. A task becoming 'done' releases
+        the tasks depending on it; one becoming 'error' fails them as well.
+
         Args:
             task_id: The integer ID of the task.
             status: New status (e.g., 'done', 'error').
             result: Optional textual result of task execution.
         """
-        with Memory._lock:
+        with self._write_lock:
             with self.conn:
+                previous = self.conn.execute(
+                    "SELECT status FROM tasks WHERE id = ?", (task_id,)
+                ).fetchone()
+                result_hash = None
+                if result is not None:
+                    result_hash = _store_result_blob(self.conn, result)
+                self.conn.execute(
+                    "UPDATE tasks SET status = ?, result = NULL, result_hash = ? "
+                    "WHERE id = ?",
+                    (status, result_hash, task_id),
+                )
+                finished = previous is not None and previous[0] not in ("done", "error")
+                if finished and status == "done":
+                    self.conn.execute(
+                        "UPDATE tasks SET unmet_deps = unmet_deps - 1 WHERE id IN "
+                        "(SELECT task_id FROM task_dependencies WHERE depends_on = ?)",
+                        (task_id,),
+                    )
+                elif finished and status == "error":
+                    self._fail_dependents(task_id)
+
+    def _fail_dependents(self, task_id: int) -> None:
+        """Mark every unfinished task that (transitively) depends on task_id failed."""
+        failed = [task_id]
+        while failed:
+            parent = failed.pop()
+            rows = self.conn.execute(
+                "SELECT t.id FROM task_dependencies d JOIN tasks t ON t.id = d.task_id "
+                "WHERE d.depends_on = ? AND t.status = 'pending'",
+                (parent,),
+            ).fetchall()
+            for (child,) in rows:
                 self.conn.execute(
-                    "UPDATE tasks SET status = ?, result = ? WHERE id = ?",
-                    (status, result, task_id),
+                    "UPDATE tasks SET status = 'error', result = NULL, "
+                    "result_hash = ? WHERE id = ?",
+                    (
+                        _store_result_blob(
+                            self.conn, f"Skipped: prerequisite task {parent} failed"
+                        ),
+                        child,
+                    ),
                 )
+                failed.append(child)
+
+    def prune_result_blobs(self) -> int:
+        """
+        Delete result blobs no task refers to any more, e.g. the results a
+        retried task replaced.
+
+        Returns:
+            The number of blobs deleted.
+        """
+        with self._write_lock:
+            with self.conn:
+                cursor = self.conn.execute(
+                    "DELETE FROM result_blobs WHERE hash NOT IN "
+                    "(SELECT result_hash FROM tasks WHERE result_hash IS NOT NULL)"
+                )
+        return cursor.rowcount
+
+    def get_task_result(self, task_id: int) -> Optional[str]:
+        """
+        Load the result of a single task.
+
+        Args:
+            task_id: The integer ID of the task.
+
+        Returns:
+            The result text, or None if the task has no result.
+        """
+        row = self.conn.execute(
+            "SELECT r.data FROM tasks t JOIN result_blobs r ON r.hash = t.result_hash "
+            "WHERE t.id = ?",
+            (task_id,),
+        ).fetchone()
+        return _load_result_blob(row[0]) if row else None
+
+    def record_usage(
+        self,
+        task_id: Optional[int],
+        stage: str,
+        model: str,
+        prompt_tokens: int,
+        completion_tokens: int,
+        latency_ms: int,
+    ) -> None:
+        """
+        Record the token usage and latency of one LLM call.
+
+        Args:
+            task_id: Task the call was made for, or None (e.g. planning).
+            stage: Pipeline stage ('planning', 'refinement', 'execution').
+            model: Model that served the call.
+            prompt_tokens: Prompt tokens billed.
+            completion_tokens: Completion tokens billed.
+            latency_ms: Wall-clock time of the call, retries included.
+        """
+        with self._write_lock:
+            with self.conn:
+                self.conn.execute(
+                    "INSERT INTO llm_usage (task_id, stage, model, prompt_tokens, "
+                    "completion_tokens, latency_ms, created_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        task_id,
+                        stage,
+                        model,
+                        prompt_tokens,
+                        completion_tokens,
+                        latency_ms,
+                        datetime.utcnow().isoformat(),
+                    ),
+                )
+
+    def get_task_usage(self, task_id: int) -> dict:
+        """
+        Summarise the LLM usage recorded for a task.
+
+        Args:
+            task_id: The integer ID of the task.
+
+        Returns:
+            A dict mapping stage to a tuple
+            (calls, prompt_tokens, completion_tokens, latency_ms).
+        """
+        rows = self.conn.execute(
+            "SELECT stage, COUNT(*), SUM(prompt_tokens), SUM(completion_tokens), "
+            "SUM(latency_ms) FROM llm_usage WHERE task_id = ? GROUP BY stage",
+            (task_id,),
+        )
+        return {row[0]: tuple(row[1:]) for row in rows}
+
+    def iter_tasks(
+        self,
+        status: Optional[str] = None,
+        after_id: int = 0,
+        limit: Optional[int] = None,
+        with_result: bool = False,
+        page_size: int = DEFAULT_PAGE_SIZE,
+    ):
+        """
+        Stream tasks in id order using keyset pagination.
+
+        Each page is a short indexed query starting after the last id seen, so
+        memory use stays constant however many tasks exist.
+
+        Args:
+            status: Optional status to filter on.
+            after_id: Only yield tasks with an id greater than this.
+            limit: Maximum number of tasks to yield; None for all.
+            with_result: Include the (potentially large) result column.
+            page_size: Number of rows fetched per query.
+
+        Yields:
+            Tuples (id, description, status, created_at), or
+            (id, description, status, result, created_at) when with_result is set.
+        """
+        if with_result:
+            columns = "t.id, t.description, t.status, r.data, t.created_at"
+            source = "tasks t LEFT JOIN result_blobs r ON r.hash = t.result_hash"
+        else:
+            columns = "t.id, t.description, t.status, t.created_at"
+            source = "tasks t"
+        where = "t.id > ?"
+        filters = []
+        if status:
+            where += " AND t.status = ?"
+            filters.append(status)
+        remaining = limit
+        while remaining is None or remaining > 0:
+            size = page_size if remaining is None else min(page_size, remaining)
+            rows = self.conn.execute(
+                f"SELECT {columns} FROM {source} WHERE {where} ORDER BY t.id LIMIT ?",
+                [after_id, *filters, size],
+            ).fetchall()
+            if with_result:
+                # Decompress lazily, one page at a time
+                rows = [
+                    (task_id, desc, stat, _load_result_blob(data), created)
+                    for task_id, desc, stat, data, created in rows
+                ]
+            yield from rows
+            if len(rows) < size:
+                return
+            after_id = rows[-1][0]
+            if remaining is not None:
+                remaining -= len(rows)
 
     def get_tasks_by_status(self, status: str) -> list:
         """
         Retrieve tasks filtered by status.
 
         Args:
-            status: Task status to filter on ('pending', 'done', 'error').
+            status: Task status to filter on ('pending', 'running', 'done', 'error').
 
         Returns:
             A list of tuples (id, description, status, result, created_at).
         """
-        cursor = self.conn.cursor()
-        cursor.execute(
-            "SELECT id, description, status, result, created_at FROM tasks WHERE status = ? ORDER BY id",  # noqa: E501
-            (status,),
-        )
-        return cursor.fetchall()
+        return list(self.iter_tasks(status=status, with_result=True))
 
     def get_all_tasks(self) -> list:
         """
@@ -116,16 +765,26 @@ class Memory:
         Returns:
             A list of tuples (id, description, status, result, created_at).
         """
-        cursor = self.conn.cursor()
-        cursor.execute(
-            "SELECT id, description, status, result, created_at FROM tasks ORDER BY id"
-        )
-        return cursor.fetchall()
+        return list(self.iter_tasks(with_result=True))
 
-    def clear_all_tasks(self) -> None:
+    def clear_all_tasks(self, clear_usage: bool = False) -> None:
         """
         Delete all tasks from memory.
+
+        LLM usage records are kept as spend history, detached from the deleted
+        tasks since their IDs may be reused.
+
+        Args:
+            clear_usage: Also delete the LLM usage records.
         """
-        with Memory._lock:
+        with self._write_lock:
             with self.conn:
                 self.conn.execute("DELETE FROM tasks")
+                self.conn.execute("DELETE FROM task_minhash")
+                self.conn.execute("DELETE FROM task_lsh")
+                self.conn.execute("DELETE FROM task_dependencies")
+                if clear_usage:
+                    self.conn.execute("DELETE FROM llm_usage")
+                else:
+                    self.conn.execute("UPDATE llm_usage SET task_id = NULL")
+                self.conn.execute("DELETE FROM result_blobs")
@@ -16,6 +16,10 @@ class Metrics:
         self.total_tasks = 0
         self.successful_tasks = 0
         self.failed_tasks = 0
+        # Execution-stage LLM calls avoided by dropping near-duplicate tasks
+        self.llm_calls_saved = 0
+        # Named counters reported by other components (e.g. LLM cache hits)
+        self.counters: Dict[str, int] = {}
 
     def record_success(self) -> None:
         """Record a successfully executed task."""
@@ -27,10 +31,22 @@ class Metrics:
         self.total_tasks += 1
         self.failed_tasks += 1
 
+    def record_llm_calls_saved(self, count: int) -> None:
+        """Record execution LLM calls avoided, e.g. by skipping duplicate tasks."""
+        self.llm_calls_saved += count
+
+    def record_counters(self, prefix: str, counters: Dict[str, int]) -> None:
+        """Add a component's counters to the summary under '<prefix>_<name>' keys."""
+        for name, value in counters.items():
+            key = f"{prefix}_{name}"
+            self.counters[key] = self.counters.get(key, 0) + value
+
     def summary(self) -> Dict[str, int]:
         """Return a summary of metrics."""
         return {
             "total_tasks": self.total_tasks,
             "successful_tasks": self.successful_tasks,
             "failed_tasks": self.failed_tasks,
+            "llm_calls_saved": self.llm_calls_saved,
+            **self.counters,
         }
@@ -4,10 +4,35 @@ OpenAI Client Wrapper
 Provides a simple interface for sending chat requests to OpenAI's ChatCompletion API using a configured model.
 """
 
+import asyncio
+import json
 import os
+import threading
+import time
 import openai
+from openai.types.chat import ChatCompletionMessage
 from dotenv import load_dotenv
 import yaml
+from .llm_cache import (
+    ResponseCache,
+    DEFAULT_CACHE_PATH,
+    DEFAULT_MAX_ENTRIES,
+    DEFAULT_MAX_BYTES,
+)
+from .rate_limiter import (
+    RateLimiter,
+    RetryPolicy,
+    retry_after_seconds,
+    DEFAULT_HEADROOM,
+    DEFAULT_MAX_ATTEMPTS,
+    DEFAULT_BASE_DELAY,
+    DEFAULT_MAX_DELAY,
+)
+from .tokens import estimate_request_tokens, estimate_tokens
+from .usage import UsageTracker
+
+# Default number of in-flight requests for chat_many
+DEFAULT_MAX_CONCURRENCY = 4
 
 
 class OpenAIClient:
@@ -41,10 +66,49 @@ class OpenAIClient:
                 "OpenAI API key not found. Please set in config.yaml or via OPENAI_API_KEY env var"
             )
         openai.api_key = api_key
+        self.api_key = api_key
+        # Optional alternative endpoint (proxies, local test servers)
+        self.base_url = cfg.get("openai", {}).get("base_url")
+        # Retries are handled here, driven by the rate limiter and RetryPolicy
+        self._client = openai.OpenAI(
+            api_key=api_key, base_url=self.base_url, max_retries=0
+        )
         # Default model to use if stage-specific model is not set
         self.model = cfg.get("openai", {}).get("model", "gpt-4")
         # Stage-to-model mapping for cost optimization
         self.models_map = cfg.get("openai", {}).get("models", {}) or {}
+        # Optional persistent response cache (opt-in via openai.cache.enabled)
+        cache_cfg = cfg.get("openai", {}).get("cache", {}) or {}
+        self.cache = None
+        self.cache_deterministic_only = cache_cfg.get("deterministic_only", False)
+        if cache_cfg.get("enabled"):
+            self.cache = ResponseCache(
+                path=cache_cfg.get("path", DEFAULT_CACHE_PATH),
+                max_entries=cache_cfg.get("max_entries", DEFAULT_MAX_ENTRIES),
+                max_bytes=cache_cfg.get("max_bytes", DEFAULT_MAX_BYTES),
+                stage_ttls=cache_cfg.get("ttl", {}) or {},
+                default_ttl=cache_cfg.get("default_ttl"),
+            )
+        self.rate_limiter = RateLimiter(
+            cfg.get("openai", {}).get("rate_limits", {}) or {},
+            headroom=cfg.get("openai", {}).get("rate_limit_headroom", DEFAULT_HEADROOM),
+        )
+        retry_cfg = cfg.get("openai", {}).get("retry", {}) or {}
+        self.retry_policy = RetryPolicy(
+            max_attempts=retry_cfg.get("max_attempts", DEFAULT_MAX_ATTEMPTS),
+            base_delay=retry_cfg.get("base_delay", DEFAULT_BASE_DELAY),
+            max_delay=retry_cfg.get("max_delay", DEFAULT_MAX_DELAY),
+        )
+        self.max_concurrency = cfg.get("openai", {}).get(
+            "max_concurrency", DEFAULT_MAX_CONCURRENCY
+        )
+        # Per-stage token/latency accounting and budgets; cli.run attaches Memory
+        self.usage = UsageTracker(budgets=(cfg.get("budgets", {}) or {}).get("limits"))
+        # Async client and the background event loop that owns it (lazy)
+        self._async_client = None
+        self._async_client_loop = None
+        self._loop = None
+        self._loop_lock = threading.Lock()
 
     def chat(self, messages: list, functions: list = None, stage: str = None, **kwargs):
         """
@@ -52,6 +116,9 @@ class OpenAIClient:
 
         If 'functions' is provided, the model may respond with a function_call;
         this returns the full Message object. Otherwise, returns the text content.
+        When the response cache is enabled for the stage, identical requests are
+        answered from the cache without contacting the API. Calls that reach
+        the API are accounted for in self.usage.
 
         Args:
             messages: A list of message dicts with 'role' and 'content'.
@@ -61,16 +128,330 @@ class OpenAIClient:
         Returns:
             If functions is None: str of the assistant's reply content.
             Else: the Message object including potential function_call.
+
+        Raises:
+            BudgetExceeded: If a hard budget for the stage or run is spent.
+        """
+        request_args, cache_key = self._prepare_request(
+            messages, functions, stage, kwargs
+        )
+        if cache_key:
+            cached = self._cached_reply(cache_key, stage, functions)
+            if cached is not None:
+                return cached
+        self.usage.check(stage)
+        start = time.monotonic()
+        response = self._create(request_args)
+        self._record_usage(stage, request_args, response, time.monotonic() - start)
+        return self._finish_reply(response, functions, stage, cache_key)
+
+    def stream_function_call(
+        self, messages: list, functions: list, stage: str = None, **kwargs
+    ):
+        """
+        Stream a function-calling completion, yielding the function_call
+        arguments as fragments of JSON text as they arrive.
+
+        Shares the response cache with chat(): a cached reply is yielded as a
+        single fragment, and a completed stream is stored for next time.
         """
+        request_args, cache_key = self._prepare_request(
+            messages, functions, stage, kwargs
+        )
+        if cache_key:
+            cached = self._cached_reply(cache_key, stage, functions)
+            if cached is not None:
+                if cached.function_call is not None:
+                    yield cached.function_call.arguments
+                return
+        self.usage.check(stage)
+        start = time.monotonic()
+        stream = self._create(
+            {**request_args, "stream": True, "stream_options": {"include_usage": True}}
+        )
+        name = None
+        fragments = []
+        usage = None
+        for chunk in stream:
+            if not chunk.choices:
+                # The final chunk carries the usage of the whole stream
+                usage = getattr(chunk, "usage", None) or usage
+                continue
+            function_call = getattr(chunk.choices[0].delta, "function_call", None)
+            if function_call is None:
+                continue
+            name = function_call.name or name
+            if function_call.arguments:
+                fragments.append(function_call.arguments)
+                yield function_call.arguments
+        self._record_usage(
+            stage,
+            request_args,
+            None,
+            time.monotonic() - start,
+            usage=usage,
+            completion="".join(fragments),
+        )
+        if cache_key and name:
+            message = ChatCompletionMessage(
+                role="assistant",
+                function_call={"name": name, "arguments": "".join(fragments)},
+            )
+            self.cache.put(
+                cache_key, json.dumps(message.model_dump(exclude_none=True)), stage
+            )
+
+    async def achat(
+        self, messages: list, functions: list = None, stage: str = None, **kwargs
+    ):
+        """
+        Asynchronous counterpart of chat(), sharing its cache and return types.
+
+        Requests go through one AsyncOpenAI client per event loop, so calls on
+        the same loop reuse its pooled HTTP connections.
+        """
+        request_args, cache_key = self._prepare_request(
+            messages, functions, stage, kwargs
+        )
+        if cache_key:
+            cached = self._cached_reply(cache_key, stage, functions)
+            if cached is not None:
+                return cached
+        self.usage.check(stage)
+        start = time.monotonic()
+        response = await self._acreate(request_args)
+        self._record_usage(stage, request_args, response, time.monotonic() - start)
+        return self._finish_reply(response, functions, stage, cache_key)
+
+    async def achat_many(
+        self,
+        requests: list,
+        max_concurrency: int = None,
+        return_exceptions: bool = False,
+    ) -> list:
+        """
+        Run several achat() calls concurrently, at most max_concurrency at a time.
+
+        Args:
+            requests: List of dicts of chat() keyword arguments
+                (messages, functions, stage, temperature, ...).
+            max_concurrency: Maximum in-flight requests; defaults to the
+                configured openai.max_concurrency.
+            return_exceptions: Return exceptions in place of results instead of
+                raising the first one.
+
+        Returns:
+            Results in the same order as requests.
+        """
+        semaphore = asyncio.Semaphore(max_concurrency or self.max_concurrency)
+
+        async def run_one(request: dict):
+            async with semaphore:
+                return await self.achat(**request)
+
+        return await asyncio.gather(
+            *(run_one(request) for request in requests),
+            return_exceptions=return_exceptions,
+        )
+
+    def chat_many(
+        self,
+        requests: list,
+        max_concurrency: int = None,
+        return_exceptions: bool = False,
+    ) -> list:
+        """
+        Blocking wrapper around achat_many() for synchronous callers.
+
+        The requests run on a background event loop owned by this client, so
+        repeated batches keep reusing the same HTTP connection pool. Their
+        usage is attributed to the calling thread's task.
+        """
+        task_id = self.usage.current_task
+
+        async def run():
+            with self.usage.task(task_id):
+                return await self.achat_many(
+                    requests, max_concurrency, return_exceptions
+                )
+
+        future = asyncio.run_coroutine_threadsafe(run(), self._event_loop())
+        return future.result()
+
+    def close(self) -> None:
+        """Stop the background event loop and release its HTTP connections."""
+        with self._loop_lock:
+            loop, self._loop = self._loop, None
+        if loop is None:
+            return
+        if self._async_client is not None:
+            asyncio.run_coroutine_threadsafe(self._async_client.close(), loop).result()
+            self._async_client = None
+        loop.call_soon_threadsafe(loop.stop)
+
+    def _event_loop(self) -> asyncio.AbstractEventLoop:
+        """Return the background event loop, starting its thread on first use."""
+        with self._loop_lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                threading.Thread(
+                    target=loop.run_forever, name="openai-client-loop", daemon=True
+                ).start()
+                self._loop = loop
+            return self._loop
+
+    async def _get_async_client(self):
+        """
+        Return the AsyncOpenAI client bound to the running event loop, closing
+        the client of a previous loop when the loop changes.
+        """
+        loop = asyncio.get_running_loop()
+        if self._async_client is None or self._async_client_loop is not loop:
+            stale = self._async_client
+            self._async_client = openai.AsyncOpenAI(
+                api_key=self.api_key, base_url=self.base_url, max_retries=0
+            )
+            self._async_client_loop = loop
+            if stale is not None:
+                try:
+                    await stale.close()
+                except Exception:
+                    # Its connections may be bound to a loop that is gone
+                    pass
+        return self._async_client
+
+    def _create(self, request_args: dict):
+        """
+        Send a completion request, pacing it with the rate limiter and retrying
+        rate-limit, server and connection errors with backoff.
+        """
+        model = request_args["model"]
+        tokens = estimate_request_tokens(request_args)
+        attempt = 0
+        while True:
+            wait = self.rate_limiter.reserve(model, tokens)
+            if wait > 0:
+                time.sleep(wait)
+            attempt += 1
+            try:
+                raw = self._client.chat.completions.with_raw_response.create(
+                    **request_args
+                )
+            except Exception as error:
+                time.sleep(self._retry_delay(model, error, attempt))
+                continue
+            self.rate_limiter.update_from_headers(model, raw.headers)
+            return raw.parse()
+
+    async def _acreate(self, request_args: dict):
+        """Asynchronous counterpart of _create()."""
+        model = request_args["model"]
+        tokens = estimate_request_tokens(request_args)
+        client = await self._get_async_client()
+        attempt = 0
+        while True:
+            wait = self.rate_limiter.reserve(model, tokens)
+            if wait > 0:
+                await asyncio.sleep(wait)
+            attempt += 1
+            try:
+                raw = await client.chat.completions.with_raw_response.create(
+                    **request_args
+                )
+            except Exception as error:
+                await asyncio.sleep(self._retry_delay(model, error, attempt))
+                continue
+            self.rate_limiter.update_from_headers(model, raw.headers)
+            return raw.parse()
+
+    def _retry_delay(self, model: str, error: Exception, attempt: int) -> float:
+        """
+        Return how long to wait before retrying a failed request.
+
+        Re-raises the error if it is not retryable or attempts are exhausted.
+        """
+        if not self.retry_policy.is_retryable(error):
+            raise error
+        response = getattr(error, "response", None)
+        headers = getattr(response, "headers", None)
+        self.rate_limiter.update_from_headers(model, headers)
+        retry_after = retry_after_seconds(headers)
+        if retry_after is not None:
+            self.rate_limiter.penalize(model, retry_after)
+        if attempt >= self.retry_policy.max_attempts:
+            raise error
+        return self.retry_policy.delay(attempt, retry_after)
+
+    def _prepare_request(self, messages, functions, stage, kwargs):
+        """Build the API arguments for a request and its cache key (or None)."""
         # Determine which model to use: stage-specific or default
         model_to_use = self.models_map.get(stage, self.model) if stage else self.model
         request_args = {"model": model_to_use, "messages": messages, **kwargs}
         if functions is not None:
             request_args["functions"] = functions
-        response = openai.chat.completions.create(**request_args)
+        return request_args, self._cache_key(stage, request_args)
+
+    def _cached_reply(self, cache_key: str, stage: str, functions: list):
+        """Return the cached reply for a request, or None on a miss."""
+        cached = self.cache.get(cache_key, stage)
+        if cached is None:
+            return None
+        message = ChatCompletionMessage.model_validate(json.loads(cached))
+        return message.content if functions is None else message
+
+    def _finish_reply(self, response, functions: list, stage: str, cache_key: str):
+        """Cache a response if required and unwrap it as chat() returns it."""
         message = response.choices[0].message
+        if cache_key:
+            payload = json.dumps(message.model_dump(exclude_none=True))
+            self.cache.put(cache_key, payload, stage)
         # If no functions provided, return text content
         if functions is None:
             return message.content
         # Else return full message for function_call handling
         return message
+
+    def _record_usage(
+        self,
+        stage: str,
+        request_args: dict,
+        response,
+        latency: float,
+        usage=None,
+        completion: str = "",
+    ) -> None:
+        """
+        Account for an API call, using the reported usage when available and
+        local token estimates otherwise.
+        """
+        usage = usage or getattr(response, "usage", None)
+        if usage is not None:
+            prompt_tokens = usage.prompt_tokens or 0
+            completion_tokens = usage.completion_tokens or 0
+        else:
+            prompt_tokens = estimate_request_tokens({**request_args, "max_tokens": 0})
+            if response is not None:
+                message = response.choices[0].message
+                call = getattr(message, "function_call", None)
+                completion = message.content or (call.arguments if call else "")
+            completion_tokens = estimate_tokens(completion or "")
+        self.usage.record(
+            stage, request_args["model"], prompt_tokens, completion_tokens, latency
+        )
+
+    def _cache_key(self, stage: str, request_args: dict):
+        """
+        Return the cache key for a request, or None if it must not be cached.
+
+        Requests are cached only when the cache is enabled, the stage has a TTL
+        and, with deterministic_only set, the request uses temperature=0.
+        """
+        if self.cache is None or not self.cache.ttl_for(stage):
+            return None
+        if self.cache_deterministic_only and request_args.get("temperature") != 0:
+            return None
+        return ResponseCache.make_key(request_args)
+
+    def cache_stats(self) -> dict:
+        """Return response cache hit/miss counters (empty if caching is off)."""
+        return self.cache.stats() if self.cache else {}
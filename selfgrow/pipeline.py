@@ -0,0 +1,151 @@
+"""
+Pipeline Module
+
+Runs tasks one at a time on the main working tree while the next task's code
+is generated speculatively, so LLM generation overlaps with validation.
+"""
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from typing import Dict, Optional
+
+from .code_executor import GeneratedChanges, StaleSpeculation
+from .worker_pool import TaskOutcome
+
+
+def _ms(seconds: float) -> int:
+    return int(seconds * 1000)
+
+
+class TaskPipeline:
+    """
+    Two-stage pipeline over a single CodeExecutor.
+
+    While a task is staged, tested, and committed (and while the caller
+    records its outcome), the next pending task is claimed and its changes
+    generated on a background thread against the HEAD of that moment. When
+    its turn comes, the changes are rebased onto the new HEAD; if they no
+    longer apply they are discarded and generated again.
+
+    Tasks with a local handler are never speculated on.
+    """
+
+    def __init__(self, executor, usage=None):
+        """
+        Args:
+            executor: CodeExecutor of the main working tree.
+            usage: Optional UsageTracker the LLM calls of each task are
+                attributed through.
+        """
+        self.executor = executor
+        self.usage = usage
+        # True once the pipeline stopped because no pending tasks remained
+        self.exhausted = False
+        # Speculation outcomes, and stage times and their overlap in ms
+        self.stats: Dict[str, int] = {
+            "speculated": 0,
+            "rebased": 0,
+            "discarded": 0,
+            "generate_ms": 0,
+            "execute_ms": 0,
+            "overlap_ms": 0,
+            "wait_ms": 0,
+        }
+
+    def _for_task(self, task_id: int):
+        return self.usage.task(task_id) if self.usage is not None else nullcontext()
+
+    def _generate(self, task_id: int, description: str) -> tuple:
+        """Generate a task's changes, returning (generated, error, start, end)."""
+        start = time.monotonic()
+        try:
+            with self._for_task(task_id):
+                generated = self.executor.generate(description)
+            return generated, None, start, time.monotonic()
+        except Exception as e:
+            return None, e, start, time.monotonic()
+
+    def run(self, task_manager, max_tasks: int):
+        """
+        Claim and execute up to max_tasks tasks, yielding a TaskOutcome for
+        each in claim order once it has been committed (or has failed).
+
+        Follow-up tasks added by the caller while consuming outcomes are picked
+        up by later claims.
+
+        If the caller stops early, a task claimed for speculation but not
+        executed yet is put back to pending, and its generation is abandoned
+        rather than waited for.
+        """
+        if max_tasks < 1:
+            return
+        item = task_manager.get_next_task()
+        claimed = 1 if item else 0
+        # Tasks claimed but not executed yet
+        unexecuted = [item] if item else []
+        speculation = None
+        pool = ThreadPoolExecutor(max_workers=1)
+        try:
+            while item:
+                task_id, description = item
+                # Claim the next task now so it can be generated meanwhile
+                next_item = None
+                next_speculation = None
+                if claimed < max_tasks:
+                    next_item = task_manager.memory.claim_next_task()
+                    if next_item:
+                        claimed += 1
+                        unexecuted.append(next_item)
+                        if self.executor.can_generate(next_item[1]):
+                            self.stats["speculated"] += 1
+                            next_speculation = pool.submit(self._generate, *next_item)
+                unexecuted.remove(item)
+                start = time.monotonic()
+                outcome = self._execute(task_id, description, speculation)
+                self.stats["execute_ms"] += _ms(time.monotonic() - start)
+                speculation = next_speculation
+                yield outcome
+                item = next_item
+                if not item and claimed < max_tasks:
+                    item = task_manager.get_next_task()
+                    if item:
+                        claimed += 1
+                        unexecuted.append(item)
+            self.exhausted = claimed < max_tasks
+        finally:
+            if speculation is not None:
+                speculation.cancel()
+            for task_id, _ in unexecuted:
+                task_manager.memory.update_task(task_id, "pending")
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    def _execute(self, task_id: int, description: str, speculation) -> TaskOutcome:
+        """Execute a task, using its speculative changes when they still apply."""
+        generated: Optional[GeneratedChanges] = None
+        if speculation is not None:
+            waited = time.monotonic()
+            generated, error, start, end = speculation.result()
+            wait = max(0.0, end - waited)
+            self.stats["wait_ms"] += _ms(wait)
+            self.stats["generate_ms"] += _ms(end - start)
+            # Generation ran alongside the previous task until waited on
+            self.stats["overlap_ms"] += _ms(end - start - wait)
+            if error is not None:
+                return TaskOutcome(task_id, description, error=error)
+        try:
+            moved = (
+                generated is not None
+                and generated.base != self.executor.git.rev_parse("HEAD")
+            )
+            with self._for_task(task_id):
+                try:
+                    result = self.executor.execute(description, generated)
+                    if moved:
+                        self.stats["rebased"] += 1
+                except StaleSpeculation:
+                    self.stats["discarded"] += 1
+                    result = self.executor.execute(description)
+            return TaskOutcome(task_id, description, result=result)
+        except Exception as e:
+            return TaskOutcome(task_id, description, error=e)
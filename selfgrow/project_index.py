@@ -0,0 +1,175 @@
+"""
+Project Index Module
+
+Keeps a cached, .gitignore-aware index of the project's files (size and
+top-level Python symbols) and renders a token-budgeted summary for prompts.
+"""
+
+import ast
+import json
+import os
+from typing import Dict, Iterable, List, Optional
+
+from .git_backend import GitBackend
+from .tokens import estimate_tokens
+
+DEFAULT_INDEX_PATH = ".selfgrow_index.json"
+# Token budget for the file summary pasted into planning prompts
+DEFAULT_SUMMARY_TOKENS = 1500
+# Top-level symbols listed per file
+MAX_SYMBOLS_PER_FILE = 12
+
+
+def _top_level_symbols(path: str) -> List[str]:
+    """Names of the classes and functions defined at module level."""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            tree = ast.parse(f.read(), path)
+    except (OSError, SyntaxError, ValueError):
+        return []
+    return [
+        node.name
+        for node in tree.body
+        if isinstance(node, (ast.ClassDef, ast.FunctionDef, ast.AsyncFunctionDef))
+    ]
+
+
+class ProjectIndex:
+    """
+    File index of a working tree, cached on disk between runs.
+
+    refresh() lists the tree with `git ls-files` (falling back to a walk that
+    skips VCS and cache directories) and re-parses only files whose mtime or
+    size changed. update() re-indexes just the given paths, so keeping the
+    index current after a task costs O(changed files).
+    """
+
+    def __init__(
+        self,
+        root: Optional[str] = None,
+        git_backend: Optional[GitBackend] = None,
+        index_path: str = DEFAULT_INDEX_PATH,
+    ):
+        """
+        Args:
+            root: Project root; defaults to CWD.
+            git_backend: Backend used to list files; one is created if omitted.
+            index_path: Cache file, relative to root.
+        """
+        self.root = root or os.getcwd()
+        self.git = git_backend or GitBackend(self.root)
+        self._index_rel = index_path
+        self.index_path = os.path.join(self.root, index_path)
+        self._files: Dict[str, dict] = self._load()
+        self._stale = True
+        self._summaries: Dict[int, str] = {}
+
+    def _load(self) -> Dict[str, dict]:
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                files = json.load(f).get("files", {})
+        except (OSError, ValueError, AttributeError):
+            return {}
+        return files if isinstance(files, dict) else {}
+
+    def _save(self) -> None:
+        try:
+            with open(self.index_path, "w", encoding="utf-8") as f:
+                json.dump({"files": self._files}, f)
+        except OSError:
+            pass
+
+    def _index_file(self, rel_path: str) -> bool:
+        """(Re)index one file; returns True if its entry changed."""
+        path = os.path.join(self.root, rel_path)
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return self._files.pop(rel_path, None) is not None
+        stamp = [stat.st_mtime_ns, stat.st_size]
+        entry = self._files.get(rel_path)
+        if entry is not None and entry["stamp"] == stamp:
+            return False
+        symbols = _top_level_symbols(path) if rel_path.endswith(".py") else []
+        self._files[rel_path] = {
+            "stamp": stamp,
+            "size": stat.st_size,
+            "symbols": symbols,
+        }
+        return True
+
+    def refresh(self) -> None:
+        """Bring the whole index up to date with the tree."""
+        current = set()
+        changed = False
+        for rel_path in self.git.list_files():
+            if rel_path == self._index_rel:
+                continue
+            current.add(rel_path)
+            changed |= self._index_file(rel_path)
+        for rel_path in set(self._files) - current:
+            del self._files[rel_path]
+            changed = True
+        self._stale = False
+        if changed:
+            self._changed()
+
+    def update(self, rel_paths: Iterable[str]) -> None:
+        """Re-index just the given paths (written, modified, or deleted)."""
+        if self._stale:
+            self.refresh()
+            return
+        changed = False
+        for rel_path in rel_paths:
+            changed |= self._index_file(rel_path.replace(os.sep, "/"))
+        if changed:
+            self._changed()
+
+    def invalidate(self) -> None:
+        """Mark the index for a full refresh, e.g. after commits were merged in."""
+        self._stale = True
+
+    def _changed(self) -> None:
+        self._summaries = {}
+        self._save()
+
+    @property
+    def files(self) -> Dict[str, dict]:
+        """Mapping of relative path to its {'size', 'symbols'} entry."""
+        if self._stale:
+            self.refresh()
+        return self._files
+
+    def summary(self, max_tokens: int = DEFAULT_SUMMARY_TOKENS) -> str:
+        """
+        Render 'path (size B): symbols' lines within max_tokens.
+
+        Files that do not fit with their symbols are listed bare; once even
+        that no longer fits, the remaining count is reported instead.
+        """
+        files = self.files
+        if max_tokens in self._summaries:
+            return self._summaries[max_tokens]
+        lines = []
+        used = 0
+        paths = sorted(files)
+        for i, rel_path in enumerate(paths):
+            entry = files[rel_path]
+            bare = f"{rel_path} ({entry['size']} B)"
+            full = bare
+            if entry["symbols"]:
+                full += ": " + ", ".join(entry["symbols"][:MAX_SYMBOLS_PER_FILE])
+            # Reserve room for the trailing '... N more files' line
+            budget = max_tokens - used - 8
+            for line in (full, bare):
+                cost = estimate_tokens(line) + 1
+                if cost <= budget:
+                    lines.append(line)
+                    used += cost
+                    break
+            else:
+                lines.append(f"... and {len(paths) - i} more files")
+                break
+        text = "\n".join(lines)
+        self._summaries[max_tokens] = text
+        return text
@@ -0,0 +1,142 @@
+"""
+Push Queue Module
+
+Pushes commits from a background thread, coalescing every commit made within a
+short window into a single `git push` so committing never waits on the network.
+"""
+
+import atexit
+import threading
+import time
+from typing import Dict
+
+from .git_backend import GitBackend
+
+# Seconds to wait after the first unpushed commit before pushing
+DEFAULT_PUSH_WINDOW = 2.0
+# Unpushed commits tolerated before request() pushes synchronously
+DEFAULT_MAX_BACKLOG = 20
+
+
+class PushQueue:
+    """
+    Background pusher shared by the executor, the journal, and the worker pool.
+
+    Callers call request() after each commit. The worker waits `window`
+    seconds after the first request, then pushes once for everything
+    committed so far. If the backlog reaches max_backlog (e.g. the remote is
+    down), request() blocks until a push has been attempted.
+    """
+
+    def __init__(
+        self,
+        git_backend: GitBackend,
+        remote: str,
+        branch: str = "main",
+        window: float = DEFAULT_PUSH_WINDOW,
+        max_backlog: int = DEFAULT_MAX_BACKLOG,
+    ):
+        """
+        Args:
+            git_backend: Backend of the working tree to push from.
+            remote: Remote name to push to.
+            branch: Branch to push.
+            window: Seconds to coalesce commits for before pushing.
+            max_backlog: Unpushed commits allowed before callers are blocked.
+        """
+        self.git = git_backend
+        self.remote = remote
+        self.branch = branch
+        self.window = window
+        self.max_backlog = max_backlog
+        self.stats: Dict[str, int] = {"requests": 0, "pushes": 0, "failures": 0}
+        self._backlog = 0
+        # Bumped after every push attempt so waiters can tell one has happened
+        self._attempts = 0
+        self._flush_requested = False
+        self._closed = False
+        self._cond = threading.Condition()
+        self._thread = threading.Thread(
+            target=self._worker, name="selfgrow-push", daemon=True
+        )
+        self._thread.start()
+        atexit.register(self.close)
+
+    @property
+    def backlog(self) -> int:
+        """Commits requested but not pushed yet."""
+        with self._cond:
+            return self._backlog
+
+    def request(self) -> None:
+        """Schedule a push of the branch's new commits."""
+        with self._cond:
+            self.stats["requests"] += 1
+            self._backlog += 1
+            if self._backlog >= self.max_backlog:
+                self._flush_requested = True
+                self._cond.notify_all()
+                self._wait_for_attempt()
+            else:
+                self._cond.notify_all()
+
+    def flush(self) -> bool:
+        """
+        Push any backlog now and wait for the attempt.
+
+        Returns:
+            True if nothing remains unpushed.
+        """
+        with self._cond:
+            if self._backlog and not self._closed:
+                self._flush_requested = True
+                self._cond.notify_all()
+                self._wait_for_attempt()
+            return self._backlog == 0
+
+    def _wait_for_attempt(self) -> None:
+        attempts = self._attempts
+        while self._attempts == attempts and self._thread.is_alive():
+            self._cond.wait()
+
+    def _worker(self) -> None:
+        while True:
+            with self._cond:
+                while not self._backlog and not self._closed:
+                    self._cond.wait()
+                if not self._backlog:
+                    return
+                # Coalesce: let more commits arrive unless asked to hurry
+                deadline = time.monotonic() + self.window
+                while not (self._flush_requested or self._closed):
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                pushing = self._backlog
+                self._flush_requested = False
+            ok = self.git.push(self.remote, self.branch)
+            with self._cond:
+                if ok:
+                    self._backlog -= pushing
+                    self.stats["pushes"] += 1
+                else:
+                    self.stats["failures"] += 1
+                self._attempts += 1
+                self._cond.notify_all()
+                if self._closed and (not self._backlog or not ok):
+                    # Done, or the remote is failing: do not spin at exit
+                    return
+                if not ok:
+                    # Back off for a window before retrying the failed push
+                    self._cond.wait(self.window)
+
+    def close(self) -> None:
+        """Push the remaining backlog once and stop the worker."""
+        with self._cond:
+            if self._closed:
+                return
+            self._closed = True
+            self._cond.notify_all()
+        self._thread.join()
+        atexit.unregister(self.close)
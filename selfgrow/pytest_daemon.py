@@ -0,0 +1,237 @@
+"""
+Pytest Daemon Module
+
+A long-lived validation process that preloads heavy third-party imports once and forks a
+fresh child per test run, removing interpreter and import startup from every validation.
+
+Run as ``python -m selfgrow.pytest_daemon``; requests are JSON lines on stdin
+(``{"id", "args", "cwd"}``) and replies are JSON lines on stdout
+(``{"id", "returncode", "output"}``). Runs execute concurrently.
+"""
+
+import concurrent.futures
+import json
+import os
+import select
+import subprocess
+import sys
+import tempfile
+import threading
+from typing import List, Optional
+
+# Imported once by the daemon and inherited by every forked test run
+PRELOAD_MODULES = (
+    "pytest",
+    "_pytest.assertion.rewrite",
+    "typer",
+    "typer.testing",
+    "openai",
+    "yaml",
+    "dotenv",
+    "sqlite3",
+)
+# Project packages that must be re-imported from the run's directory
+PROJECT_PACKAGES = ("selfgrow", "tests")
+
+
+def _preload() -> None:
+    for name in PRELOAD_MODULES:
+        try:
+            __import__(name)
+        except ImportError:
+            pass
+    # Installed pytest plugins are imported on every pytest.main(); load them here
+    try:
+        from importlib.metadata import entry_points
+
+        plugins = entry_points(group="pytest11")
+    except Exception:
+        plugins = []
+    for plugin in plugins:
+        try:
+            plugin.load()
+        except Exception:
+            pass
+
+
+def _purge_project_modules(cwd: str) -> None:
+    """Drop project modules so the run imports the freshly written sources."""
+    for name, module in list(sys.modules.items()):
+        if name == "__main__":
+            continue
+        path = getattr(module, "__file__", None) or ""
+        if name.split(".")[0] in PROJECT_PACKAGES or (
+            path and os.path.abspath(path).startswith(cwd + os.sep)
+        ):
+            del sys.modules[name]
+
+
+def _run_child(request: dict, output_path: str) -> None:
+    """Body of a forked child: run pytest and exit with its return code."""
+    code = 1
+    try:
+        out = os.open(output_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        os.dup2(out, 1)
+        os.dup2(out, 2)
+        os.close(out)
+        devnull = os.open(os.devnull, os.O_RDONLY)
+        os.dup2(devnull, 0)
+        os.close(devnull)
+        cwd = os.path.abspath(request["cwd"])
+        os.chdir(cwd)
+        sys.path.insert(0, cwd)
+        _purge_project_modules(cwd)
+        import pytest
+
+        # Preloaded plugins cannot be assertion-rewritten; that is expected here
+        args = ["-W", "ignore::pytest.PytestAssertRewriteWarning", *request["args"]]
+        code = int(pytest.main(args))
+    except BaseException as e:  # report anything, including SystemExit
+        print(f"pytest daemon child failed: {e!r}", file=sys.stderr)
+    finally:
+        sys.stdout.flush()
+        sys.stderr.flush()
+        os._exit(code)
+
+
+def serve(in_fd: int = 0, out_stream=None) -> None:
+    """Serve requests until stdin closes and all running children have finished."""
+    out_stream = out_stream or sys.stdout
+    _preload()
+    children = {}
+    pending = b""
+    input_open = True
+    while input_open or children:
+        if input_open:
+            ready, _, _ = select.select([in_fd], [], [], 0.02 if children else None)
+            if ready:
+                data = os.read(in_fd, 65536)
+                if not data:
+                    input_open = False
+                pending += data
+                while b"\n" in pending:
+                    line, pending = pending.split(b"\n", 1)
+                    if not line.strip():
+                        continue
+                    request = json.loads(line)
+                    handle, output_path = tempfile.mkstemp(prefix="selfgrow-pytest-")
+                    os.close(handle)
+                    out_stream.flush()
+                    pid = os.fork()
+                    if pid == 0:
+                        _run_child(request, output_path)
+                    children[pid] = (request["id"], output_path)
+        while children:
+            pid, status = os.waitpid(-1, 0 if not input_open else os.WNOHANG)
+            if pid == 0:
+                break
+            request_id, output_path = children.pop(pid)
+            with open(output_path, "r", encoding="utf-8", errors="replace") as f:
+                output = f.read()
+            os.remove(output_path)
+            reply = {
+                "id": request_id,
+                "returncode": os.waitstatus_to_exitcode(status),
+                "output": output,
+            }
+            out_stream.write(json.dumps(reply) + "\n")
+            out_stream.flush()
+
+
+class WarmPytestRunner:
+    """
+    Client for the pytest daemon. Thread-safe: concurrent run() calls are
+    executed in parallel by separate forked children.
+
+    Falls back to a cold ``python -m pytest`` subprocess where fork() is not
+    available or the daemon has died.
+    """
+
+    def __init__(self, python: Optional[str] = None):
+        self.python = python or sys.executable
+        self._process = None
+        self._pending = {}
+        self._next_id = 0
+        self._lock = threading.Lock()
+
+    def _start(self) -> None:
+        package_parent = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        env = dict(os.environ)
+        env["PYTHONPATH"] = os.pathsep.join(
+            filter(None, [package_parent, env.get("PYTHONPATH")])
+        )
+        self._process = subprocess.Popen(
+            [self.python, "-m", "selfgrow.pytest_daemon"],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            text=True,
+            cwd=package_parent,
+            env=env,
+        )
+        threading.Thread(
+            target=self._read_replies, args=(self._process,), daemon=True
+        ).start()
+
+    def _read_replies(self, process) -> None:
+        for line in process.stdout:
+            reply = json.loads(line)
+            with self._lock:
+                future = self._pending.pop(reply["id"], None)
+            if future is not None:
+                future.set_result(reply)
+        # Daemon exited: fail whatever is still waiting
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            if self._process is process:
+                self._process = None
+        for future in pending.values():
+            future.set_exception(RuntimeError("pytest daemon exited"))
+
+    def run(self, args: List[str], cwd: str) -> subprocess.CompletedProcess:
+        """
+        Run pytest with args in cwd.
+
+        Returns:
+            A CompletedProcess whose stdout holds the combined pytest output.
+        """
+        if not hasattr(os, "fork"):
+            return self.run_cold(args, cwd)
+        future = concurrent.futures.Future()
+        try:
+            with self._lock:
+                if self._process is None:
+                    self._start()
+                self._next_id += 1
+                request_id = self._next_id
+                self._pending[request_id] = future
+                self._process.stdin.write(
+                    json.dumps({"id": request_id, "args": args, "cwd": cwd}) + "\n"
+                )
+                self._process.stdin.flush()
+            reply = future.result()
+        except (OSError, RuntimeError):
+            return self.run_cold(args, cwd)
+        return subprocess.CompletedProcess(
+            ["pytest", *args], reply["returncode"], reply["output"], ""
+        )
+
+    def run_cold(self, args: List[str], cwd: str) -> subprocess.CompletedProcess:
+        """Run pytest in a new interpreter process."""
+        return subprocess.run(
+            [self.python, "-m", "pytest", *args],
+            cwd=cwd,
+            capture_output=True,
+            text=True,
+        )
+
+    def close(self) -> None:
+        """Ask the daemon to exit once running children finish."""
+        with self._lock:
+            process, self._process = self._process, None
+        if process is not None:
+            process.stdin.close()
+            process.wait()
+
+
+if __name__ == "__main__":
+    serve()
@@ -0,0 +1,205 @@
+"""
+Rate Limiter Module
+
+Token-bucket limits on requests and tokens per minute for each model, adjusted from the
+API's rate-limit response headers, plus an exponential backoff retry policy.
+"""
+
+import random
+import re
+import threading
+import time
+from typing import Dict, Mapping, Optional
+
+import openai
+
+# Fraction of the advertised quota to use, leaving headroom for estimate errors
+DEFAULT_HEADROOM = 0.9
+DEFAULT_MAX_ATTEMPTS = 5
+DEFAULT_BASE_DELAY = 1.0
+DEFAULT_MAX_DELAY = 60.0
+
+_DURATION_PART = re.compile(r"(\d+(?:\.\d+)?)(ms|h|m|s)")
+_DURATION_UNITS = {"h": 3600.0, "m": 60.0, "s": 1.0, "ms": 0.001}
+
+
+def parse_duration(value: str) -> Optional[float]:
+    """
+    Parse a rate-limit reset duration such as '1s', '6m0s' or '250ms'.
+
+    Returns:
+        The duration in seconds, or None if value is not a duration.
+    """
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    parts = _DURATION_PART.findall(value)
+    if not parts or "".join(n + u for n, u in parts) != value:
+        return None
+    return sum(float(number) * _DURATION_UNITS[unit] for number, unit in parts)
+
+
+def retry_after_seconds(headers: Mapping[str, str]) -> Optional[float]:
+    """Read the server's requested retry delay from response headers."""
+    if not headers:
+        return None
+    millis = headers.get("retry-after-ms")
+    if millis:
+        try:
+            return float(millis) / 1000.0
+        except ValueError:
+            pass
+    return parse_duration(headers.get("retry-after", ""))
+
+
+class TokenBucket:
+    """
+    Continuously refilling bucket holding up to `capacity` units per `period` seconds.
+
+    Reservations may drive the balance negative; the caller then waits until the
+    debt is refilled, so concurrent callers queue fairly instead of racing.
+    """
+
+    def __init__(self, capacity: float, period: float = 60.0):
+        self.period = period
+        self.capacity = float(capacity)
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+
+    @property
+    def rate(self) -> float:
+        return self.capacity / self.period
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def reserve(self, amount: float, now: float) -> float:
+        """Take amount units and return the seconds to wait before using them."""
+        self._refill(now)
+        self.tokens -= min(amount, self.capacity)
+        return -self.tokens / self.rate if self.tokens < 0 else 0.0
+
+    def sync(self, limit: float, remaining: float, now: float) -> None:
+        """Adopt the server's view of the quota (limit and remaining units)."""
+        self._refill(now)
+        self.capacity = float(limit)
+        self.tokens = min(self.tokens, float(remaining))
+
+
+class RateLimiter:
+    """
+    Per-model requests-per-minute and tokens-per-minute limiter.
+
+    Limits start from configuration (if any) and track the x-ratelimit-* headers
+    returned with every response, so the client runs just under quota.
+    """
+
+    def __init__(
+        self,
+        limits: Optional[Dict[str, Dict[str, float]]] = None,
+        headroom: float = DEFAULT_HEADROOM,
+    ):
+        """
+        Args:
+            limits: Mapping of model name to {'rpm': ..., 'tpm': ...}.
+            headroom: Fraction of each quota to use.
+        """
+        self.headroom = headroom
+        self._buckets: Dict[str, Dict[str, TokenBucket]] = {}
+        self._blocked_until: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        for model, model_limits in (limits or {}).items():
+            buckets = self._buckets.setdefault(model, {})
+            if model_limits.get("rpm"):
+                buckets["requests"] = TokenBucket(model_limits["rpm"] * headroom)
+            if model_limits.get("tpm"):
+                buckets["tokens"] = TokenBucket(model_limits["tpm"] * headroom)
+
+    def reserve(self, model: str, tokens: int) -> float:
+        """
+        Reserve one request and `tokens` tokens for model.
+
+        Returns:
+            Seconds the caller must wait before sending the request.
+        """
+        now = time.monotonic()
+        with self._lock:
+            buckets = self._buckets.get(model, {})
+            wait = max(0.0, self._blocked_until.get(model, 0.0) - now)
+            if "requests" in buckets:
+                wait = max(wait, buckets["requests"].reserve(1, now))
+            if "tokens" in buckets:
+                wait = max(wait, buckets["tokens"].reserve(tokens, now))
+            return wait
+
+    def update_from_headers(self, model: str, headers: Mapping[str, str]) -> None:
+        """Adjust the model's buckets from x-ratelimit-* response headers."""
+        if not headers:
+            return
+        now = time.monotonic()
+        with self._lock:
+            buckets = self._buckets.setdefault(model, {})
+            for kind in ("requests", "tokens"):
+                try:
+                    limit = float(headers[f"x-ratelimit-limit-{kind}"])
+                    remaining = float(headers[f"x-ratelimit-remaining-{kind}"])
+                except (KeyError, TypeError, ValueError):
+                    continue
+                bucket = buckets.get(kind)
+                if bucket is None:
+                    bucket = buckets[kind] = TokenBucket(limit * self.headroom)
+                bucket.sync(limit * self.headroom, remaining, now)
+                if remaining <= 0:
+                    reset = parse_duration(headers.get(f"x-ratelimit-reset-{kind}", ""))
+                    if reset:
+                        self._block(model, reset, now)
+
+    def penalize(self, model: str, seconds: float) -> None:
+        """Block all requests for model for `seconds` (e.g. after a 429)."""
+        with self._lock:
+            self._block(model, seconds, time.monotonic())
+
+    def _block(self, model: str, seconds: float, now: float) -> None:
+        self._blocked_until[model] = max(
+            self._blocked_until.get(model, 0.0), now + seconds
+        )
+
+
+class RetryPolicy:
+    """Exponential backoff with full jitter for transient API failures."""
+
+    def __init__(
+        self,
+        max_attempts: int = DEFAULT_MAX_ATTEMPTS,
+        base_delay: float = DEFAULT_BASE_DELAY,
+        max_delay: float = DEFAULT_MAX_DELAY,
+    ):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    @staticmethod
+    def is_retryable(error: Exception) -> bool:
+        """Rate limits, server errors, timeouts and dropped connections are retried."""
+        if isinstance(error, openai.APIConnectionError):
+            return True
+        if isinstance(error, openai.APIStatusError):
+            return error.status_code in (408, 409, 429) or error.status_code >= 500
+        return False
+
+    def delay(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        """
+        Seconds to wait before retry number `attempt` (1-based).
+
+        A server-provided Retry-After is honoured as a lower bound.
+        """
+        backoff = min(self.max_delay, self.base_delay * (2 ** (attempt - 1)))
+        jittered = random.uniform(0, backoff)
+        if retry_after is not None:
+            return min(self.max_delay, retry_after) + jittered * 0.1
+        return jittered
@@ -0,0 +1,138 @@
+"""
+Refiner Module
+
+Runs task refinement in a background thread, batching several completed tasks
+into one generate_tasks call so planning overlaps with execution.
+"""
+
+import logging
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger("growai")
+
+DEFAULT_REFINE_BATCH_SIZE = 3
+# Seconds a completed task may wait for others to join its batch
+DEFAULT_REFINE_WINDOW = 10.0
+
+
+class BackgroundRefiner:
+    """
+    Collects (description, result, commits) of completed tasks and refines
+    them in batches via TaskManager.refine_batch on a worker thread.
+
+    A batch is sent once batch_size tasks are waiting, window seconds after
+    the first of them arrived, or when flush() is called.
+    """
+
+    def __init__(
+        self,
+        task_manager,
+        batch_size: int = DEFAULT_REFINE_BATCH_SIZE,
+        window: float = DEFAULT_REFINE_WINDOW,
+    ):
+        """
+        Args:
+            task_manager: TaskManager whose refine_batch generates the tasks.
+            batch_size: Completed tasks covered by one refinement call.
+            window: Maximum seconds to wait for a batch to fill up.
+        """
+        self.task_manager = task_manager
+        self.batch_size = max(1, batch_size)
+        self.window = window
+        self.stats: Dict[str, int] = {"batches": 0, "tasks": 0, "errors": 0}
+        self._pending: List[Tuple[str, str, Optional[Tuple[str, str]]]] = []
+        self._first_at = 0.0
+        self._in_flight = 0
+        self._flush_requested = False
+        self._closed = False
+        self._cond = threading.Condition()
+        self._thread = threading.Thread(
+            target=self._worker, name="selfgrow-refiner", daemon=True
+        )
+        self._thread.start()
+
+    def submit(
+        self,
+        description: str,
+        result: str,
+        commits: Optional[Tuple[str, str]] = None,
+    ) -> None:
+        """
+        Queue a completed task for refinement and return immediately.
+
+        Args:
+            description: The task's description.
+            result: The task's result.
+            commits: (base, head) SHAs around the commits the task made, or
+                None if it made none.
+        """
+        with self._cond:
+            if not self._pending:
+                self._first_at = time.monotonic()
+            self._pending.append((description, result, commits))
+            self._cond.notify_all()
+
+    @property
+    def busy(self) -> bool:
+        """True while tasks are waiting for or undergoing refinement."""
+        with self._cond:
+            return bool(self._pending or self._in_flight)
+
+    def flush(self) -> bool:
+        """
+        Refine everything queued now and wait until it is done.
+
+        Returns:
+            True if there was anything to refine.
+        """
+        with self._cond:
+            if not (self._pending or self._in_flight):
+                return False
+            self._flush_requested = True
+            self._cond.notify_all()
+            while (self._pending or self._in_flight) and self._thread.is_alive():
+                self._cond.wait()
+            return True
+
+    def _worker(self) -> None:
+        while True:
+            with self._cond:
+                while True:
+                    if self._pending:
+                        due = self._first_at + self.window
+                        if (
+                            len(self._pending) >= self.batch_size
+                            or self._flush_requested
+                            or self._closed
+                            or time.monotonic() >= due
+                        ):
+                            break
+                        self._cond.wait(due - time.monotonic())
+                    elif self._closed:
+                        return
+                    else:
+                        self._flush_requested = False
+                        self._cond.wait()
+                batch = self._pending[: self.batch_size]
+                del self._pending[: self.batch_size]
+                self._first_at = time.monotonic()
+                self._in_flight = len(batch)
+            try:
+                self.task_manager.refine_batch(batch)
+                self.stats["batches"] += 1
+                self.stats["tasks"] += len(batch)
+            except Exception as e:
+                self.stats["errors"] += 1
+                logger.error(f"Background refinement failed: {e}")
+            with self._cond:
+                self._in_flight = 0
+                self._cond.notify_all()
+
+    def close(self) -> None:
+        """Refine whatever is still queued, then stop the worker."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self._thread.join()
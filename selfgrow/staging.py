@@ -0,0 +1,133 @@
+"""
+Staging Module
+
+Stages generated file changes in a private copy of the working tree so they can
+be syntax-checked and tested before anything touches the shared tree or git.
+"""
+
+import os
+import shutil
+import tempfile
+import weakref
+from typing import Dict, List, Optional, Tuple
+
+from .git_backend import GitBackend
+
+
+def _stat_key(path: str) -> Optional[Tuple[int, int]]:
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+
+class StagingArea:
+    """
+    A persistent mirror of a working tree that generated changes are written
+    to first.
+
+    The mirror is synchronised incrementally: only files whose size or mtime
+    changed since the previous sync (in the source or in the mirror) are
+    copied again, so staging a task costs a stat of each file plus the
+    writes of the task itself.
+    """
+
+    def __init__(self, root: str, git_backend: Optional[GitBackend] = None):
+        """
+        Args:
+            root: The working tree to mirror.
+            git_backend: Backend used to list the tree's files.
+        """
+        self.root = root
+        self.git = git_backend or GitBackend(root)
+        self.path = tempfile.mkdtemp(prefix="selfgrow-stage-")
+        self._synced: Dict[str, Tuple] = {}
+        # Staged content per path; None marks a staged deletion
+        self._staged: Dict[str, Optional[str]] = {}
+        self._finalizer = weakref.finalize(
+            self, shutil.rmtree, self.path, ignore_errors=True
+        )
+
+    def reset(self) -> None:
+        """Discard staged changes and bring the mirror up to date with root."""
+        discarded, self._staged = set(self._staged), {}
+        current = set()
+        for rel in self.git.list_files():
+            src = os.path.join(self.root, rel)
+            if not os.path.isfile(src):
+                continue
+            current.add(rel)
+            dst = os.path.join(self.path, rel)
+            if self._synced.get(rel) == (_stat_key(src), _stat_key(dst)):
+                continue
+            os.makedirs(os.path.dirname(dst), exist_ok=True)
+            shutil.copy2(src, dst)
+            self._synced[rel] = (_stat_key(src), _stat_key(dst))
+        for rel in (set(self._synced) | discarded) - current:
+            self._synced.pop(rel, None)
+            dst = os.path.join(self.path, rel)
+            if os.path.exists(dst):
+                os.remove(dst)
+
+    def write(self, rel_path: str, content: str) -> None:
+        """Write a file into the mirror only."""
+        dst = os.path.join(self.path, rel_path)
+        os.makedirs(os.path.dirname(dst), exist_ok=True)
+        with open(dst, "w", encoding="utf-8") as f:
+            f.write(content)
+        self._staged[rel_path] = content
+        # Force a re-copy from root on the next reset
+        self._synced.pop(rel_path, None)
+
+    def delete(self, rel_path: str) -> None:
+        """Remove a file from the mirror only."""
+        dst = os.path.join(self.path, rel_path)
+        if os.path.exists(dst):
+            os.remove(dst)
+        self._staged[rel_path] = None
+        self._synced.pop(rel_path, None)
+
+    def read(self, rel_path: str) -> str:
+        """
+        Read a file as currently staged (falling back to the mirrored copy).
+
+        Raises:
+            FileNotFoundError: If the file does not exist or its deletion is
+                staged.
+        """
+        if rel_path in self._staged:
+            content = self._staged[rel_path]
+            if content is None:
+                raise FileNotFoundError(rel_path)
+            return content
+        with open(os.path.join(self.path, rel_path), "r", encoding="utf-8") as f:
+            return f.read()
+
+    @property
+    def staged_files(self) -> List[str]:
+        """Relative paths written or deleted since the last reset, in order."""
+        return list(self._staged)
+
+    def apply(self) -> List[str]:
+        """
+        Copy the staged files into the source tree and remove the staged
+        deletions from it.
+
+        Returns:
+            The relative paths written or deleted.
+        """
+        for rel_path, content in self._staged.items():
+            file_path = os.path.join(self.root, rel_path)
+            if content is None:
+                if os.path.exists(file_path):
+                    os.remove(file_path)
+                continue
+            os.makedirs(os.path.dirname(file_path), exist_ok=True)
+            with open(file_path, "w", encoding="utf-8") as f:
+                f.write(content)
+        return self.staged_files
+
+    def close(self) -> None:
+        """Remove the mirror directory."""
+        self._finalizer()
@@ -0,0 +1,101 @@
+"""
+Stream Parser Module
+
+Incrementally parses streamed apply_file_changes arguments, emitting each entry of the
+'changes' array as soon as its JSON object is complete.
+"""
+
+import json
+from typing import List
+
+ARRAY_KEY = "changes"
+
+
+class ChangeStreamParser:
+    """
+    Feed it fragments of a JSON document like ``{"changes": [{...}, {...}]}``;
+    it returns every change object whose closing brace has arrived.
+    """
+
+    def __init__(self, array_key: str = ARRAY_KEY):
+        self.array_key = array_key
+        self._buffer = ""
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._string_start = 0
+        self._last_root_string = None
+        self._array_depth = None
+        self._item_start = None
+        self.items_emitted = 0
+
+    def feed(self, fragment: str) -> List[dict]:
+        """
+        Consume the next fragment of the document.
+
+        Returns:
+            The change objects completed by this fragment, in order.
+        """
+        self._buffer += fragment
+        completed = []
+        buffer = self._buffer
+        for index in range(self._pos, len(buffer)):
+            char = buffer[index]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+                    if self._depth == 1:
+                        self._last_root_string = buffer[self._string_start : index + 1]
+                continue
+            if char == '"':
+                self._in_string = True
+                self._string_start = index
+            elif char in "{[":
+                self._depth += 1
+                if (
+                    char == "["
+                    and self._depth == 2
+                    and self._array_depth is None
+                    and self._last_root_string is not None
+                    and json.loads(self._last_root_string) == self.array_key
+                ):
+                    self._array_depth = self._depth
+                elif (
+                    char == "{"
+                    and self._array_depth is not None
+                    and self._depth == self._array_depth + 1
+                ):
+                    self._item_start = index
+            elif char in "}]":
+                if (
+                    char == "}"
+                    and self._item_start is not None
+                    and self._depth == self._array_depth + 1
+                ):
+                    completed.append(json.loads(buffer[self._item_start : index + 1]))
+                    self._item_start = None
+                elif char == "]" and self._depth == self._array_depth:
+                    self._array_depth = None
+                self._depth -= 1
+        self._pos = len(buffer)
+        self.items_emitted += len(completed)
+        return completed
+
+    @property
+    def text(self) -> str:
+        """Everything fed so far."""
+        return self._buffer
+
+    def close(self) -> dict:
+        """
+        Finish parsing and return the whole decoded document.
+
+        Raises:
+            json.JSONDecodeError: If the streamed arguments are not valid JSON.
+        """
+        return json.loads(self._buffer)
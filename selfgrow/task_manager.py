@@ -6,11 +6,98 @@ Manages the lifecycle of tasks: initial generation, retrieval, and refinement us
 
 from .openai_client import OpenAIClient
 from .memory import Memory
-import os
-import subprocess
+from .git_backend import GitBackend
+from .project_index import ProjectIndex, DEFAULT_SUMMARY_TOKENS
+from .diff_summary import (
+    DiffSummarizer,
+    DEFAULT_DIFF_TOKENS,
+    DEFAULT_RESULT_TOKENS,
+    truncate_middle,
+)
+from typing import List, Optional, Tuple
 import re
 import json
 
+# Function schema the planning and refinement stages register tasks through
+GENERATE_TASKS_FUNCTION = {
+    "name": "generate_tasks",
+    "description": "Registers the next development tasks.",
+    "parameters": {
+        "type": "object",
+        "properties": {
+            "tasks": {
+                "type": "array",
+                "items": {
+                    "type": "object",
+                    "properties": {
+                        "description": {"type": "string"},
+                        "priority": {
+                            "type": "integer",
+                            "description": "Higher runs sooner; 0 is normal, "
+                            "negative for speculative work.",
+                        },
+                        "cost": {
+                            "type": "number",
+                            "description": "Estimated effort; 1 is a small "
+                            "change, 5 a large refactor.",
+                        },
+                        "depends_on": {
+                            "type": "array",
+                            "items": {"type": "integer"},
+                            "description": "0-based indexes of earlier tasks "
+                            "in this list that must be completed first.",
+                        },
+                    },
+                    "required": ["description"],
+                },
+            }
+        },
+        "required": ["tasks"],
+    },
+}
+
+
+def _normalize_task(task) -> Optional[dict]:
+    """Coerce a generate_tasks item (string or object) to add_tasks form."""
+    if isinstance(task, str):
+        return task
+    if not isinstance(task, dict) or not isinstance(task.get("description"), str):
+        return None
+    normalized = {"description": task["description"]}
+    for field, kind in (("priority", int), ("cost", float)):
+        try:
+            if task.get(field) is not None:
+                normalized[field] = kind(task[field])
+        except (TypeError, ValueError):
+            pass
+    if isinstance(task.get("depends_on"), list):
+        normalized["depends_on"] = task["depends_on"]
+    return normalized
+
+
+def _valid_tasks(items: list) -> list:
+    """
+    Normalize generate_tasks items, dropping invalid ones.
+
+    depends_on indexes refer to positions in items; they are renumbered to the
+    kept tasks, and edges to dropped items are removed.
+    """
+    tasks = []
+    index_map = {}
+    for index, item in enumerate(items):
+        task = _normalize_task(item)
+        if task:
+            index_map[index] = len(tasks)
+            tasks.append(task)
+    for task in tasks:
+        if isinstance(task, dict) and "depends_on" in task:
+            task["depends_on"] = [
+                index_map[dep]
+                for dep in task["depends_on"]
+                if isinstance(dep, int) and dep in index_map
+            ]
+    return tasks
+
 
 class TaskManager:
     """
@@ -18,7 +105,12 @@ class TaskManager:
     """
 
     def __init__(
-        self, memory_store: Memory, openai_client: OpenAIClient, agent_config: dict
+        self,
+        memory_store: Memory,
+        openai_client: OpenAIClient,
+        agent_config: dict,
+        git_backend: Optional[GitBackend] = None,
+        project_index: Optional[ProjectIndex] = None,
     ):
         """
         Initialize TaskManager.
@@ -27,10 +119,17 @@ class TaskManager:
             memory_store: Memory instance for persisting tasks.
             openai_client: OpenAIClient instance for generating tasks.
             agent_config: Dictionary containing agent settings (initial prompt, max iterations).
+            git_backend: GitBackend used to read recent diffs; defaults to CWD.
+            project_index: ProjectIndex summarised into planning prompts.
         """
         self.memory = memory_store
         self.client = openai_client
         self.agent_config = agent_config
+        self.git = git_backend or GitBackend()
+        self.project_index = project_index or ProjectIndex(git_backend=self.git)
+        self.diff_summarizer = DiffSummarizer(self.git)
+        # Optional BackgroundRefiner; get_next_task waits on it before giving up
+        self.refiner = None
 
     def generate_initial_tasks(self) -> None:
         """
@@ -39,142 +138,157 @@ class TaskManager:
         - Otherwise, request a structured JSON list via the 'generate_tasks' function.
         """
         # Seed fallback initial task if none exist
-        if not self.memory.get_pending_tasks():
+        if not self.memory.has_pending_tasks():
             fallback = self.agent_config.pop("initial_task", None)
-            if fallback:
-                self.memory.add_task(fallback)
+            # A seed already run before is dropped as a duplicate; plan instead
+            if fallback and self.memory.add_task(fallback):
                 return
         # Function schema for generating tasks; include context for better task relevance
         base_prompt = self.agent_config.get("initial_prompt", "")
-        # Gather project file list for context
-        file_list = []
-        for dirpath, _, filenames in os.walk(os.getcwd()):
-            for fname in filenames:
-                file_list.append(
-                    os.path.relpath(os.path.join(dirpath, fname), os.getcwd())
-                )
-        file_context = "\n".join(file_list)
+        # Token-budgeted summary of the project files for context
+        file_context = self.project_index.summary(
+            self.agent_config.get("file_summary_tokens", DEFAULT_SUMMARY_TOKENS)
+        )
         system_prompt = (
             f"{base_prompt}\n\n"
             "You may call the function generate_tasks(tasks) to register new tasks.\n"
             f"Project files:\n{file_context}"
         )
         user_prompt = (
-            "Invoke generate_tasks with an array of the next development tasks as strings. "
+            "Invoke generate_tasks with an array of the next development tasks, "
+            "each with a description and, where useful, a priority, an estimated "
+            "cost, and the indexes of the tasks it depends on. "
             "Do not reply with any other text."
         )
-        function_def = {
-            "name": "generate_tasks",
-            "description": "Returns the next set of tasks as a list of strings.",
-            "parameters": {
-                "type": "object",
-                "properties": {"tasks": {"type": "array", "items": {"type": "string"}}},
-                "required": ["tasks"],
-            },
-        }
         messages = [
             {"role": "system", "content": system_prompt},
             {"role": "user", "content": user_prompt},
         ]
         # Invoke AI with function definitions
         # Request tasks via AI function-calling, using 'planning' model
-        msg = self.client.chat(messages, functions=[function_def], stage="planning")
-        func_call = getattr(msg, "function_call", None)
-        # Parse function_call if present
-        if func_call and hasattr(func_call, "arguments"):
-            try:
-                payload = json.loads(func_call.arguments)
-                for task in payload.get("tasks", []):
-                    self.memory.add_task(task)
-                return
-            except Exception:
-                pass
-        # Fallback: parse as newline-separated text
-        text = getattr(msg, "content", "") or ""
-        for line in text.split("\n"):
-            desc = line.strip()
-            if not desc:
-                continue
-            desc = re.sub(r"^[\s\d\-\*\.\)]+", "", desc)
-            desc = desc.replace("*", "").strip()
-            self.memory.add_task(desc)
+        msg = self.client.chat(
+            messages, functions=[GENERATE_TASKS_FUNCTION], stage="planning"
+        )
+        self._store_generated_tasks(msg)
 
     def get_next_task(self):
         """
-        Retrieve the next pending task from memory.
+        Claim the next pending task from memory, marking it as 'running'.
+
+        If none is pending while a background refiner is still working, wait
+        for the follow-up tasks it is about to add.
 
         Returns:
             A tuple (task_id, task_description) for the next pending task,
             or None if no pending tasks remain.
         """
-        pending_tasks = self.memory.get_pending_tasks()
-        if not pending_tasks:
-            return None
-        task_id, task_description = pending_tasks[0]
-        return task_id, task_description
+        item = self.memory.claim_next_task()
+        if item is None and self.refiner is not None and self.refiner.flush():
+            item = self.memory.claim_next_task()
+        return item
 
     def refine_tasks(
-        self, previous_task_description: str, previous_task_result: str
+        self,
+        previous_task_description: str,
+        previous_task_result: str,
+        commits: Optional[Tuple[str, str]] = ("HEAD~1", "HEAD"),
     ) -> None:
         """
         Generate follow-up tasks based on the last task and its result.
         Uses function-calling to get a structured task list first, then falls back to text parsing.
         """
-        # Prepare context: initial prompt, last result, recent code diff
+        self.refine_batch([(previous_task_description, previous_task_result, commits)])
+
+    def refine_batch(self, completed: List[tuple]) -> int:
+        """
+        Generate follow-up tasks for several completed tasks in one call.
+
+        Args:
+            completed: (description, result) pairs, oldest first, optionally
+                with a third item: the (base, head) SHAs around the task's
+                commits, or None if it made none. The prompt's diff spans
+                from the first task's base to the last task's head.
+
+        Returns:
+            The number of tasks stored.
+        """
+        if not completed:
+            return 0
+        # Prepare context: initial prompt, last results, recent code diff
         base_prompt = self.agent_config.get("initial_prompt", "")
-        # Attempt to get recent diff
-        try:
-            diff_proc = subprocess.run(
-                ["git", "diff", "HEAD~1", "HEAD"],
-                cwd=os.getcwd(),
-                capture_output=True,
-                text=True,
-                check=True,
+        # Attempt to get the diff covering the batch's commits, compacted
+        ranges = [item[2] for item in completed if len(item) > 2 and item[2]]
+        recent_diff = ""
+        if ranges:
+            try:
+                recent_diff = self.diff_summarizer.summary(
+                    ranges[0][0],
+                    ranges[-1][1],
+                    self.agent_config.get("refine_diff_tokens", DEFAULT_DIFF_TOKENS),
+                )
+            except Exception:
+                pass
+        result_tokens = self.agent_config.get(
+            "refine_result_tokens", DEFAULT_RESULT_TOKENS
+        )
+        completed = [
+            (item[0], truncate_middle(item[1] or "", result_tokens))
+            for item in completed
+        ]
+        if len(completed) == 1:
+            description, result = completed[0]
+            task_context = f"Last task: {description}\nResult of last task:\n{result}\n"
+        else:
+            task_context = "Last completed tasks:\n" + "".join(
+                f"{i}. {description}\n   Result: {result}\n"
+                for i, (description, result) in enumerate(completed, start=1)
             )
-            recent_diff = diff_proc.stdout
-        except Exception:
-            recent_diff = ""
         # System prompt with function-calling instruction and context
         system_prompt = (
             f"{base_prompt}\n\n"
             "You have access to generate_tasks(tasks). Use it to list next tasks.\n"
-            f"Last task: {previous_task_description}\n"
-            f"Result of last task:\n{previous_task_result}\n\n"
+            f"{task_context}\n"
             f"Recent diff:\n{recent_diff}\n"
             "Invoke generate_tasks with an array of two or more next tasks. Do not include other text."
         )
         user_prompt = "Invoke generate_tasks with your array of next tasks."
-        function_def = {
-            "name": "generate_tasks",
-            "description": "Returns the next set of tasks as a list of strings.",
-            "parameters": {
-                "type": "object",
-                "properties": {"tasks": {"type": "array", "items": {"type": "string"}}},
-                "required": ["tasks"],
-            },
-        }
         messages = [
             {"role": "system", "content": system_prompt},
             {"role": "user", "content": user_prompt},
         ]
         # AI call with function schema
         # Request refinement via AI function-calling, using 'refinement' model
-        msg = self.client.chat(messages, functions=[function_def], stage="refinement")
+        msg = self.client.chat(
+            messages, functions=[GENERATE_TASKS_FUNCTION], stage="refinement"
+        )
+        return self._store_generated_tasks(msg)
+
+    def _store_generated_tasks(self, msg) -> int:
+        """
+        Persist the tasks proposed in a generate_tasks response as one batch.
+
+        Parses the function_call arguments when present, otherwise falls back to
+        treating the reply content as a newline-separated (optionally numbered
+        or bulleted) list.
+
+        Returns:
+            The number of tasks stored.
+        """
         func_call = getattr(msg, "function_call", None)
         if func_call and hasattr(func_call, "arguments"):
             try:
                 payload = json.loads(func_call.arguments)
-                for task in payload.get("tasks", []):
-                    self.memory.add_task(task)
-                return
+                return self.memory.add_tasks(_valid_tasks(payload.get("tasks", [])))
             except Exception:
                 pass
-        # Fallback: parse plain text
+        # Fallback: parse as newline-separated text
         text = getattr(msg, "content", "") or ""
+        tasks = []
         for line in text.split("\n"):
             desc = line.strip()
             if not desc:
                 continue
             desc = re.sub(r"^[\s\d\-\*\.\)]+", "", desc)
             desc = desc.replace("*", "").strip()
-            self.memory.add_task(desc)
+            tasks.append(desc)
+        return self.memory.add_tasks(tasks)
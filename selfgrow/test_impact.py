@@ -0,0 +1,283 @@
+"""
+Test Impact Module
+
+Maps test modules to the project modules they exercise, so validation can run only the
+tests affected by a change.
+"""
+
+import ast
+import json
+import os
+import threading
+from typing import Dict, Iterable, List, Optional, Set
+
+DEFAULT_MAP_PATH = ".selfgrow_test_map.json"
+DEFAULT_FULL_RUN_EVERY = 10
+# Changes to these never affect test outcomes
+DOC_EXTENSIONS = (".md", ".rst")
+
+
+class TestSelection:
+    """Tests chosen for a change; `tests` is None when the full suite must run."""
+
+    __test__ = False  # not a pytest test class
+
+    def __init__(self, tests: Optional[List[str]], total: int, reason: str = ""):
+        self.tests = tests
+        self.total = total
+        self.reason = reason
+
+    @property
+    def full(self) -> bool:
+        return self.tests is None
+
+    def describe(self) -> str:
+        """Human-readable run/skip summary for task results."""
+        if self.full:
+            return f"ran all {self.total} test files ({self.reason})"
+        skipped = self.total - len(self.tests)
+        return f"ran {len(self.tests)} of {self.total} test files, {skipped} skipped"
+
+
+class TestImpactAnalyzer:
+    """
+    Builds a test-to-module dependency map from the import graph, optionally
+    enriched with per-test coverage contexts, and caches it between runs.
+    Only files whose mtime or size changed are re-parsed.
+
+    Thread-safe: one analyzer can serve executors working in different trees
+    (e.g. worktrees) by passing select() the tree to read sources from.
+    """
+
+    __test__ = False  # not a pytest test class
+
+    def __init__(
+        self,
+        root: Optional[str] = None,
+        package: str = "selfgrow",
+        test_dir: str = "tests",
+        map_path: str = DEFAULT_MAP_PATH,
+        full_run_every: int = DEFAULT_FULL_RUN_EVERY,
+        use_coverage: bool = True,
+    ):
+        """
+        Args:
+            root: Project root; defaults to CWD.
+            package: Package directory whose modules are tracked.
+            test_dir: Directory holding test_*.py modules.
+            map_path: Cache file, relative to root.
+            full_run_every: Force a full run after this many selective runs
+                (0 disables the safety net).
+            use_coverage: Merge per-test contexts from a .coverage file if the
+                optional coverage package is installed.
+        """
+        self.root = root or os.getcwd()
+        # Tree the sources are parsed from; may be a staging mirror of root
+        self.source_root = self.root
+        self.package = package
+        self.test_dir = test_dir
+        self.map_path = os.path.join(self.root, map_path)
+        self.full_run_every = full_run_every
+        self.use_coverage = use_coverage
+        self._cache = self._load_cache()
+        self._lock = threading.Lock()
+
+    def _load_cache(self) -> dict:
+        try:
+            with open(self.map_path, "r", encoding="utf-8") as f:
+                cache = json.load(f)
+        except (OSError, ValueError):
+            cache = {}
+        cache.setdefault("files", {})
+        cache.setdefault("selective_runs", 0)
+        return cache
+
+    def _save_cache(self) -> None:
+        try:
+            with open(self.map_path, "w", encoding="utf-8") as f:
+                json.dump(self._cache, f)
+        except OSError:
+            pass
+
+    def _python_files(self, directory: str) -> List[str]:
+        found = []
+        base = os.path.join(self.source_root, directory)
+        for dirpath, dirnames, filenames in os.walk(base):
+            dirnames[:] = [d for d in dirnames if not d.startswith((".", "__"))]
+            for name in filenames:
+                if name.endswith(".py"):
+                    found.append(
+                        os.path.relpath(
+                            os.path.join(dirpath, name), self.source_root
+                        ).replace(os.sep, "/")
+                    )
+        return sorted(found)
+
+    def _imports(self, rel_path: str) -> List[str]:
+        """Return the project modules (as relative file paths) a file imports."""
+        try:
+            with open(
+                os.path.join(self.source_root, rel_path), "r", encoding="utf-8"
+            ) as f:
+                tree = ast.parse(f.read(), rel_path)
+        except (OSError, SyntaxError, ValueError):
+            return []
+        module_parts = rel_path[:-3].split("/")
+        if module_parts[-1] == "__init__":
+            module_parts = module_parts[:-1]
+        names = set()
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Import):
+                names.update(alias.name for alias in node.names)
+            elif isinstance(node, ast.ImportFrom):
+                if node.level:
+                    # Relative import: resolve against this file's package
+                    package = rel_path.split("/")[:-1]
+                    base = package[: len(package) - node.level + 1]
+                    prefix = ".".join(base + ([node.module] if node.module else []))
+                else:
+                    prefix = node.module or ""
+                names.add(prefix)
+                names.update(f"{prefix}.{alias.name}" for alias in node.names)
+        resolved = set()
+        for name in names:
+            if name != self.package and not name.startswith(self.package + "."):
+                continue
+            path = name.replace(".", "/")
+            for candidate in (f"{path}.py", f"{path}/__init__.py"):
+                if os.path.exists(os.path.join(self.source_root, candidate)):
+                    resolved.add(candidate)
+            # Importing a submodule runs its package __init__ too
+            parent = path.split("/")[:-1]
+            while parent:
+                init = "/".join(parent) + "/__init__.py"
+                if os.path.exists(os.path.join(self.source_root, init)):
+                    resolved.add(init)
+                parent = parent[:-1]
+        return sorted(resolved)
+
+    def refresh(self) -> Dict[str, List[str]]:
+        """
+        Bring the cached import graph up to date and return the test map.
+
+        Returns:
+            Mapping of test file to the sorted project modules it depends on.
+        """
+        files = self._python_files(self.package) + self._python_files(self.test_dir)
+        cached = self._cache["files"]
+        current = {}
+        changed = False
+        for rel_path in files:
+            stat = os.stat(os.path.join(self.source_root, rel_path))
+            stamp = [stat.st_mtime_ns, stat.st_size]
+            entry = cached.get(rel_path)
+            if entry is None or entry["stamp"] != stamp:
+                entry = {"stamp": stamp, "imports": self._imports(rel_path)}
+                changed = True
+            current[rel_path] = entry
+        if changed or set(current) != set(cached):
+            self._cache["files"] = current
+            self._save_cache()
+        test_map = {}
+        for rel_path in files:
+            if not self._is_test_module(rel_path):
+                continue
+            seen: Set[str] = set()
+            stack = list(current[rel_path]["imports"])
+            while stack:
+                module = stack.pop()
+                if module in seen:
+                    continue
+                seen.add(module)
+                stack.extend(current.get(module, {}).get("imports", []))
+            test_map[rel_path] = seen
+        for test_path, modules in self._coverage_map().items():
+            if test_path in test_map:
+                test_map[test_path].update(modules)
+        return {test: sorted(modules) for test, modules in test_map.items()}
+
+    def _is_test_module(self, rel_path: str) -> bool:
+        name = rel_path.rsplit("/", 1)[-1]
+        return rel_path.startswith(self.test_dir + "/") and name.startswith("test_")
+
+    def _coverage_map(self) -> Dict[str, Set[str]]:
+        """Read per-test contexts from .coverage, if available."""
+        data_file = os.path.join(self.root, ".coverage")
+        if not self.use_coverage or not os.path.exists(data_file):
+            return {}
+        try:
+            import coverage
+        except ImportError:
+            return {}
+        data = coverage.CoverageData(basename=data_file)
+        data.read()
+        result: Dict[str, Set[str]] = {}
+        for measured in data.measured_files():
+            rel_path = os.path.relpath(measured, self.root).replace(os.sep, "/")
+            if not rel_path.startswith(self.package + "/"):
+                continue
+            for contexts in data.contexts_by_lineno(measured).values():
+                for context in contexts:
+                    # pytest-cov contexts look like 'tests/test_x.py::test_y|run'
+                    test_path = context.split("::", 1)[0]
+                    if test_path:
+                        result.setdefault(test_path, set()).add(rel_path)
+        return result
+
+    def select(
+        self, changed_files: Iterable[str], source_root: Optional[str] = None
+    ) -> TestSelection:
+        """
+        Choose the tests to run after changed_files were modified.
+
+        Every `full_run_every` selective runs, and whenever a change could
+        affect tests in ways the import graph cannot see (conftest, setup.py,
+        config, unknown files, modules no test imports), the full suite is
+        selected instead.
+
+        Args:
+            changed_files: Relative paths of the changed files.
+            source_root: Tree to read the sources from for this selection,
+                e.g. a staging mirror; defaults to source_root.
+        """
+        with self._lock:
+            previous = self.source_root
+            self.source_root = source_root or previous
+            try:
+                return self._select(changed_files)
+            finally:
+                self.source_root = previous
+
+    def _select(self, changed_files: Iterable[str]) -> TestSelection:
+        test_map = self.refresh()
+        total = len(test_map)
+        if self.full_run_every and self._cache["selective_runs"] >= self.full_run_every:
+            return self._full(total, "periodic full run")
+        selected: Set[str] = set()
+        for rel_path in changed_files:
+            rel_path = rel_path.replace(os.sep, "/")
+            if rel_path.endswith(DOC_EXTENSIONS):
+                continue
+            if not rel_path.endswith(".py"):
+                return self._full(total, f"{rel_path} changed")
+            if rel_path.startswith(self.test_dir + "/"):
+                if not self._is_test_module(rel_path):
+                    return self._full(total, f"{rel_path} changed")
+                selected.add(rel_path)
+            elif rel_path.startswith(self.package + "/"):
+                affected = [
+                    test for test, modules in test_map.items() if rel_path in modules
+                ]
+                if not affected:
+                    return self._full(total, f"no tests import {rel_path}")
+                selected.update(affected)
+            else:
+                return self._full(total, f"{rel_path} changed")
+        self._cache["selective_runs"] += 1
+        self._save_cache()
+        return TestSelection(sorted(selected), total)
+
+    def _full(self, total: int, reason: str) -> TestSelection:
+        self._cache["selective_runs"] = 0
+        self._save_cache()
+        return TestSelection(None, total, reason)
@@ -0,0 +1,30 @@
+"""
+Tokens Module
+
+Cheap local token estimates used for rate limiting and prompt budgeting.
+"""
+
+import json
+
+# Rough average for English text and code with OpenAI tokenizers
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimate the number of tokens in text without a tokenizer."""
+    if not text:
+        return 0
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def estimate_request_tokens(request_args: dict) -> int:
+    """
+    Estimate the tokens a chat request consumes against a tokens-per-minute quota.
+
+    Counts the messages and function definitions plus the requested completion
+    budget (max_tokens), which the API reserves up front.
+    """
+    prompt = json.dumps(request_args.get("messages", []))
+    if request_args.get("functions"):
+        prompt += json.dumps(request_args["functions"])
+    return estimate_tokens(prompt) + int(request_args.get("max_tokens") or 0)
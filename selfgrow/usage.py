@@ -0,0 +1,156 @@
+"""
+Usage Module
+
+Per-stage token and latency accounting for LLM calls, with soft and hard
+budgets per run and per stage.
+"""
+
+import contextvars
+import threading
+from contextlib import contextmanager
+from typing import Dict, Optional, Tuple
+
+# Scope of the budget covering every stage
+RUN_SCOPE = "run"
+# Seconds cli.run pauses before each task while a soft budget is exceeded
+DEFAULT_THROTTLE_SECONDS = 5.0
+# Budget metrics: usage field each one limits
+BUDGET_METRICS = {"tokens": "total_tokens", "seconds": "latency_ms"}
+
+
+class BudgetExceeded(RuntimeError):
+    """Raised before an LLM call once a hard budget is exhausted."""
+
+
+def _empty_totals() -> Dict[str, int]:
+    return {
+        "calls": 0,
+        "prompt_tokens": 0,
+        "completion_tokens": 0,
+        "total_tokens": 0,
+        "latency_ms": 0,
+    }
+
+
+class UsageTracker:
+    """
+    Accumulates the usage of every LLM call per stage and for the whole run,
+    optionally persisting each call to Memory's llm_usage table tied to the
+    task being worked on by the calling thread.
+
+    Budgets map a scope ('run' or a stage name) to limits named
+    '<soft|hard>_<tokens|seconds>', e.g. {'execution': {'hard_tokens': 50000}}.
+    A missing or null limit is unlimited.
+    """
+
+    def __init__(self, memory=None, budgets: Optional[dict] = None):
+        """
+        Args:
+            memory: Optional Memory the calls are recorded in.
+            budgets: Limits per scope, as described above.
+        """
+        self.memory = memory
+        self.budgets: Dict[str, Dict[str, float]] = {}
+        for scope, limits in (budgets or {}).items():
+            self.budgets[scope] = {
+                name: value for name, value in (limits or {}).items() if value
+            }
+        self._totals: Dict[str, Dict[str, int]] = {RUN_SCOPE: _empty_totals()}
+        self._lock = threading.Lock()
+        # Per thread and per asyncio task, unlike a threading.local
+        self._task_id = contextvars.ContextVar("usage_task_id", default=None)
+
+    @contextmanager
+    def task(self, task_id: Optional[int]):
+        """Attribute the calls made by this thread inside the block to task_id."""
+        token = self._task_id.set(task_id)
+        try:
+            yield
+        finally:
+            self._task_id.reset(token)
+
+    @property
+    def current_task(self) -> Optional[int]:
+        """The task the calling thread's calls are attributed to."""
+        return self._task_id.get()
+
+    def record(
+        self,
+        stage: Optional[str],
+        model: str,
+        prompt_tokens: int,
+        completion_tokens: int,
+        latency: float,
+    ) -> None:
+        """Account for one completed API call; latency is in seconds."""
+        stage = stage or "default"
+        latency_ms = int(latency * 1000)
+        with self._lock:
+            for scope in (RUN_SCOPE, stage):
+                totals = self._totals.setdefault(scope, _empty_totals())
+                totals["calls"] += 1
+                totals["prompt_tokens"] += prompt_tokens
+                totals["completion_tokens"] += completion_tokens
+                totals["total_tokens"] += prompt_tokens + completion_tokens
+                totals["latency_ms"] += latency_ms
+        if self.memory is not None:
+            self.memory.record_usage(
+                self._task_id.get(),
+                stage,
+                model,
+                prompt_tokens,
+                completion_tokens,
+                latency_ms,
+            )
+
+    def totals(self, scope: str = RUN_SCOPE) -> Dict[str, int]:
+        """Usage so far for the run or one stage."""
+        with self._lock:
+            return dict(self._totals.get(scope) or _empty_totals())
+
+    def _exceeded(self, level: str, scopes) -> Optional[str]:
+        """Describe the first exceeded budget of the given level, if any."""
+        for scope in scopes:
+            limits = self.budgets.get(scope, {})
+            totals = self.totals(scope)
+            for metric, field in BUDGET_METRICS.items():
+                limit = limits.get(f"{level}_{metric}")
+                if limit is None:
+                    continue
+                used = totals[field] / 1000 if metric == "seconds" else totals[field]
+                if used >= limit:
+                    return f"{scope} {level} budget of {limit} {metric} reached"
+        return None
+
+    def status(self) -> Tuple[Optional[str], Optional[str]]:
+        """
+        Check every budget.
+
+        Returns:
+            ('hard', reason), ('soft', reason), or (None, None).
+        """
+        for level in ("hard", "soft"):
+            reason = self._exceeded(level, self.budgets)
+            if reason:
+                return level, reason
+        return None, None
+
+    def check(self, stage: Optional[str]) -> None:
+        """
+        Refuse a call for stage once its or the run's hard budget is spent.
+
+        Raises:
+            BudgetExceeded: If a hard budget is exhausted.
+        """
+        reason = self._exceeded("hard", (RUN_SCOPE, stage or "default"))
+        if reason:
+            raise BudgetExceeded(f"LLM call refused: {reason}")
+
+    def counters(self) -> Dict[str, int]:
+        """Flat '<scope>_<field>' counters for the metrics summary."""
+        with self._lock:
+            return {
+                f"{scope}_{field}": value
+                for scope, totals in self._totals.items()
+                for field, value in totals.items()
+            }
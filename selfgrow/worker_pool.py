@@ -0,0 +1,259 @@
+"""
+Worker Pool Module
+
+Executes several tasks at once, each in an isolated git worktree on a throwaway branch,
+and integrates the validated commits onto the main working tree in claim order.
+"""
+
+import os
+import shutil
+import subprocess
+import tempfile
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from typing import Callable, Dict, Optional
+
+from .git_backend import GitBackend
+from .push_queue import PushQueue
+
+BRANCH_PREFIX = "selfgrow/task-"
+
+
+class IntegrationConflict(RuntimeError):
+    """
+    Raised when a task's commits no longer apply cleanly to the main branch, or
+    no longer pass the tests once applied.
+    """
+
+
+class TaskOutcome:
+    """Result of one task executed by the pool."""
+
+    def __init__(
+        self,
+        task_id: int,
+        description: str,
+        result: Optional[str] = None,
+        error: Optional[Exception] = None,
+    ):
+        self.task_id = task_id
+        self.description = description
+        self.result = result
+        self.error = error
+
+    def get(self) -> str:
+        """Return the task result, or raise the error that failed the task."""
+        if self.error is not None:
+            raise self.error
+        return self.result
+
+
+class WorktreePool:
+    """
+    Runs up to `workers` tasks concurrently in separate git worktrees.
+
+    Each task is executed (files written, committed, and tested) on its own
+    branch; passing commits are then cherry-picked onto the main working tree
+    one task at a time, in the order tasks were claimed, and the affected tests
+    are re-run there since the worktree tested against an older HEAD. A task
+    whose commits conflict with work integrated meanwhile, or break the tests
+    on top of it, is undone and requeued once to be regenerated against the new
+    HEAD.
+    """
+
+    def __init__(
+        self,
+        executor_factory: Callable[[str], object],
+        workers: int,
+        repo_dir: Optional[str] = None,
+        git_remote: Optional[str] = None,
+        git_branch: str = "main",
+        git_backend: Optional[GitBackend] = None,
+        push_queue: Optional[PushQueue] = None,
+        usage=None,
+        validator=None,
+    ):
+        """
+        Args:
+            executor_factory: Creates a CodeExecutor for a worktree directory.
+            workers: Maximum number of tasks executing at once.
+            repo_dir: Main working tree; defaults to CWD.
+            git_remote: Remote to push integrated commits to, if any.
+            git_branch: Branch to push to.
+            git_backend: GitBackend for repo_dir; one is created if omitted.
+            push_queue: Optional PushQueue used instead of pushing inline.
+            usage: Optional UsageTracker the LLM calls of each task are
+                attributed through.
+            validator: Optional executor for repo_dir whose run_tests(changed)
+                re-runs the affected tests after each cherry-pick.
+        """
+        self.executor_factory = executor_factory
+        self.workers = workers
+        self.repo_dir = repo_dir or os.getcwd()
+        self.git_remote = git_remote
+        self.git_branch = git_branch
+        self.git = git_backend or GitBackend(self.repo_dir)
+        self.push_queue = push_queue
+        self.usage = usage
+        self.validator = validator
+        # True once the pool stopped because no pending tasks remained
+        self.exhausted = False
+        self._requeued = set()
+        # Edit and local-handler counters of the discarded worktree executors,
+        # and the git processes their backends spawned
+        self.edit_stats: Dict[str, int] = {}
+        self.local_stats: Dict[str, int] = {}
+        self.git_processes = 0
+        self._stats_lock = threading.Lock()
+        # Worktree creation and removal touch shared .git metadata
+        self._worktree_lock = threading.Lock()
+
+    def _git(self, *args, cwd: Optional[str] = None, check: bool = True):
+        return self.git.run(*args, cwd=cwd, check=check)
+
+    def run(self, task_manager, max_tasks: int):
+        """
+        Claim and execute up to max_tasks tasks, yielding a TaskOutcome for each
+        in claim order once its changes are integrated (or it has failed).
+
+        Follow-up tasks added by the caller while consuming outcomes are picked
+        up by later claims.
+        """
+        in_flight = deque()
+        claimed = 0
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            while True:
+                while len(in_flight) < self.workers and claimed < max_tasks:
+                    item = task_manager.get_next_task()
+                    if not item:
+                        break
+                    base = self.git.rev_parse("HEAD")
+                    in_flight.append(
+                        (item, pool.submit(self._execute_in_worktree, *item, base))
+                    )
+                    claimed += 1
+                if not in_flight:
+                    self.exhausted = claimed < max_tasks
+                    return
+                (task_id, description), future = in_flight.popleft()
+                outcome = self._integrate(task_id, description, future.result())
+                if outcome is None:
+                    # Requeued after a conflict; it no longer counts as claimed
+                    task_manager.memory.update_task(task_id, "pending")
+                    claimed -= 1
+                    continue
+                yield outcome
+
+    def _execute_in_worktree(self, task_id: int, description: str, base: str):
+        """
+        Execute a task in a fresh worktree branched from base.
+
+        Returns:
+            A tuple (result, error, branch, base).
+        """
+        branch = f"{BRANCH_PREFIX}{task_id}"
+        path = tempfile.mkdtemp(prefix=f"selfgrow-task-{task_id}-")
+        os.rmdir(path)
+        with self._worktree_lock:
+            self._git("worktree", "add", "-f", "-B", branch, path, base)
+        executor = None
+        try:
+            executor = self.executor_factory(path)
+            with self.usage.task(task_id) if self.usage else nullcontext():
+                result = executor.execute(description)
+            return result, None, branch, base
+        except Exception as e:
+            return None, e, branch, base
+        finally:
+            if executor is not None:
+                self._retire(executor)
+            with self._worktree_lock:
+                self._git("worktree", "remove", "--force", path, check=False)
+            shutil.rmtree(path, ignore_errors=True)
+
+    def _retire(self, executor) -> None:
+        """Fold a worktree executor's counters into the pool's and close it."""
+        with self._stats_lock:
+            for total, stats in (
+                (self.edit_stats, getattr(executor, "edit_stats", {})),
+                (self.local_stats, getattr(executor, "local_stats", {})),
+            ):
+                for name, value in stats.items():
+                    total[name] = total.get(name, 0) + value
+            git = getattr(executor, "git", None)
+            if git is not None and git is not self.git:
+                self.git_processes += git.processes_spawned
+        if hasattr(executor, "close"):
+            executor.close()
+
+    def _integrate(
+        self, task_id: int, description: str, execution
+    ) -> Optional[TaskOutcome]:
+        """
+        Cherry-pick a successful task's commits onto the main working tree and
+        re-test them there.
+
+        Returns:
+            The outcome, or None if the task conflicted and was requeued.
+        """
+        result, error, branch, base = execution
+        try:
+            if error is not None:
+                return TaskOutcome(task_id, description, error=error)
+            commits = self._git(
+                "rev-list", "--reverse", f"{base}..{branch}"
+            ).stdout.split()
+            if commits:
+                head = self.git.rev_parse("HEAD")
+                picked = self._git("cherry-pick", *commits, check=False)
+                if picked.returncode != 0:
+                    self._git("cherry-pick", "--abort", check=False)
+                    return self._conflict(
+                        task_id,
+                        description,
+                        f"Changes for task '{description}' conflict with "
+                        f"{self.git_branch}:\n{picked.stdout}{picked.stderr}",
+                    )
+                failure = self._retest(head)
+                if failure is not None:
+                    self._git("reset", "-q", "--hard", head)
+                    return self._conflict(
+                        task_id,
+                        description,
+                        f"Tests failed for task '{description}' on top of "
+                        f"{self.git_branch}:\n{failure}",
+                    )
+                if self.push_queue is not None:
+                    self.push_queue.request()
+                elif self.git_remote:
+                    self.git.push(self.git_remote, self.git_branch)
+            return TaskOutcome(task_id, description, result=result)
+        finally:
+            self._git("branch", "-D", branch, check=False)
+
+    def _retest(self, head: str) -> Optional[str]:
+        """
+        Run the tests affected by the commits after head in the main tree.
+
+        Returns:
+            The test output if they failed, or None.
+        """
+        if self.validator is None:
+            return None
+        changed = self._git("diff", "--name-only", head, "HEAD").stdout.splitlines()
+        try:
+            self.validator.run_tests(changed)
+        except subprocess.CalledProcessError as e:
+            return f"{e.stdout}\n{e.stderr}"
+        return None
+
+    def _conflict(
+        self, task_id: int, description: str, message: str
+    ) -> Optional[TaskOutcome]:
+        """Requeue a task that failed to integrate, or fail it the second time."""
+        if task_id not in self._requeued:
+            self._requeued.add(task_id)
+            return None
+        return TaskOutcome(task_id, description, error=IntegrationConflict(message))
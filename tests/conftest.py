@@ -0,0 +1,99 @@
+"""
+Shared fixtures for tests that run against real git repositories, stand-ins
+for the OpenAI client, and keeping test runs from writing to the repository's
+own log.
+"""
+
+import json
+import logging
+import os
+import subprocess
+import sys
+from typing import Optional
+
+import pytest
+
+# Ensure project root is on sys.path for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from selfgrow import logger as logger_module
+
+
+@pytest.fixture(autouse=True)
+def growai_log(tmp_path, monkeypatch):
+    """Send the 'growai' logger's file output to tmp_path for each test."""
+    path = tmp_path / "growai.log"
+    monkeypatch.setattr(logger_module, "LOG_FILE", str(path))
+    logger = logging.getLogger("growai")
+    handler = logging.FileHandler(path, delay=True)
+    kept = [h for h in logger.handlers if not isinstance(h, logging.FileHandler)]
+    monkeypatch.setattr(logger, "handlers", kept + [handler])
+    yield path
+    handler.close()
+
+
+class DummyFunctionCall:
+    """Simulates a function_call object with JSON arguments."""
+
+    def __init__(self, arguments: str):
+        self.arguments = arguments
+
+
+class DummyMessage:
+    """Simulates a Message with an optional function_call and text content."""
+
+    def __init__(self, func_args: Optional[dict] = None, content=None):
+        self.function_call = (
+            DummyFunctionCall(json.dumps(func_args)) if func_args else None
+        )
+        self.content = content
+
+
+class DummyClient:
+    """
+    Dummy OpenAIClient whose chat() returns a predetermined message: the one
+    given, or a function_call proposing `changes`.
+    """
+
+    def __init__(self, changes=None, message=None):
+        self.changes = changes
+        self.message = message or DummyMessage({"changes": changes})
+
+    def chat(self, messages, functions=None, **kwargs):
+        return self.message
+
+
+def run_git(repo, *args) -> str:
+    """Run a git command in repo, returning its stdout without surrounding blanks."""
+    return subprocess.run(
+        ["git", *args], cwd=repo, check=True, capture_output=True, text=True
+    ).stdout.strip()
+
+
+@pytest.fixture
+def git():
+    """git(repo, *args): run a git command in repo and return its stdout."""
+    return run_git
+
+
+@pytest.fixture
+def make_repo():
+    """
+    make_repo(path, files=None): create a repository on branch main with a
+    committer configured. files ({relative path: content}) are written and
+    committed as 'base'. Returns path.
+    """
+
+    def make(path, files=None):
+        path.mkdir(parents=True, exist_ok=True)
+        run_git(path, "init", "-q", "-b", "main")
+        run_git(path, "config", "user.email", "test@example.com")
+        run_git(path, "config", "user.name", "Test")
+        if files:
+            for rel_path, content in files.items():
+                (path / rel_path).write_text(content)
+            run_git(path, "add", "-A")
+            run_git(path, "commit", "-q", "-m", "base")
+        return path
+
+    return make
@@ -13,4 +13,116 @@ runner = CliRunner()
 def test_version_flag():
     result = runner.invoke(app, ["--version"])
     assert result.exit_code == 0
-    assert __version__ in result.stdout
\ No newline at end of file
+    assert __version__ in result.stdout
+
+
+def test_list_tasks_streams_with_limit(tmp_path, monkeypatch):
+    from selfgrow.memory import Memory
+
+    monkeypatch.chdir(tmp_path)
+    memory = Memory(dedup_threshold=None)
+    memory.add_tasks(["alpha", "beta", "gamma"])
+    memory.update_task(1, "done", "all good")
+
+    result = runner.invoke(app, ["list-tasks", "--limit", "2", "--with-result"])
+    assert result.exit_code == 0
+    assert "[1] done - alpha" in result.stdout
+    assert "    all good" in result.stdout
+    assert "gamma" not in result.stdout
+    assert "--after-id 2" in result.stdout
+
+    result = runner.invoke(app, ["list-tasks", "--after-id", "2"])
+    assert "[3] pending - gamma" in result.stdout
+    assert "alpha" not in result.stdout
+
+
+def test_task_over_budget_is_postponed_not_failed(tmp_path, monkeypatch, make_repo):
+    from selfgrow import cli
+    from selfgrow.memory import Memory
+    from selfgrow.usage import UsageTracker
+
+    monkeypatch.chdir(tmp_path)
+    make_repo(tmp_path, {"README.md": "# Journal\n"})
+    (tmp_path / "config.yaml").write_text("agent:\n  max_iterations: 3\n")
+    memory = Memory(dedup_threshold=None)
+    memory.add_tasks(
+        [{"description": "first"}, {"description": "second", "depends_on": [0]}]
+    )
+
+    class Client:
+        def __init__(self, config_path):
+            self.usage = UsageTracker(budgets={"run": {"hard_tokens": 10}})
+
+        def cache_stats(self):
+            return {}
+
+    class Executor:
+        def __init__(self, openai_client, git_backend, **kwargs):
+            self.client = openai_client
+            self.git = git_backend
+            self.edit_stats = {}
+            self.local_stats = {}
+
+        def execute(self, description):
+            self.client.usage.record("execution", "model", 20, 0, 0.0)
+            # The next call's budget check refuses it
+            self.client.usage.check("execution")
+
+        def close(self):
+            pass
+
+    monkeypatch.setattr(cli, "OpenAIClient", Client)
+    monkeypatch.setattr(cli, "CodeExecutor", Executor)
+
+    result = runner.invoke(app, ["run"])
+    assert result.exit_code == 0, result.output
+    assert "postponed" in result.stdout
+    assert [row[2] for row in Memory().get_all_tasks()] == ["pending", "pending"]
+
+
+def test_journal_failure_does_not_end_run(tmp_path, monkeypatch, make_repo):
+    from selfgrow import cli
+    from selfgrow.journal import Journal
+    from selfgrow.memory import Memory
+    from selfgrow.usage import UsageTracker
+
+    monkeypatch.chdir(tmp_path)
+    make_repo(tmp_path, {"README.md": "# Journal\n"})
+    (tmp_path / "config.yaml").write_text("agent:\n  max_iterations: 3\n")
+    Memory(dedup_threshold=None).add_tasks(
+        [{"description": "first"}, {"description": "second"}]
+    )
+
+    class Client:
+        def __init__(self, config_path):
+            self.usage = UsageTracker()
+
+        def cache_stats(self):
+            return {}
+
+    class Executor:
+        def __init__(self, openai_client, git_backend, **kwargs):
+            self.git = git_backend
+            self.edit_stats = {}
+            self.local_stats = {}
+
+        def execute(self, description):
+            raise RuntimeError("Tests failed")
+
+        def close(self):
+            pass
+
+    original_log = Journal.log
+
+    def log(self, description):
+        if description.startswith("Failed"):
+            raise FileNotFoundError("README.md")
+        original_log(self, description)
+
+    monkeypatch.setattr(cli, "OpenAIClient", Client)
+    monkeypatch.setattr(cli, "CodeExecutor", Executor)
+    monkeypatch.setattr(Journal, "log", log)
+
+    result = runner.invoke(app, ["run"])
+    assert result.exit_code == 0, result.output
+    assert [row[2] for row in Memory().get_all_tasks()] == ["error", "error"]
@@ -11,31 +11,7 @@ import pytest
 from selfgrow.code_executor import CodeExecutor
 from selfgrow.openai_client import OpenAIClient
 
-
-class DummyFunctionCall:
-    """Simulates a function_call object with JSON arguments."""
-
-    def __init__(self, arguments: str):
-        self.arguments = arguments
-
-
-class DummyMessage:
-    """Simulates a Message with a function_call attribute."""
-
-    def __init__(self, func_args: dict):
-        # Serialize arguments to JSON string
-        self.function_call = DummyFunctionCall(json.dumps(func_args))
-
-
-class DummyClient:
-    """Dummy OpenAIClient that returns a predetermined function_call message."""
-
-    def __init__(self, changes):
-        self.changes = changes
-
-    def chat(self, messages, functions=None, **kwargs):
-        # Return a DummyMessage with the specified changes
-        return DummyMessage({"changes": self.changes})
+from conftest import DummyClient
 
 
 @pytest.fixture(autouse=True)
@@ -47,7 +23,9 @@ def stub_subprocess(monkeypatch):
         calls.append(list(cmd))
 
         class Result:
-            pass
+            returncode = 0
+            stdout = ""
+            stderr = ""
 
         return Result()
 
@@ -108,14 +86,11 @@ def test_execute_creates_files_and_commits(tmp_path, stub_subprocess):
     assert alpha.exists()
     assert alpha.read_text() == "XYZ"
     assert "Created file alpha.txt" in fallback_result
-    # Verify subprocess.run for add and commit
-    # Now uses 'git add -A' to stage all changes
-    assert ["git", "add", "-A"] in stub_subprocess
-    # Commit should use '-a -m'
-    commit_calls = [
-        c for c in stub_subprocess if c[:4] == ["git", "commit", "-a", "-m"]
-    ]
-    assert commit_calls and "Create alpha.txt (fallback)" in commit_calls[0][4]
+    # The file was tested before it was written, and only it is committed
+    assert ["git", "add", "-A"] not in stub_subprocess
+    assert ["git", "add", "alpha.txt"] in stub_subprocess
+    commit_calls = [c for c in stub_subprocess if c[:3] == ["git", "commit", "-m"]]
+    assert commit_calls and commit_calls[-1][3] == "Create alpha.txt (fallback)"
 
 
 def test_format_code_task(tmp_path, stub_subprocess):
@@ -127,18 +102,21 @@ def test_format_code_task(tmp_path, stub_subprocess):
         git_remote=None,
         git_branch="main",
     )
+    (tmp_path / "ugly.py").write_text("x = {  'a':1 }\n")
+    (tmp_path / "clean.py").write_text("y = 1\n")
     # Execute 'format code' fallback
     result = executor.execute("format code")
     # Verify result message
-    assert result == "Code formatted with Black"
-    # Verify black was invoked
-    assert ["black", "."] in stub_subprocess
-    # Verify git add and commit were invoked
-    assert ["git", "add", "-A"] in stub_subprocess
-    commit_calls = [
-        c for c in stub_subprocess if c[:4] == ["git", "commit", "-a", "-m"]
-    ]
-    assert any("Apply code formatting via Black" in c[4] for c in commit_calls)
+    assert result.startswith("Code formatted with Black (1 files)")
+    assert ["pytest", "-q"] in stub_subprocess
+    assert ["git", "add", "-A"] not in stub_subprocess
+    # Black runs in-process, not as a subprocess, and only rewrites what changed
+    assert ["black", "."] not in stub_subprocess
+    assert (tmp_path / "ugly.py").read_text() == 'x = {"a": 1}\n'
+    # Verify the reformatted file was staged and committed
+    assert ["git", "add", "ugly.py"] in stub_subprocess
+    commit_calls = [c for c in stub_subprocess if c[:3] == ["git", "commit", "-m"]]
+    assert any("Apply code formatting via Black" in c[3] for c in commit_calls)
     # Now test 'install black' fallback
     stub_subprocess.clear()
     executor3 = CodeExecutor(
@@ -155,3 +133,251 @@ def test_format_code_task(tmp_path, stub_subprocess):
     assert ["git", "add", "requirements.txt"] in stub_subprocess
     commit_calls = [c for c in stub_subprocess if c[:3] == ["git", "commit", "-m"]]
     assert any("Install Black (fallback)" in c[3] for c in commit_calls)
+
+
+class StreamingClient:
+    """Dummy OpenAIClient that streams function_call arguments in small pieces."""
+
+    def __init__(self, changes, chunk_size=7):
+        self.arguments = json.dumps({"changes": changes})
+        self.chunk_size = chunk_size
+        self.fragments_sent = 0
+
+    def stream_function_call(self, messages, functions, **kwargs):
+        for i in range(0, len(self.arguments), self.chunk_size):
+            self.fragments_sent += 1
+            yield self.arguments[i : i + self.chunk_size]
+
+
+def test_streamed_changes_are_written_incrementally(tmp_path, stub_subprocess):
+    changes = [
+        {"path": "pkg/mod.py", "content": "VALUE = {'a': 1}\n"},
+        {"path": "notes.txt", "content": 'quote " and brace }'},
+    ]
+    client = StreamingClient(changes)
+    executor = CodeExecutor(
+        openai_client=client, work_directory=str(tmp_path), stream=True
+    )
+    written_at = {}
+    original_write = executor._write_file
+
+    def recording_write(rel_path, content):
+        written_at[rel_path] = client.fragments_sent
+        original_write(rel_path, content)
+
+    executor._write_file = recording_write
+    result = executor.execute("Streamed task")
+
+    assert (tmp_path / "pkg" / "mod.py").read_text() == "VALUE = {'a': 1}\n"
+    assert (tmp_path / "notes.txt").read_text() == 'quote " and brace }'
+    # The first file was written before the stream finished
+    assert written_at["pkg/mod.py"] < written_at["notes.txt"]
+    assert "Applied changes to: pkg/mod.py, notes.txt" in result
+    assert ["git", "add", "pkg/mod.py", "notes.txt"] in stub_subprocess
+
+
+def test_streamed_syntax_error_leaves_tree_untouched(tmp_path, stub_subprocess):
+    (tmp_path / "keep.py").write_text("x = 1\n")
+    changes = [
+        {"path": "keep.py", "content": "x = 2\n"},
+        {"path": "broken.py", "content": "def broken(:\n"},
+    ]
+    executor = CodeExecutor(
+        openai_client=StreamingClient(changes),
+        work_directory=str(tmp_path),
+        stream=True,
+    )
+    with pytest.raises(RuntimeError, match="broken.py"):
+        executor.execute("Broken task")
+    assert (tmp_path / "keep.py").read_text() == "x = 1\n"
+    assert not (tmp_path / "broken.py").exists()
+    assert not any(call[:2] == ["git", "commit"] for call in stub_subprocess)
+
+
+def test_validation_runs_only_affected_tests(tmp_path, stub_subprocess):
+    from selfgrow.test_impact import TestImpactAnalyzer
+
+    (tmp_path / "selfgrow").mkdir()
+    (tmp_path / "tests").mkdir()
+    (tmp_path / "selfgrow" / "__init__.py").write_text("")
+    (tmp_path / "tests" / "test_util.py").write_text("import selfgrow.util\n")
+    (tmp_path / "tests" / "test_other.py").write_text("import os\n")
+    executor = CodeExecutor(
+        openai_client=DummyClient([{"path": "selfgrow/util.py", "content": "X = 1\n"}]),
+        work_directory=str(tmp_path),
+        test_selector=TestImpactAnalyzer(str(tmp_path), full_run_every=0),
+    )
+    result = executor.execute("Add util")
+    assert ["pytest", "-q", "tests/test_util.py"] in stub_subprocess
+    assert "ran 1 of 2 test files, 1 skipped" in result
+
+
+def test_failed_validation_touches_neither_tree_nor_git(tmp_path, monkeypatch):
+    (tmp_path / "keep.py").write_text("x = 1\n")
+    calls = []
+
+    def fake_run(cmd, cwd=None, check=False, **kwargs):
+        calls.append((list(cmd), cwd))
+        if cmd[0] == "pytest":
+            raise subprocess.CalledProcessError(1, cmd, "1 failed", "")
+
+        class Result:
+            returncode = 128
+            stdout = ""
+            stderr = ""
+
+        return Result()
+
+    monkeypatch.setattr(subprocess, "run", fake_run)
+    executor = CodeExecutor(
+        openai_client=DummyClient([{"path": "keep.py", "content": "x = 2\n"}]),
+        work_directory=str(tmp_path),
+    )
+    with pytest.raises(RuntimeError, match="Tests failed"):
+        executor.execute("Failing task")
+    assert (tmp_path / "keep.py").read_text() == "x = 1\n"
+    # Tests ran against the staged copy, and no git write happened
+    pytest_cwd = next(cwd for cmd, cwd in calls if cmd[0] == "pytest")
+    with open(os.path.join(pytest_cwd, "keep.py")) as f:
+        assert f.read() == "x = 2\n"
+    assert not any(cmd[:2] in (["git", "add"], ["git", "commit"]) for cmd, _ in calls)
+
+
+def test_syntax_gate_runs_before_tests(tmp_path, stub_subprocess):
+    executor = CodeExecutor(
+        openai_client=DummyClient([{"path": "bad.py", "content": "def f(:\n"}]),
+        work_directory=str(tmp_path),
+    )
+    with pytest.raises(RuntimeError, match="Syntax errors"):
+        executor.execute("Bad syntax")
+    assert not (tmp_path / "bad.py").exists()
+    assert ["pytest", "-q"] not in stub_subprocess
+
+
+def test_hunk_edits_patch_existing_file_and_report_savings(tmp_path, stub_subprocess):
+    body = "".join(f"LINE_{i} = {i}\n" for i in range(200))
+    (tmp_path / "big.py").write_text(body)
+    changes = [
+        {
+            "path": "big.py",
+            "edits": [{"search": "LINE_7 = 7", "replace": "LINE_7 = 70"}],
+        }
+    ]
+    executor = CodeExecutor(
+        openai_client=DummyClient(changes), work_directory=str(tmp_path)
+    )
+    result = executor.execute("Tweak one line")
+    assert (tmp_path / "big.py").read_text() == body.replace(
+        "LINE_7 = 7\n", "LINE_7 = 70\n"
+    )
+    assert executor.edit_stats["hunk_files"] == 1
+    assert executor.edit_stats["output_tokens_saved"] > 500
+    assert "hunk edits saved" in result
+
+
+def test_unmatched_hunk_falls_back_to_full_content(tmp_path, stub_subprocess):
+    (tmp_path / "mod.py").write_text("A = 1\n")
+
+    class FallbackClient(DummyClient):
+        def __init__(self, changes):
+            super().__init__(changes)
+            self.text_requests = 0
+
+        def chat(self, messages, functions=None, **kwargs):
+            if functions is None:
+                self.text_requests += 1
+                return "```python\nA = 3\n```"
+            return super().chat(messages, functions, **kwargs)
+
+    client = FallbackClient(
+        [
+            {"path": "mod.py", "edits": [{"search": "A = 2", "replace": "A = 5"}]},
+            {
+                "path": "other.py",
+                "edits": [{"search": "nope", "replace": "x"}],
+                "content": "B = 1\n",
+            },
+        ]
+    )
+    executor = CodeExecutor(openai_client=client, work_directory=str(tmp_path))
+    executor.execute("Edit with stale hunks")
+    assert (tmp_path / "mod.py").read_text() == "A = 3\n"
+    assert (tmp_path / "other.py").read_text() == "B = 1\n"
+    assert client.text_requests == 1
+    assert executor.edit_stats["hunk_fallbacks"] == 2
+
+
+def test_stale_hunks_of_several_files_are_refetched_in_one_batch(
+    tmp_path, stub_subprocess
+):
+    (tmp_path / "a.py").write_text("A = 1\n")
+    (tmp_path / "b.py").write_text("B = 1\n")
+
+    class BatchClient(DummyClient):
+        def __init__(self, changes):
+            super().__init__(changes)
+            self.batches = []
+
+        def chat(self, messages, functions=None, **kwargs):
+            if functions is None:
+                raise AssertionError("full contents must be fetched in one batch")
+            return super().chat(messages, functions, **kwargs)
+
+        def chat_many(self, requests, return_exceptions=False, **kwargs):
+            self.batches.append(requests)
+            return [
+                f"```python\n{name} = 3\n```" for name in ("A", "B")[: len(requests)]
+            ]
+
+    client = BatchClient(
+        [
+            {"path": "a.py", "edits": [{"search": "A = 2", "replace": "A = 5"}]},
+            {"path": "b.py", "edits": [{"search": "B = 2", "replace": "B = 5"}]},
+        ]
+    )
+    executor = CodeExecutor(openai_client=client, work_directory=str(tmp_path))
+    executor.execute("Edit with stale hunks")
+    assert len(client.batches) == 1 and len(client.batches[0]) == 2
+    assert all(r["stage"] == "execution" for r in client.batches[0])
+    assert (tmp_path / "a.py").read_text() == "A = 3\n"
+    assert (tmp_path / "b.py").read_text() == "B = 3\n"
+    assert executor.edit_stats["hunk_fallbacks"] == 2
+
+
+def test_format_on_write_formats_generated_python(tmp_path, stub_subprocess):
+    executor = CodeExecutor(
+        openai_client=DummyClient(
+            [
+                {"path": "gen.py", "content": "x=[1,2]\n"},
+                {"path": "gen.txt", "content": "x=[1,2]\n"},
+            ]
+        ),
+        work_directory=str(tmp_path),
+        format_on_write=True,
+    )
+    executor.execute("Generate code")
+    assert (tmp_path / "gen.py").read_text() == "x = [1, 2]\n"
+    assert (tmp_path / "gen.txt").read_text() == "x=[1,2]\n"
+
+
+def test_no_tests_collected_fails_full_runs_only(tmp_path, stub_subprocess):
+    from selfgrow.test_impact import TestImpactAnalyzer
+
+    class EmptyRunner:
+        def run(self, args, cwd):
+            return subprocess.CompletedProcess(args, 5, "no tests ran", "")
+
+    (tmp_path / "selfgrow").mkdir()
+    (tmp_path / "tests").mkdir()
+    (tmp_path / "tests" / "test_util.py").write_text("import selfgrow.util\n")
+    changes = [{"path": "selfgrow/util.py", "content": "X = 1\n"}]
+    executor = CodeExecutor(
+        openai_client=DummyClient(changes),
+        work_directory=str(tmp_path),
+        test_runner=EmptyRunner(),
+    )
+    with pytest.raises(RuntimeError, match="Tests failed"):
+        executor.execute("Add util")
+
+    executor.test_selector = TestImpactAnalyzer(str(tmp_path), full_run_every=0)
+    assert "ran 1 of 1 test files" in executor.execute("Add util")
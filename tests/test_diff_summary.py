@@ -0,0 +1,88 @@
+import os
+import sys
+import subprocess
+
+# Ensure project root is on sys.path for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from selfgrow.diff_summary import (
+    DiffSummarizer,
+    compact_diff,
+    parse_diff,
+    truncate_middle,
+)
+from selfgrow.git_backend import GitBackend
+from selfgrow.tokens import estimate_tokens
+
+
+def file_diff(path, hunks):
+    lines = [f"diff --git a/{path} b/{path}", f"--- a/{path}", f"+++ b/{path}"]
+    for removed, added in hunks:
+        lines.append("@@ -1,1 +1,1 @@")
+        lines += [f"-{line}" for line in removed] + [f"+{line}" for line in added]
+    return "\n".join(lines) + "\n"
+
+
+def test_parse_diff_splits_files_and_hunks():
+    text = file_diff("a.py", [(["x = 1"], ["x = 2"]), (["y"], ["z"])])
+    text += file_diff("b.txt", [([], ["new"])])
+    files = parse_diff(text)
+    assert [f.path for f in files] == ["a.py", "b.txt"]
+    assert [len(f.hunks) for f in files] == [2, 1]
+    assert files[0].counts() == (2, 2)
+
+
+def test_small_diff_is_unchanged():
+    text = file_diff("a.py", [(["x = 1"], ["x = 2"])])
+    assert compact_diff(text, 1000) == text
+
+
+def test_compaction_collapses_noise_and_fits_budget():
+    big = [f"value_{i} = {i}" for i in range(400)]
+    text = file_diff("package-lock.json", [([], big)])
+    text += file_diff("style.py", [(["f(a,b)"], ["f(a, b)"])])
+    text += file_diff("core.py", [(["return 1"], ["return 2"])])
+    text += file_diff("docs.md", [([], big)])
+    compacted = compact_diff(text, 300)
+    assert estimate_tokens(compacted) <= 320
+    # Every file is listed with its counts
+    assert "package-lock.json | +400 -0" in compacted
+    assert "docs.md | +400 -0" in compacted
+    # The source hunk survives; noise is collapsed to notes
+    assert "+return 2" in compacted
+    assert "(generated or binary file, hunks omitted)" in compacted
+    assert "(whitespace-only hunks omitted)" in compacted
+    assert "+value_0 = 0" not in compacted
+
+
+def test_truncate_middle_keeps_head_and_tail():
+    text = "\n".join(f"line {i}" for i in range(200))
+    cut = truncate_middle(text, 40)
+    assert cut.startswith("line 0\n")
+    assert cut.endswith("line 199")
+    assert "lines truncated" in cut
+    assert estimate_tokens(cut) <= 40
+    assert truncate_middle("short", 40) == "short"
+
+
+def test_summarizer_caches_by_sha(tmp_path):
+    def git(*args):
+        subprocess.run(["git", *args], cwd=tmp_path, check=True, capture_output=True)
+
+    git("init", "-q")
+    git("config", "user.email", "test@example.com")
+    git("config", "user.name", "Test")
+    (tmp_path / "a.py").write_text("x = 1\n")
+    git("add", "a.py")
+    git("commit", "-q", "-m", "one")
+    (tmp_path / "a.py").write_text("x = 2\n")
+    git("commit", "-q", "-am", "two")
+
+    backend = GitBackend(str(tmp_path))
+    summarizer = DiffSummarizer(backend)
+    first = summarizer.summary("HEAD~1", "HEAD", 500)
+    assert "+x = 2" in first
+    spawned = backend.processes_spawned
+    assert summarizer.summary("HEAD~1", "HEAD", 500) == first
+    assert backend.processes_spawned == spawned
+    backend.close()
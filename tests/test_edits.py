@@ -0,0 +1,38 @@
+import os
+import sys
+
+import pytest
+
+# Ensure project root is on sys.path for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from selfgrow.edits import HunkMismatch, apply_edits, apply_hunk
+
+SOURCE = "def f():\n    return 1\n\n\ndef g():\n    return 2\n"
+
+
+def test_exact_hunks_apply_in_order():
+    edited = apply_edits(
+        SOURCE,
+        [
+            {"search": "return 1", "replace": "return 10"},
+            {"search": "def g():\n    return 2", "replace": "def g():\n    return 20"},
+        ],
+    )
+    assert edited == "def f():\n    return 10\n\n\ndef g():\n    return 20\n"
+
+
+def test_whitespace_differences_still_match():
+    # Trailing spaces and lost indentation in the hunk are tolerated
+    edited = apply_hunk(SOURCE, "def g():  \nreturn 2\n", "def g():\n    return 3")
+    assert edited.endswith("def g():\n    return 3\n")
+    assert edited.startswith("def f():\n    return 1\n")
+
+
+def test_ambiguous_or_missing_search_is_rejected():
+    with pytest.raises(HunkMismatch, match="2 locations"):
+        apply_hunk(SOURCE, "    return", "    yield")
+    with pytest.raises(HunkMismatch, match="not found"):
+        apply_hunk(SOURCE, "return 3", "return 4")
+    with pytest.raises(HunkMismatch, match="empty"):
+        apply_hunk(SOURCE, "", "x")
@@ -0,0 +1,48 @@
+import os
+import sys
+
+# Ensure project root is on sys.path for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import selfgrow.formatter as formatter_module
+from selfgrow.formatter import Formatter
+
+
+def test_only_files_changed_since_last_run_are_formatted(
+    tmp_path, monkeypatch, git, make_repo
+):
+    make_repo(
+        tmp_path,
+        {
+            ".gitignore": ".selfgrow_format_cache.json\n",
+            "a.py": "a = ( 1 )\n",
+            "b.py": "b = 2\n",
+        },
+    )
+
+    formatter = Formatter(str(tmp_path))
+    assert formatter.format_tree() == ["a.py"]
+    assert (tmp_path / "a.py").read_text() == "a = 1\n"
+    git(tmp_path, "commit", "-q", "-am", "format")
+
+    calls = []
+    real_format = formatter_module.black.format_file_contents
+
+    def counting_format(content, **kwargs):
+        calls.append(content)
+        return real_format(content, **kwargs)
+
+    monkeypatch.setattr(formatter_module.black, "format_file_contents", counting_format)
+    (tmp_path / "c.py").write_text("c = [1,2]\n")
+    # A new Formatter reloads the cache: only c.py is considered and formatted
+    formatter = Formatter(str(tmp_path))
+    assert formatter.format_tree() == ["c.py"]
+    assert calls == ["c = [1,2]\n"]
+    assert (tmp_path / "c.py").read_text() == "c = [1, 2]\n"
+
+
+def test_format_source_skips_cached_and_invalid_content(tmp_path):
+    formatter = Formatter(str(tmp_path))
+    assert formatter.format_source("m.py", "x=1\n") == "x = 1\n"
+    assert formatter.format_source("m.py", "def broken(:\n") == "def broken(:\n"
+    assert formatter.format_source("notes.txt", "x=1\n") == "x=1\n"
@@ -0,0 +1,69 @@
+import os
+import sys
+
+# Ensure project root is on sys.path for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from selfgrow.git_backend import GitBackend
+from selfgrow.journal import Journal
+
+
+def test_lookups_share_one_helper_and_commits_are_cheap(tmp_path, git, make_repo):
+    make_repo(tmp_path, {"a.txt": "one\n"})
+    backend = GitBackend(str(tmp_path))
+    try:
+        head = backend.rev_parse("HEAD")
+        assert head == git(tmp_path, "rev-parse", "HEAD")
+        assert backend.is_tracked("a.txt") and not backend.is_tracked("b.txt")
+        assert backend.rev_parse("no-such-branch") is None
+        assert backend.processes_spawned == 1  # just the cat-file helper
+
+        # A tracked file commits in a single process
+        (tmp_path / "a.txt").write_text("two\n")
+        backend.commit(["a.txt"], "Edit a")
+        assert backend.processes_spawned == 2
+        # A new file needs 'git add' first
+        (tmp_path / "b.txt").write_text("new\n")
+        backend.commit(["b.txt"], "Add b")
+        assert backend.processes_spawned == 4
+        assert git(tmp_path, "log", "--format=%s").split("\n")[:2] == [
+            "Add b",
+            "Edit a",
+        ]
+        # Only the given paths are committed, not other staged changes
+        (tmp_path / "c.txt").write_text("staged\n")
+        git(tmp_path, "add", "c.txt")
+        (tmp_path / "d.txt").write_text("new\n")
+        backend.commit(["d.txt"], "Add d")
+        assert git(tmp_path, "show", "--name-only", "--format=") == "d.txt"
+        assert git(tmp_path, "status", "--porcelain") == "A  c.txt"
+        git(tmp_path, "rm", "-q", "--cached", "c.txt")
+        # The long-lived helper sees the new commits
+        assert backend.rev_parse("HEAD~3") == head
+
+        diff = backend.diff("HEAD~3", "HEAD~2")
+        assert "+two" in diff
+        spawned = backend.processes_spawned
+        assert backend.diff("HEAD~3", "HEAD~2") == diff
+        assert backend.processes_spawned == spawned
+    finally:
+        backend.close()
+
+
+def test_journal_batches_entries_into_one_commit(tmp_path, monkeypatch, git, make_repo):
+    make_repo(tmp_path, {"a.txt": "one\n"})
+    (tmp_path / "README.md").write_text("# Journal\n\n---\n")
+    git(tmp_path, "add", "README.md")
+    git(tmp_path, "commit", "-q", "-m", "readme")
+    monkeypatch.chdir(tmp_path)
+    journal = Journal(git_backend=GitBackend(str(tmp_path)))
+    journal.log("first")
+    journal.log("second")
+    assert git(tmp_path, "rev-list", "--count", "HEAD") == "2"
+    journal.flush()
+    journal.flush()
+    assert git(tmp_path, "rev-list", "--count", "HEAD") == "3"
+    assert git(tmp_path, "log", "-1", "--format=%s") == "Journal: 2 entries"
+    readme = (tmp_path / "README.md").read_text()
+    assert "## Entry 001 — first" in readme and "## Entry 002 — second" in readme
+    assert git(tmp_path, "status", "--porcelain") == ""
@@ -0,0 +1,81 @@
+import os
+import sys
+import time
+
+# Ensure project root is on sys.path for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from openai.types.chat import ChatCompletionMessage
+
+from selfgrow.llm_cache import ResponseCache
+from selfgrow.openai_client import OpenAIClient
+
+
+def test_lru_eviction_and_ttl(tmp_path, monkeypatch):
+    cache = ResponseCache(
+        path=str(tmp_path / "cache.db"),
+        max_entries=2,
+        stage_ttls={"execution": 60, "planning": 0},
+    )
+    assert cache.ttl_for("planning") is None
+    cache.put("a", "A", "execution")
+    cache.put("b", "B", "execution")
+    assert cache.get("a", "execution") == "A"  # 'a' is now most recently used
+    cache.put("c", "C", "execution")
+    assert cache.get("b", "execution") is None
+    assert cache.get("a", "execution") == "A"
+    assert cache.get("c", "execution") == "C"
+
+    later = time.time() + 120
+    monkeypatch.setattr(time, "time", lambda: later)
+    assert cache.get("a", "execution") is None
+    assert cache.stats() == {"hits": 3, "misses": 2}
+
+
+def test_client_serves_identical_requests_from_cache(tmp_path, monkeypatch):
+    config = tmp_path / "config.yaml"
+    config.write_text(
+        "openai:\n"
+        "  api_key: test-key\n"
+        "  cache:\n"
+        "    enabled: true\n"
+        f"    path: {tmp_path / 'cache.db'}\n"
+        "    deterministic_only: true\n"
+        "    ttl:\n"
+        "      execution: 3600\n"
+    )
+    calls = []
+
+    class Choice:
+        message = ChatCompletionMessage.model_validate(
+            {
+                "role": "assistant",
+                "content": None,
+                "function_call": {"name": "apply_file_changes", "arguments": "{}"},
+            }
+        )
+
+    class Response:
+        choices = [Choice()]
+
+    def fake_create(request_args):
+        calls.append(request_args)
+        return Response()
+
+    client = OpenAIClient(config_path=str(config))
+    monkeypatch.setattr(client, "_create", fake_create)
+    messages = [{"role": "user", "content": "do it"}]
+    functions = [{"name": "apply_file_changes", "parameters": {}}]
+
+    first = client.chat(messages, functions=functions, stage="execution", temperature=0)
+    second = client.chat(
+        messages, functions=functions, stage="execution", temperature=0
+    )
+    assert len(calls) == 1
+    assert second.function_call.arguments == first.function_call.arguments
+
+    # Non-deterministic requests and uncached stages always go to the API
+    client.chat(messages, functions=functions, stage="execution", temperature=0.7)
+    client.chat(messages, functions=functions, stage="planning", temperature=0)
+    assert len(calls) == 3
+    assert client.cache_stats() == {"hits": 1, "misses": 1}
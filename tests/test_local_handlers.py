@@ -0,0 +1,129 @@
+import os
+import sys
+import subprocess
+
+import pytest
+
+# Ensure project root is on sys.path for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from selfgrow.code_executor import CodeExecutor
+from selfgrow.local_handlers import (
+    LOCAL_HANDLERS,
+    LocalDispatcher,
+    LocalResult,
+    register,
+)
+
+
+class NoLLMClient:
+    def chat(self, *args, **kwargs):
+        raise AssertionError("local tasks must not call the LLM")
+
+
+def test_dispatcher_routes_to_handler_with_its_groups():
+    handler, groups = LocalDispatcher.match("Create file a/b.txt with content 'hi'")
+    assert handler.name == "create_file" and groups == ("a/b.txt", "hi")
+    handler, groups = LocalDispatcher.match("FORMAT CODE")
+    assert handler.name == "format_code" and groups == ()
+    handler, groups = LocalDispatcher.match("remove file old.py")
+    assert handler.name == "delete_file" and groups == ("old.py",)
+    assert LocalDispatcher.match("format code and add tests") is None
+
+
+def test_registered_handler_joins_the_dispatcher():
+    @register("touch", r"^touch (\w+)$")
+    def touch(executor, name):
+        return LocalResult(f"touched {name}")
+
+    try:
+        handler, groups = LocalDispatcher.match("touch marker")
+        assert handler.func is touch and groups == ("marker",)
+    finally:
+        LOCAL_HANDLERS.pop()
+        LocalDispatcher.reset()
+    assert LocalDispatcher.match("touch marker") is None
+
+
+class RecordingRunner:
+    """Test runner stand-in recording whether a path existed at each run."""
+
+    def __init__(self, path, returncode=0):
+        self.path = path
+        self.returncode = returncode
+        self.seen = []
+
+    def run(self, args, cwd):
+        self.seen.append(os.path.exists(os.path.join(cwd, self.path)))
+        return subprocess.CompletedProcess(args, self.returncode, "", "")
+
+
+def test_local_tasks_share_commit_pipeline_and_are_counted(tmp_path, git, make_repo):
+    make_repo(tmp_path)
+    runner = RecordingRunner("old.txt")
+    executor = CodeExecutor(
+        openai_client=NoLLMClient(),
+        work_directory=str(tmp_path),
+        test_runner=runner,
+    )
+    assert executor.execute("create file old.txt with content 'x'").startswith(
+        "Created file old.txt"
+    )
+    assert executor.execute("delete file old.txt").startswith("Deleted file old.txt")
+    # Both changes were tested in the staging mirror before they were applied
+    assert runner.seen == [True, False]
+    assert not (tmp_path / "old.txt").exists()
+    assert git(tmp_path, "log", "--format=%s").split("\n")[:2] == [
+        "Delete old.txt",
+        "Create old.txt (fallback)",
+    ]
+    assert git(tmp_path, "status", "--porcelain") == ""
+    assert executor.local_stats == {"handled": 2}
+
+
+def test_deletion_failing_tests_is_not_applied(tmp_path, git, make_repo):
+    make_repo(tmp_path, {"keep.txt": "x\n"})
+    executor = CodeExecutor(
+        openai_client=NoLLMClient(),
+        work_directory=str(tmp_path),
+        test_runner=RecordingRunner("keep.txt", returncode=1),
+    )
+    with pytest.raises(RuntimeError, match="Tests failed"):
+        executor.execute("delete file keep.txt")
+    assert (tmp_path / "keep.txt").exists()
+    assert git(tmp_path, "log", "--format=%s").split("\n")[0] == "base"
+
+
+def test_created_file_failing_tests_is_not_written(tmp_path, git, make_repo):
+    make_repo(tmp_path, {"keep.txt": "x\n"})
+    (tmp_path / "unrelated.txt").write_text("dirty\n")
+    executor = CodeExecutor(
+        openai_client=NoLLMClient(),
+        work_directory=str(tmp_path),
+        test_runner=RecordingRunner("new.txt", returncode=1),
+    )
+    with pytest.raises(RuntimeError, match="Tests failed"):
+        executor.execute("create file new.txt with content 'x'")
+    assert not (tmp_path / "new.txt").exists()
+    executor.test_runner.returncode = 0
+    executor.execute("create file new.txt with content 'x'")
+    # Only the created file is committed; other dirty files stay untouched
+    assert git(tmp_path, "show", "--name-only", "--format=") == "new.txt"
+    assert git(tmp_path, "status", "--porcelain") == "?? unrelated.txt"
+
+
+def test_protected_files_are_not_deleted(tmp_path, git, make_repo):
+    make_repo(tmp_path, {"README.md": "# Journal\n", "config.yaml": "x: 1\n"})
+    executor = CodeExecutor(
+        openai_client=NoLLMClient(),
+        work_directory=str(tmp_path),
+        test_runner=RecordingRunner("README.md"),
+    )
+    for path in ("README.md", "./config.yaml", ".git/HEAD"):
+        result = executor.execute(f"delete file {path}")
+        assert result.startswith(f"Refusing to delete protected file {path}")
+    assert (tmp_path / "README.md").exists()
+    assert (tmp_path / "config.yaml").exists()
+    assert (tmp_path / ".git" / "HEAD").exists()
+    assert executor.test_runner.seen == []
+    assert git(tmp_path, "log", "--format=%s") == "base"
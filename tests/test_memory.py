@@ -0,0 +1,324 @@
+import os
+import sys
+import sqlite3
+import threading
+
+# Ensure project root is on sys.path for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import pytest
+
+from selfgrow import memory as memory_module
+from selfgrow.memory import Memory, SCHEMA_VERSION
+
+
+def test_claim_next_task_marks_running(tmp_path):
+    memory = Memory(str(tmp_path / "memory.db"))
+    memory.add_task("first")
+    memory.add_task("second")
+
+    claimed = memory.claim_next_task()
+    assert claimed[1] == "first"
+    statuses = {row[1]: row[2] for row in memory.get_all_tasks()}
+    assert statuses == {"first": "running", "second": "pending"}
+
+    assert memory.claim_next_task()[1] == "second"
+    assert memory.claim_next_task() is None
+    assert not memory.has_pending_tasks()
+
+    assert memory.requeue_running_tasks() == 2
+    assert memory.has_pending_tasks()
+
+
+def create_legacy_database(db_path):
+    conn = sqlite3.connect(db_path)
+    conn.execute(
+        "CREATE TABLE tasks (id INTEGER PRIMARY KEY AUTOINCREMENT, "
+        "description TEXT NOT NULL, status TEXT NOT NULL, result TEXT, "
+        "created_at TEXT NOT NULL)"
+    )
+    conn.execute(
+        "INSERT INTO tasks (description, status, created_at) "
+        "VALUES ('old task', 'pending', '2025-04-19T10:00:00')"
+    )
+    conn.execute(
+        "INSERT INTO tasks (description, status, result, created_at) "
+        "VALUES ('format code', 'done', 'Code formatted', '2025-04-19T10:00:00')"
+    )
+    conn.commit()
+    conn.close()
+
+
+def test_legacy_database_is_migrated(tmp_path):
+    db_path = str(tmp_path / "legacy.db")
+    create_legacy_database(db_path)
+
+    memory = Memory(db_path)
+    version = memory.conn.execute("PRAGMA user_version").fetchone()[0]
+    assert version == SCHEMA_VERSION
+    indexes = [row[1] for row in memory.conn.execute("PRAGMA index_list('tasks')")]
+    assert "idx_tasks_status_id" in indexes
+    assert memory.claim_next_task()[1] == "old task"
+    # Existing descriptions are indexed for deduplication
+    assert not memory.add_task("Format code")
+    # Inline results are moved to compressed blobs
+    assert memory.conn.execute("SELECT result FROM tasks WHERE id = 2").fetchone() == (
+        None,
+    )
+    assert memory.get_task_result(2) == "Code formatted"
+
+
+def test_failed_migration_is_rolled_back(tmp_path, monkeypatch):
+    db_path = str(tmp_path / "legacy.db")
+    create_legacy_database(db_path)
+    calls = []
+
+    def fail_once(conn):
+        calls.append(1)
+        if len(calls) == 1:
+            raise sqlite3.OperationalError("simulated failure")
+
+    migrations = list(memory_module.MIGRATIONS)
+    migrations[3] = [*migrations[3], fail_once]
+    monkeypatch.setattr(memory_module, "MIGRATIONS", migrations)
+
+    with pytest.raises(sqlite3.OperationalError):
+        Memory(db_path)
+    conn = sqlite3.connect(db_path)
+    assert conn.execute("PRAGMA user_version").fetchone()[0] == 3
+    # The blob table created by the failed step was rolled back
+    tables = [r[0] for r in conn.execute("SELECT name FROM sqlite_master")]
+    assert "result_blobs" not in tables
+    conn.close()
+
+    memory = Memory(db_path)
+    version = memory.conn.execute("PRAGMA user_version").fetchone()[0]
+    assert version == SCHEMA_VERSION
+    assert memory.get_task_result(2) == "Code formatted"
+
+
+def test_wal_and_per_thread_connections(tmp_path):
+    db_path = str(tmp_path / "memory.db")
+    memory = Memory(db_path)
+    other = Memory(db_path)
+    assert memory.conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    # Instances on the same file serialize writes through one lock
+    assert memory._write_lock is other._write_lock
+
+    seen = {}
+
+    def worker():
+        seen["conn"] = memory.conn
+        memory.add_task("from thread")
+
+    thread = threading.Thread(target=worker)
+    thread.start()
+    thread.join()
+    assert seen["conn"] is not memory.conn
+    assert [row[1] for row in other.get_all_tasks()] == ["from thread"]
+    memory.close()
+    other.close()
+
+
+def test_in_memory_database_is_shared_across_threads():
+    memory = Memory(":memory:")
+    thread = threading.Thread(target=memory.add_task, args=("shared",))
+    thread.start()
+    thread.join()
+    assert memory.claim_next_task()[1] == "shared"
+
+
+def test_add_tasks_single_transaction(tmp_path):
+    memory = Memory(str(tmp_path / "memory.db"))
+    assert memory.add_tasks(iter(["a", "b", "c"])) == 3
+    assert memory.add_tasks([]) == 0
+    rows = memory.get_all_tasks()
+    assert [row[1] for row in rows] == ["a", "b", "c"]
+    # One batch, one timestamp
+    assert len({row[4] for row in rows}) == 1
+
+
+def test_near_duplicate_tasks_are_dropped(tmp_path):
+    memory = Memory(str(tmp_path / "memory.db"))
+    memory.add_task("Implement unit tests for the existing codebase")
+    task_id, _ = memory.claim_next_task()
+    memory.update_task(task_id, "error", "failed")
+
+    inserted = memory.add_tasks(
+        [
+            "Implement unit tests for the existing codebase.",
+            "Refactor algorithm selection process for efficiency.",
+            "refactor algorithm selection process, for efficiency",
+            "Add a --version flag to the CLI",
+        ]
+    )
+    assert inserted == 2
+    assert memory.duplicates_skipped == 2
+    assert not memory.add_task("implement UNIT tests for the existing codebase!")
+
+    # The LSH index survives reopening the database
+    reopened = Memory(str(tmp_path / "memory.db"))
+    assert not reopened.add_task("Add a --version flag to the CLI")
+
+
+def test_distinct_templated_tasks_are_kept(tmp_path):
+    content = "a long paragraph of shared placeholder text " * 4
+    memory = Memory(str(tmp_path / "memory.db"))
+    # Short templates fall below the default threshold
+    assert (
+        memory.add_tasks(
+            [
+                "create file a.txt with content 'hello'",
+                "create file b.txt with content 'hello'",
+            ]
+        )
+        == 2
+    )
+    # Long shared content needs templated descriptions exempted
+    templated = [f"create file {name} with content '{content}'" for name in "cd"]
+    assert memory.add_tasks(templated) == 1
+    exempting = Memory(
+        str(tmp_path / "exempt.db"),
+        dedup_exempt=lambda description: description.startswith("create file"),
+    )
+    assert exempting.add_tasks(templated + templated[:1]) == 2
+    assert exempting.duplicates_skipped == 1
+
+
+def test_dedup_can_be_disabled(tmp_path):
+    memory = Memory(str(tmp_path / "memory.db"), dedup_threshold=None)
+    assert memory.add_tasks(["Format code", "Format code"]) == 2
+
+
+def test_iter_tasks_keyset_pagination(tmp_path):
+    memory = Memory(str(tmp_path / "memory.db"), dedup_threshold=None)
+    memory.add_tasks([f"task {i}" for i in range(10)])
+    memory.update_task(3, "done", "output")
+
+    rows = list(memory.iter_tasks(page_size=3))
+    assert [row[0] for row in rows] == list(range(1, 11))
+    assert all(len(row) == 4 for row in rows)
+
+    page = list(memory.iter_tasks(after_id=4, limit=4, page_size=3))
+    assert [row[0] for row in page] == [5, 6, 7, 8]
+
+    done = list(memory.iter_tasks(status="done", with_result=True))
+    assert done == [(3, "task 2", "done", "output", done[0][4])]
+
+
+def test_results_are_compressed_and_deduplicated(tmp_path):
+    memory = Memory(str(tmp_path / "memory.db"), dedup_threshold=None)
+    memory.add_tasks(["one", "two", "three"])
+    failure = "Tests failed:\n" + "E   AssertionError\n" * 500
+    memory.update_task(1, "error", failure)
+    memory.update_task(2, "error", failure)
+    memory.update_task(3, "done")
+
+    blobs = memory.conn.execute(
+        "SELECT size, length(data) FROM result_blobs"
+    ).fetchall()
+    assert len(blobs) == 1
+    size, stored = blobs[0]
+    assert size == len(failure) and stored < size // 10
+
+    assert memory.get_task_result(2) == failure
+    assert memory.get_task_result(3) is None
+    assert [row[3] for row in memory.get_all_tasks()] == [failure, failure, None]
+
+
+def test_legacy_results_are_moved_in_pages(tmp_path, monkeypatch):
+    db_path = str(tmp_path / "legacy.db")
+    create_legacy_database(db_path)
+    conn = sqlite3.connect(db_path)
+    for i in range(5):
+        conn.execute(
+            "INSERT INTO tasks (description, status, result, created_at) "
+            f"VALUES ('task {i}', 'done', 'result {i}', '2025-04-19T10:00:00')"
+        )
+    conn.commit()
+    conn.close()
+    monkeypatch.setattr(memory_module, "DEFAULT_PAGE_SIZE", 2)
+
+    memory = Memory(db_path, dedup_threshold=None)
+    assert memory.conn.execute(
+        "SELECT COUNT(*) FROM tasks WHERE result IS NOT NULL"
+    ).fetchone() == (0,)
+    assert [memory.get_task_result(i) for i in range(3, 8)] == [
+        f"result {i}" for i in range(5)
+    ]
+
+
+def test_unreferenced_result_blobs_are_pruned(tmp_path):
+    memory = Memory(str(tmp_path / "memory.db"), dedup_threshold=None)
+    memory.add_tasks(["one", "two"])
+    memory.update_task(1, "error", "first attempt failed")
+    memory.update_task(2, "done", "shared")
+    memory.update_task(1, "done", "shared")
+    assert memory.prune_result_blobs() == 1
+    assert memory.prune_result_blobs() == 0
+    assert memory.get_task_result(1) == "shared"
+
+
+def test_claim_order_follows_priority_cost_and_age():
+    memory = Memory(":memory:", aging_seconds=300)
+    memory.add_tasks(
+        [
+            {"description": "speculative refactor", "priority": -1, "cost": 5},
+            "plain task",
+            {"description": "urgent quick fix", "priority": 2},
+        ]
+    )
+    order = [memory.claim_next_task()[1] for _ in range(3)]
+    assert order == ["urgent quick fix", "plain task", "speculative refactor"]
+
+
+def test_old_low_priority_task_ages_past_new_ones():
+    memory = Memory(":memory:", aging_seconds=60)
+    memory.add_task("old chore", priority=-1)
+    # Backdate the chore by ten minutes: worth ten priority levels
+    memory.conn.execute("UPDATE tasks SET sched_key = sched_key - 600")
+    memory.conn.commit()
+    memory.add_task("new feature", priority=5)
+    assert memory.claim_next_task()[1] == "old chore"
+
+
+def test_dependencies_gate_claims_and_cascade_failures():
+    memory = Memory(":memory:")
+    memory.add_tasks(
+        [
+            "build parser",
+            {"description": "parser tests", "depends_on": [0], "priority": 9},
+            {"description": "parser docs", "depends_on": [1]},
+            "unrelated",
+        ]
+    )
+    parser_id, _ = memory.claim_next_task()
+    # The high-priority tests wait for the parser
+    unrelated_id, desc = memory.claim_next_task()
+    assert desc == "unrelated"
+    assert memory.claim_next_task() is None
+    assert memory.has_pending_tasks()
+
+    memory.update_task(parser_id, "done", "ok")
+    tests_id, desc = memory.claim_next_task()
+    assert desc == "parser tests"
+    memory.update_task(tests_id, "error", "boom")
+    # Its dependent fails with it instead of running against broken code
+    statuses = {row[1]: (row[2], row[3]) for row in memory.get_all_tasks()}
+    assert statuses["parser docs"] == (
+        "error",
+        f"Skipped: prerequisite task {tests_id} failed",
+    )
+    assert not memory.has_pending_tasks()
+
+
+def test_ready_queue_uses_partial_index():
+    memory = Memory(":memory:")
+    plan = memory.conn.execute(
+        "EXPLAIN QUERY PLAN SELECT id FROM tasks INDEXED BY idx_tasks_ready "
+        "WHERE status = 'pending' AND unmet_deps = 0 ORDER BY sched_key, id LIMIT 1"
+    ).fetchall()
+    details = " ".join(row[-1] for row in plan)
+    # The claim reads the first index entry; no sort of the pending tasks
+    assert "idx_tasks_ready" in details
+    assert "TEMP B-TREE" not in details
@@ -0,0 +1,154 @@
+import os
+import sys
+import asyncio
+
+# Ensure project root is on sys.path for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import openai
+import pytest
+from openai.types.chat import ChatCompletionMessage
+
+from selfgrow.openai_client import OpenAIClient
+from selfgrow.usage import BudgetExceeded
+
+
+def make_client(tmp_path, extra: str = "") -> OpenAIClient:
+    config = tmp_path / "config.yaml"
+    config.write_text("openai:\n  api_key: test-key\n" + extra)
+    return OpenAIClient(config_path=str(config))
+
+
+def make_response(content: str):
+    class Choice:
+        message = ChatCompletionMessage(role="assistant", content=content)
+
+    class Response:
+        choices = [Choice()]
+
+    return Response()
+
+
+def test_chat_many_limits_concurrency_and_keeps_order(tmp_path, monkeypatch):
+    state = {"active": 0, "peak": 0, "clients": 0}
+
+    class FakeRawResponse:
+        headers = {}
+
+        def __init__(self, response):
+            self.response = response
+
+        def parse(self):
+            return self.response
+
+    class FakeCompletions:
+        @property
+        def with_raw_response(self):
+            return self
+
+        async def create(self, **kwargs):
+            state["active"] += 1
+            state["peak"] = max(state["peak"], state["active"])
+            index = int(kwargs["messages"][0]["content"])
+            # Later requests finish first
+            await asyncio.sleep(0.01 * (10 - index))
+            state["active"] -= 1
+            return FakeRawResponse(make_response(f"reply {index}"))
+
+    class FakeAsyncOpenAI:
+        def __init__(self, api_key=None, **kwargs):
+            state["clients"] += 1
+            self.chat = type("Chat", (), {"completions": FakeCompletions()})()
+
+        async def close(self):
+            pass
+
+    monkeypatch.setattr(openai, "AsyncOpenAI", FakeAsyncOpenAI)
+    client = make_client(tmp_path, "  max_concurrency: 3\n")
+    requests = [
+        {"messages": [{"role": "user", "content": str(i)}], "stage": "planning"}
+        for i in range(8)
+    ]
+    assert client.chat_many(requests) == [f"reply {i}" for i in range(8)]
+    assert state["peak"] == 3
+    assert client.chat_many(requests[:2], max_concurrency=1) == ["reply 0", "reply 1"]
+    # One pooled async client serves every batch
+    assert state["clients"] == 1
+    client.close()
+
+
+def test_async_client_of_a_previous_loop_is_closed(tmp_path, monkeypatch):
+    clients = []
+
+    class FakeAsyncOpenAI:
+        def __init__(self, **kwargs):
+            self.closed = False
+            clients.append(self)
+
+        async def close(self):
+            self.closed = True
+
+    monkeypatch.setattr(openai, "AsyncOpenAI", FakeAsyncOpenAI)
+    client = make_client(tmp_path)
+    first = asyncio.run(client._get_async_client())
+    second = asyncio.run(client._get_async_client())
+    assert clients == [first, second]
+    assert first.closed and not second.closed
+
+
+def test_chat_many_attributes_usage_to_the_calling_task(tmp_path, monkeypatch):
+    class Usage:
+        prompt_tokens = 4
+        completion_tokens = 1
+
+    async def fake_acreate(self, request_args):
+        response = make_response("hi")
+        response.usage = Usage()
+        return response
+
+    class Recorder:
+        def __init__(self):
+            self.task_ids = []
+
+        def record_usage(self, task_id, *args):
+            self.task_ids.append(task_id)
+
+    monkeypatch.setattr(OpenAIClient, "_acreate", fake_acreate)
+    client = make_client(tmp_path)
+    client.usage.memory = Recorder()
+    requests = [
+        {"messages": [{"role": "user", "content": str(i)}], "stage": "execution"}
+        for i in range(3)
+    ]
+    with client.usage.task(7):
+        client.chat_many(requests)
+    client.chat_many(requests[:1])
+    assert client.usage.memory.task_ids == [7, 7, 7, None]
+    client.close()
+
+
+def test_chat_records_usage_and_enforces_hard_budget(tmp_path, monkeypatch):
+    class Usage:
+        prompt_tokens = 12
+        completion_tokens = 3
+
+    def fake_create(self, request_args):
+        response = make_response("hi")
+        response.usage = Usage()
+        return response
+
+    monkeypatch.setattr(OpenAIClient, "_create", fake_create)
+    client = make_client(
+        tmp_path, "budgets:\n  limits:\n    planning:\n      hard_tokens: 20\n"
+    )
+    assert client.chat([{"role": "user", "content": "x"}], stage="planning") == "hi"
+    totals = client.usage.totals("planning")
+    assert (totals["calls"], totals["prompt_tokens"]) == (1, 12)
+
+    client.chat([{"role": "user", "content": "y"}], stage="planning")
+    with pytest.raises(BudgetExceeded):
+        client.chat([{"role": "user", "content": "z"}], stage="planning")
+    # Without reported usage, tokens are estimated locally
+    monkeypatch.setattr(OpenAIClient, "_create", lambda self, args: make_response("ok"))
+    client.chat([{"role": "user", "content": "w"}], stage="execution")
+    assert client.usage.totals("execution")["completion_tokens"] == 1
@@ -0,0 +1,155 @@
+import os
+import sys
+import subprocess
+import threading
+import time
+
+import pytest
+
+# Ensure project root is on sys.path for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from selfgrow.code_executor import CodeExecutor, GeneratedChanges, StaleSpeculation
+from selfgrow.memory import Memory
+from selfgrow.pipeline import TaskPipeline
+from selfgrow.task_manager import TaskManager
+
+from conftest import DummyClient
+
+
+class PassingRunner:
+    """Test runner stand-in whose every run passes."""
+
+    def run(self, args, cwd):
+        return subprocess.CompletedProcess(args, 0, "", "")
+
+
+@pytest.fixture
+def repo(tmp_path, make_repo):
+    return make_repo(tmp_path / "repo", {"a.py": "X = 1\nY = 1\n"})
+
+
+def make_executor(repo, changes):
+    return CodeExecutor(
+        openai_client=DummyClient(changes),
+        work_directory=str(repo),
+        test_runner=PassingRunner(),
+    )
+
+
+def commit_edit(git, repo, content):
+    (repo / "a.py").write_text(content)
+    git(repo, "commit", "-q", "-am", "meanwhile")
+
+
+def test_generated_edits_are_rebased_onto_new_head(repo, git):
+    edits = [{"search": "Y = 1", "replace": "Y = 2"}]
+    executor = make_executor(repo, [{"path": "a.py", "edits": edits}])
+    generated = executor.generate("bump Y")
+    commit_edit(git, repo, "X = 5\nY = 1\n")
+    executor.execute("bump Y", generated)
+    assert (repo / "a.py").read_text() == "X = 5\nY = 2\n"
+    assert git(repo, "log", "-1", "--format=%s") == "AI: bump Y"
+
+
+def test_generated_rewrite_of_changed_file_is_stale(repo, git):
+    change = {"path": "a.py", "content": "X = 1\nY = 2\n"}
+    executor = make_executor(repo, [change])
+    generated = executor.generate("bump Y")
+    commit_edit(git, repo, "X = 5\nY = 1\n")
+    with pytest.raises(StaleSpeculation):
+        executor.execute("bump Y", generated)
+    assert (repo / "a.py").read_text() == "X = 5\nY = 1\n"
+    assert git(repo, "log", "-1", "--format=%s") == "meanwhile"
+
+
+class FakeGit:
+    def __init__(self):
+        self.head = "base"
+
+    def rev_parse(self, rev):
+        return self.head
+
+
+class FakeExecutor:
+    """Executor stand-in recording calls; each execution moves HEAD."""
+
+    def __init__(self, stale=()):
+        self.git = FakeGit()
+        self.stale = set(stale)
+        self.executed = []
+
+    def can_generate(self, description):
+        return not description.startswith("format")
+
+    def generate(self, description):
+        return GeneratedChanges(description, [], self.git.head)
+
+    def execute(self, description, generated=None):
+        if generated is not None and description in self.stale:
+            raise StaleSpeculation(description)
+        self.executed.append((description, generated is not None))
+        self.git.head = f"after {description}"
+        return f"done {description}"
+
+
+def make_manager(*descriptions):
+    memory = Memory(":memory:")
+    memory.add_tasks(descriptions)
+    return TaskManager(memory, None, {}, git_backend=object())
+
+
+def test_pipeline_speculates_next_task_and_rebases_or_regenerates():
+    executor = FakeExecutor(stale={"c"})
+    pipeline = TaskPipeline(executor)
+    manager = make_manager("a", "b", "c")
+    outcomes = list(pipeline.run(manager, 10))
+    assert [o.get() for o in outcomes] == ["done a", "done b", "done c"]
+    # b used its speculative changes; c's were stale and regenerated
+    assert executor.executed == [("a", False), ("b", True), ("c", False)]
+    assert pipeline.exhausted
+    stats = pipeline.stats
+    assert (stats["speculated"], stats["rebased"], stats["discarded"]) == (2, 1, 1)
+    assert stats["overlap_ms"] <= stats["generate_ms"]
+
+
+def test_pipeline_claims_no_more_than_max_tasks_and_skips_local_tasks():
+    executor = FakeExecutor()
+    pipeline = TaskPipeline(executor)
+    manager = make_manager("a", "format code", "c")
+    outcomes = list(pipeline.run(manager, 2))
+    assert [o.description for o in outcomes] == ["a", "format code"]
+    assert executor.executed == [("a", False), ("format code", False)]
+    assert pipeline.stats["speculated"] == 0
+    assert not pipeline.exhausted
+    pending = [row[1] for row in manager.memory.get_all_tasks() if row[2] == "pending"]
+    assert pending == ["c"]
+
+
+class BlockingExecutor(FakeExecutor):
+    """FakeExecutor whose generation blocks until released."""
+
+    def __init__(self):
+        super().__init__()
+        self.release = threading.Event()
+
+    def generate(self, description):
+        self.release.wait(timeout=5)
+        return super().generate(description)
+
+
+def test_stopping_early_requeues_speculated_task_without_waiting():
+    executor = BlockingExecutor()
+    pipeline = TaskPipeline(executor)
+    manager = make_manager("a", "b", "c")
+    outcomes = pipeline.run(manager, 10)
+    assert next(outcomes).get() == "done a"
+    start = time.monotonic()
+    outcomes.close()
+    # The speculative generation of b is not waited for
+    assert time.monotonic() - start < 1
+    executor.release.set()
+    statuses = [row[2] for row in manager.memory.get_all_tasks()]
+    # a's outcome is recorded by the caller; b goes back to pending
+    assert statuses == ["running", "pending", "pending"]
+    assert executor.executed == [("a", False)]
@@ -0,0 +1,57 @@
+import os
+import sys
+
+# Ensure project root is on sys.path for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import selfgrow.project_index as project_index_module
+from selfgrow.project_index import ProjectIndex
+
+
+def test_index_respects_gitignore_and_lists_symbols(tmp_path, make_repo):
+    make_repo(tmp_path)
+    (tmp_path / ".gitignore").write_text("*.db\n__pycache__/\n.selfgrow_index.json\n")
+    (tmp_path / "app.py").write_text("class App:\n    pass\n\ndef main():\n    pass\n")
+    (tmp_path / "data.db").write_text("x" * 100)
+    (tmp_path / "__pycache__").mkdir()
+    (tmp_path / "__pycache__" / "app.pyc").write_text("x")
+    index = ProjectIndex(str(tmp_path))
+    summary = index.summary()
+    assert "app.py (42 B): App, main" in summary
+    assert "data.db" not in summary and "__pycache__" not in summary
+    assert ".gitignore" in summary
+
+
+def test_update_reparses_only_changed_files(tmp_path, monkeypatch):
+    for name in ("a.py", "b.py"):
+        (tmp_path / name).write_text("def f():\n    pass\n")
+    index = ProjectIndex(str(tmp_path))
+    index.refresh()
+
+    parsed = []
+    original = project_index_module._top_level_symbols
+    monkeypatch.setattr(
+        project_index_module,
+        "_top_level_symbols",
+        lambda path: parsed.append(os.path.basename(path)) or original(path),
+    )
+    (tmp_path / "b.py").write_text("def g():\n    pass\n")
+    (tmp_path / "c.py").write_text("class C:\n    pass\n")
+    index.update(["b.py", "c.py"])
+    assert parsed == ["b.py", "c.py"]
+    assert index.files["b.py"]["symbols"] == ["g"]
+
+    # A fresh index reloads the cache and re-parses nothing
+    parsed.clear()
+    ProjectIndex(str(tmp_path)).refresh()
+    assert parsed == []
+
+
+def test_summary_stays_within_token_budget(tmp_path):
+    for i in range(200):
+        (tmp_path / f"module_{i:03d}.py").write_text(f"def function_{i}():\n    pass\n")
+    index = ProjectIndex(str(tmp_path))
+    summary = index.summary(max_tokens=200)
+    assert len(summary) <= 200 * 4
+    assert summary.splitlines()[0] == "module_000.py (27 B): function_0"
+    assert summary.endswith("more files")
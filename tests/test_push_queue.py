@@ -0,0 +1,78 @@
+import os
+import sys
+import time
+
+import pytest
+
+# Ensure project root is on sys.path for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from selfgrow.git_backend import GitBackend
+from selfgrow.push_queue import PushQueue
+
+
+@pytest.fixture
+def repos(tmp_path, git, make_repo):
+    """(remote, work): a work repository whose origin is an empty bare one."""
+    remote = tmp_path / "remote.git"
+    git(tmp_path, "init", "-q", "--bare", str(remote))
+    work = make_repo(tmp_path / "work")
+    git(work, "remote", "add", "origin", str(remote))
+    return remote, work
+
+
+@pytest.fixture
+def commit(git):
+    """commit(work, n): commit f.txt holding n."""
+
+    def make_commit(work, n):
+        (work / "f.txt").write_text(f"{n}\n")
+        git(work, "add", "f.txt")
+        git(work, "commit", "-q", "-m", f"c{n}")
+
+    return make_commit
+
+
+def test_commits_within_window_are_pushed_once(repos, git, commit):
+    remote, work = repos
+    queue = PushQueue(GitBackend(str(work)), "origin", "main", window=30)
+    start = time.monotonic()
+    for n in range(3):
+        commit(work, n)
+        queue.request()
+    # request() never waits for the network
+    assert time.monotonic() - start < 5
+    assert queue.backlog == 3
+    assert queue.flush()
+    assert git(remote, "rev-parse", "main") == git(work, "rev-parse", "HEAD")
+    assert queue.stats == {"requests": 3, "pushes": 1, "failures": 0}
+    queue.close()
+
+
+def test_close_flushes_and_backlog_is_bounded(repos, git, commit):
+    remote, work = repos
+    queue = PushQueue(GitBackend(str(work)), "origin", "main", window=60, max_backlog=2)
+    commit(work, 1)
+    queue.request()
+    commit(work, 2)
+    # Reaching the bound pushes right away instead of waiting out the window
+    queue.request()
+    assert queue.backlog == 0
+    assert git(remote, "rev-parse", "main") == git(work, "rev-parse", "HEAD")
+
+    commit(work, 3)
+    queue.request()
+    queue.close()
+    assert git(remote, "rev-parse", "main") == git(work, "rev-parse", "HEAD")
+    assert queue.stats["pushes"] == 2
+
+
+def test_failed_pushes_stay_in_backlog(tmp_path, repos, git, commit):
+    _, work = repos
+    git(work, "remote", "set-url", "origin", str(tmp_path / "missing.git"))
+    queue = PushQueue(GitBackend(str(work)), "origin", "main", window=0.05)
+    commit(work, 1)
+    queue.request()
+    assert not queue.flush()
+    assert queue.backlog == 1 and queue.stats["failures"] >= 1
+    queue.close()
@@ -0,0 +1,43 @@
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+# Ensure project root is on sys.path for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from selfgrow.pytest_daemon import WarmPytestRunner
+
+pytestmark = pytest.mark.skipif(not hasattr(os, "fork"), reason="requires fork()")
+
+
+def test_warm_runs_see_freshly_written_modules(tmp_path):
+    (tmp_path / "selfgrow").mkdir()
+    (tmp_path / "tests").mkdir()
+    (tmp_path / "selfgrow" / "__init__.py").write_text("VALUE = 1\n")
+    (tmp_path / "tests" / "test_value.py").write_text(
+        "import selfgrow\n\ndef test_value():\n    assert selfgrow.VALUE == 1\n"
+    )
+    runner = WarmPytestRunner()
+    try:
+        passed = runner.run(["-q", "tests"], str(tmp_path))
+        assert passed.returncode == 0, passed.stdout
+        assert "1 passed" in passed.stdout
+
+        (tmp_path / "selfgrow" / "__init__.py").write_text("VALUE = 2\n")
+        failed = runner.run(["-q", "tests"], str(tmp_path))
+        assert failed.returncode == 1
+        assert "assert 2 == 1" in failed.stdout
+
+        (tmp_path / "selfgrow" / "__init__.py").write_text("VALUE = 1\n")
+        with ThreadPoolExecutor(max_workers=3) as pool:
+            codes = list(
+                pool.map(
+                    lambda _: runner.run(["-q", "tests"], str(tmp_path)).returncode,
+                    range(3),
+                )
+            )
+        assert codes == [0, 0, 0]
+    finally:
+        runner.close()
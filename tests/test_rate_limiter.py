@@ -0,0 +1,131 @@
+import os
+import sys
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+# Ensure project root is on sys.path for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from selfgrow.openai_client import OpenAIClient
+from selfgrow.rate_limiter import RateLimiter, RetryPolicy, parse_duration
+
+COMPLETION = {
+    "id": "chatcmpl-test",
+    "object": "chat.completion",
+    "created": 0,
+    "model": "gpt-4",
+    "choices": [
+        {
+            "index": 0,
+            "message": {"role": "assistant", "content": "hello"},
+            "finish_reason": "stop",
+        }
+    ],
+}
+
+
+@pytest.fixture
+def fake_server():
+    """Local HTTP server replaying a scripted list of (status, headers) replies."""
+    script = []
+    received = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length", 0))
+            received.append((time.monotonic(), json.loads(self.rfile.read(length))))
+            status, headers = script.pop(0) if script else (200, {})
+            body = json.dumps(
+                COMPLETION if status == 200 else {"error": {"message": "busy"}}
+            ).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            for name, value in headers.items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}/v1", script, received
+    server.shutdown()
+    server.server_close()
+
+
+def make_client(tmp_path, base_url: str) -> OpenAIClient:
+    config = tmp_path / "config.yaml"
+    config.write_text(
+        "openai:\n"
+        "  api_key: test-key\n"
+        f"  base_url: {base_url}\n"
+        "  retry:\n"
+        "    max_attempts: 3\n"
+        "    base_delay: 0.01\n"
+        "    max_delay: 1\n"
+    )
+    return OpenAIClient(config_path=str(config))
+
+
+def test_retries_rate_limit_and_server_errors(tmp_path, fake_server):
+    base_url, script, received = fake_server
+    script.extend([(429, {"retry-after-ms": "150"}), (503, {}), (200, {})])
+    client = make_client(tmp_path, base_url)
+
+    reply = client.chat([{"role": "user", "content": "hi"}], stage="planning")
+    assert reply == "hello"
+    assert len(received) == 3
+    # The Retry-After hint was honoured before the second attempt
+    assert received[1][0] - received[0][0] >= 0.15
+
+
+def test_gives_up_after_max_attempts(tmp_path, fake_server):
+    base_url, script, received = fake_server
+    script.extend([(500, {})] * 5)
+    client = make_client(tmp_path, base_url)
+    with pytest.raises(Exception):
+        client.chat([{"role": "user", "content": "hi"}])
+    assert len(received) == 3
+
+
+def test_headers_pace_following_requests(tmp_path, fake_server):
+    base_url, script, received = fake_server
+    script.append(
+        (
+            200,
+            {
+                "x-ratelimit-limit-requests": "100",
+                "x-ratelimit-remaining-requests": "0",
+                "x-ratelimit-reset-requests": "200ms",
+            },
+        )
+    )
+    client = make_client(tmp_path, base_url)
+    client.chat([{"role": "user", "content": "one"}])
+    client.chat([{"role": "user", "content": "two"}])
+    assert received[1][0] - received[0][0] >= 0.2
+
+
+def test_token_bucket_limits_requests_and_tokens():
+    limiter = RateLimiter({"gpt-4": {"rpm": 60, "tpm": 600}}, headroom=1.0)
+    assert limiter.reserve("gpt-4", 100) == 0
+    # 500 tokens left; 600 more need 100 tokens of refill at 10 tokens/s
+    assert limiter.reserve("gpt-4", 600) == pytest.approx(10, abs=0.1)
+    assert limiter.reserve("unknown-model", 10**6) == 0
+
+
+def test_retry_policy_and_durations():
+    policy = RetryPolicy(base_delay=1.0, max_delay=8.0)
+    assert all(0 <= policy.delay(attempt) <= 8.0 for attempt in range(1, 10))
+    assert policy.delay(1, retry_after=2.0) >= 2.0
+    assert parse_duration("6m0s") == 360
+    assert parse_duration("250ms") == 0.25
+    assert parse_duration("soon") is None
@@ -0,0 +1,96 @@
+import os
+import sys
+import threading
+
+# Ensure project root is on sys.path for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from selfgrow.memory import Memory
+from selfgrow.refiner import BackgroundRefiner
+from selfgrow.task_manager import TaskManager
+
+
+class RecordingManager:
+    """Stand-in TaskManager that records each refine_batch call."""
+
+    def __init__(self, fail=False):
+        self.batches = []
+        self.fail = fail
+        self.called = threading.Event()
+
+    def refine_batch(self, completed):
+        self.batches.append(list(completed))
+        self.called.set()
+        if self.fail:
+            raise RuntimeError("boom")
+        return len(completed)
+
+
+def test_full_batch_is_refined_in_one_call():
+    manager = RecordingManager()
+    refiner = BackgroundRefiner(manager, batch_size=3, window=30.0)
+    for i in range(3):
+        refiner.submit(f"task {i}", "ok")
+    assert manager.called.wait(5)
+    refiner.close()
+    assert manager.batches == [
+        [("task 0", "ok", None), ("task 1", "ok", None), ("task 2", "ok", None)]
+    ]
+    assert refiner.stats == {"batches": 1, "tasks": 3, "errors": 0}
+
+
+def test_partial_batch_is_sent_after_window():
+    manager = RecordingManager()
+    refiner = BackgroundRefiner(manager, batch_size=5, window=0.05)
+    refiner.submit("only", "ok")
+    assert manager.called.wait(5)
+    refiner.close()
+    assert manager.batches == [[("only", "ok", None)]]
+
+
+def test_commit_range_is_passed_with_the_task():
+    manager = RecordingManager()
+    refiner = BackgroundRefiner(manager, batch_size=1, window=30.0)
+    refiner.submit("a", "ok", ("base", "head"))
+    refiner.close()
+    assert manager.batches == [[("a", "ok", ("base", "head"))]]
+
+
+def test_flush_waits_for_refinement():
+    manager = RecordingManager()
+    refiner = BackgroundRefiner(manager, batch_size=5, window=30.0)
+    assert refiner.flush() is False
+    refiner.submit("a", "ok")
+    refiner.submit("b", "ok")
+    assert refiner.flush() is True
+    assert manager.batches == [[("a", "ok", None), ("b", "ok", None)]]
+    assert not refiner.busy
+    refiner.close()
+
+
+def test_errors_are_counted_and_worker_survives():
+    manager = RecordingManager(fail=True)
+    refiner = BackgroundRefiner(manager, batch_size=1, window=30.0)
+    refiner.submit("a", "ok")
+    refiner.flush()
+    refiner.submit("b", "ok")
+    refiner.close()
+    assert len(manager.batches) == 2
+    assert refiner.stats["errors"] == 2
+
+
+def test_get_next_task_waits_for_refiner():
+    memory = Memory(":memory:")
+
+    class Manager:
+        def refine_batch(self, completed):
+            return memory.add_tasks([f"follow up {d}" for d, _, _ in completed])
+
+    task_manager = TaskManager(memory, None, {}, git_backend=object())
+    refiner = BackgroundRefiner(Manager(), batch_size=5, window=30.0)
+    task_manager.refiner = refiner
+    refiner.submit("a", "ok")
+    item = task_manager.get_next_task()
+    refiner.close()
+    assert item is not None and item[1] == "follow up a"
+    assert task_manager.get_next_task() is None
@@ -0,0 +1,61 @@
+import os
+import sys
+
+import pytest
+
+# Ensure project root is on sys.path for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from selfgrow.staging import StagingArea
+
+
+def test_reset_mirrors_tree_and_discards_staged_files(tmp_path):
+    (tmp_path / "pkg").mkdir()
+    (tmp_path / "pkg" / "a.py").write_text("A = 1\n")
+    (tmp_path / "b.txt").write_text("b")
+    stage = StagingArea(str(tmp_path))
+    try:
+        stage.reset()
+        mirror = stage.path
+        assert open(os.path.join(mirror, "pkg", "a.py")).read() == "A = 1\n"
+
+        stage.write("pkg/a.py", "A = 2\n")
+        stage.write("new.py", "N = 1\n")
+        assert stage.staged_files == ["pkg/a.py", "new.py"]
+        assert (tmp_path / "pkg" / "a.py").read_text() == "A = 1\n"
+
+        # Discarding restores the mirror from the tree and drops new files
+        os.remove(tmp_path / "b.txt")
+        stage.reset()
+        assert open(os.path.join(mirror, "pkg", "a.py")).read() == "A = 1\n"
+        assert not os.path.exists(os.path.join(mirror, "new.py"))
+        assert not os.path.exists(os.path.join(mirror, "b.txt"))
+
+        stage.write("pkg/a.py", "A = 3\n")
+        assert stage.apply() == ["pkg/a.py"]
+        assert (tmp_path / "pkg" / "a.py").read_text() == "A = 3\n"
+    finally:
+        stage.close()
+    assert not os.path.exists(mirror)
+
+
+def test_staged_deletion_is_applied_or_discarded(tmp_path):
+    (tmp_path / "a.py").write_text("A = 1\n")
+    stage = StagingArea(str(tmp_path))
+    try:
+        stage.reset()
+        stage.delete("a.py")
+        assert not os.path.exists(os.path.join(stage.path, "a.py"))
+        assert (tmp_path / "a.py").exists()
+        with pytest.raises(FileNotFoundError):
+            stage.read("a.py")
+
+        # Discarding restores the mirrored copy
+        stage.reset()
+        assert stage.read("a.py") == "A = 1\n"
+
+        stage.delete("a.py")
+        assert stage.apply() == ["a.py"]
+        assert not (tmp_path / "a.py").exists()
+    finally:
+        stage.close()
@@ -0,0 +1,39 @@
+import os
+import sys
+import json
+
+import pytest
+
+# Ensure project root is on sys.path for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from selfgrow.stream_parser import ChangeStreamParser
+
+
+def test_emits_each_change_once_complete():
+    document = json.dumps(
+        {
+            "note": "changes",
+            "changes": [
+                {"path": "a.py", "content": "d = {'k': [1]}\nprint(\"}\\\\\")\n"},
+                {"path": "b.txt", "content": "]]}}"},
+            ],
+            "other": [{"path": "ignored"}],
+        }
+    )
+    for size in (1, 5, len(document)):
+        parser = ChangeStreamParser()
+        emitted = []
+        for i in range(0, len(document), size):
+            emitted.extend(parser.feed(document[i : i + size]))
+        assert emitted == json.loads(document)["changes"]
+        assert parser.close()["other"] == [{"path": "ignored"}]
+
+
+def test_first_change_is_emitted_before_the_rest_arrives():
+    parser = ChangeStreamParser()
+    assert parser.feed('{"changes": [{"path": "a", "content": "x"}, {"pa') == [
+        {"path": "a", "content": "x"}
+    ]
+    with pytest.raises(json.JSONDecodeError):
+        parser.close()
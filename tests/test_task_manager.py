@@ -0,0 +1,133 @@
+import os
+import sys
+
+import pytest
+
+# Ensure project root is on sys.path for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from selfgrow.memory import Memory
+from selfgrow.task_manager import TaskManager
+
+from conftest import DummyClient, DummyMessage
+
+
+@pytest.fixture(autouse=True)
+def in_tmp_path(tmp_path, monkeypatch):
+    """Keep the project index and git lookups out of the real repository."""
+    monkeypatch.chdir(tmp_path)
+
+
+class RecordingMemory(Memory):
+    """Memory that records each batch passed to add_tasks."""
+
+    def __init__(self):
+        super().__init__(":memory:")
+        self.batches = []
+
+    def add_tasks(self, descriptions):
+        descriptions = list(descriptions)
+        self.batches.append(descriptions)
+        return super().add_tasks(descriptions)
+
+
+def test_refine_tasks_inserts_batch():
+    memory = RecordingMemory()
+    client = DummyClient(message=DummyMessage({"tasks": ["Add tests", "Add docs"]}))
+    manager = TaskManager(memory, client, {})
+    manager.refine_tasks("previous", "ok")
+    assert memory.batches == [["Add tests", "Add docs"]]
+    assert [row[1] for row in memory.get_all_tasks()] == ["Add tests", "Add docs"]
+
+
+def test_generate_initial_tasks_text_fallback_inserts_batch():
+    memory = RecordingMemory()
+    client = DummyClient(
+        message=DummyMessage(content="1. Add tests\n- **Add docs**\n\n")
+    )
+    manager = TaskManager(memory, client, {})
+    manager.generate_initial_tasks()
+    assert memory.batches == [["Add tests", "Add docs"]]
+
+
+def test_refine_batch_lists_every_completed_task():
+    memory = RecordingMemory()
+    prompts = []
+
+    class Client(DummyClient):
+        def chat(self, messages, functions=None, **kwargs):
+            prompts.append(messages[0]["content"])
+            return self.message
+
+    manager = TaskManager(memory, Client(message=DummyMessage({"tasks": ["Next"]})), {})
+    assert manager.refine_batch([("first", "ok"), ("second", "failed")]) == 1
+    assert "1. first" in prompts[0] and "2. second" in prompts[0]
+    assert manager.refine_batch([]) == 0
+
+
+def test_generated_task_objects_carry_scheduling_fields():
+    memory = RecordingMemory()
+    tasks = [
+        {"description": "Refactor", "priority": "-1", "cost": 5},
+        {"description": "Fix bug", "priority": 3, "depends_on": [0]},
+        {"priority": 1},
+        "Add docs",
+    ]
+    manager = TaskManager(
+        memory, DummyClient(message=DummyMessage({"tasks": tasks})), {}
+    )
+    manager.refine_tasks("previous", "ok")
+    assert memory.batches == [
+        [
+            {"description": "Refactor", "priority": -1, "cost": 5.0},
+            {"description": "Fix bug", "priority": 3, "depends_on": [0]},
+            "Add docs",
+        ]
+    ]
+    # Fix bug outranks Refactor but must wait for it
+    assert memory.claim_next_task()[1] == "Add docs"
+    assert memory.claim_next_task()[1] == "Refactor"
+    assert memory.claim_next_task() is None
+
+
+def test_dropped_tasks_do_not_shift_dependencies():
+    memory = RecordingMemory()
+    tasks = [
+        {"priority": 1},
+        {"description": "Write parser"},
+        {"description": "Test parser", "depends_on": [1]},
+        {"description": "Ship parser", "depends_on": [0, 2]},
+    ]
+    manager = TaskManager(
+        memory, DummyClient(message=DummyMessage({"tasks": tasks})), {}
+    )
+    manager.refine_tasks("previous", "ok")
+    assert memory.batches == [
+        [
+            {"description": "Write parser"},
+            {"description": "Test parser", "depends_on": [0]},
+            {"description": "Ship parser", "depends_on": [1]},
+        ]
+    ]
+    assert memory.claim_next_task()[1] == "Write parser"
+    assert memory.claim_next_task() is None
+
+
+def test_refine_batch_diffs_the_commits_of_its_tasks():
+    memory = RecordingMemory()
+    manager = TaskManager(
+        memory, DummyClient(message=DummyMessage({"tasks": ["Next"]})), {}
+    )
+    ranges = []
+
+    class Summarizer:
+        def summary(self, old, new, max_tokens):
+            ranges.append((old, new))
+            return ""
+
+    manager.diff_summarizer = Summarizer()
+    manager.refine_batch(
+        [("first", "ok", ("a", "b")), ("noop", "ok", None), ("last", "ok", ("c", "d"))]
+    )
+    manager.refine_batch([("noop", "ok", None)])
+    assert ranges == [("a", "d")]
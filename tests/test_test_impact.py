@@ -0,0 +1,88 @@
+import os
+import sys
+
+# Ensure project root is on sys.path for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from selfgrow.test_impact import TestImpactAnalyzer
+
+
+def make_project(root):
+    (root / "pkg").mkdir()
+    (root / "tests").mkdir()
+    (root / "pkg" / "__init__.py").write_text("")
+    (root / "pkg" / "base.py").write_text("VALUE = 1\n")
+    (root / "pkg" / "service.py").write_text("from .base import VALUE\n")
+    (root / "pkg" / "other.py").write_text("import json\n")
+    (root / "tests" / "test_base.py").write_text("from pkg.base import VALUE\n")
+    (root / "tests" / "test_service.py").write_text("from pkg import service\n")
+    (root / "tests" / "test_other.py").write_text("import pkg.other\n")
+
+
+def test_selects_tests_through_transitive_imports(tmp_path):
+    make_project(tmp_path)
+    analyzer = TestImpactAnalyzer(str(tmp_path), package="pkg", full_run_every=0)
+    test_map = analyzer.refresh()
+    assert test_map["tests/test_service.py"] == [
+        "pkg/__init__.py",
+        "pkg/base.py",
+        "pkg/service.py",
+    ]
+
+    selection = analyzer.select(["pkg/base.py"])
+    assert selection.tests == ["tests/test_base.py", "tests/test_service.py"]
+    assert selection.describe() == "ran 2 of 3 test files, 1 skipped"
+    assert analyzer.select(["tests/test_other.py", "README.md"]).tests == [
+        "tests/test_other.py"
+    ]
+    assert analyzer.select(["config.yaml"]).full
+    assert analyzer.select(["tests/conftest.py"]).full
+
+
+def test_map_is_cached_and_updated_incrementally(tmp_path):
+    make_project(tmp_path)
+    TestImpactAnalyzer(str(tmp_path), package="pkg").refresh()
+    assert (tmp_path / ".selfgrow_test_map.json").exists()
+
+    (tmp_path / "pkg" / "other.py").write_text("from . import base\n")
+    analyzer = TestImpactAnalyzer(str(tmp_path), package="pkg", full_run_every=0)
+    parsed = []
+    original = analyzer._imports
+    analyzer._imports = lambda path: parsed.append(path) or original(path)
+    assert "tests/test_other.py" in analyzer.select(["pkg/base.py"]).tests
+    assert parsed == ["pkg/other.py"]
+
+
+def test_periodic_full_run(tmp_path):
+    make_project(tmp_path)
+    analyzer = TestImpactAnalyzer(str(tmp_path), package="pkg", full_run_every=2)
+    assert not analyzer.select(["pkg/other.py"]).full
+    assert not analyzer.select(["pkg/other.py"]).full
+    selection = analyzer.select(["pkg/other.py"])
+    assert selection.full
+    assert selection.describe() == "ran all 3 test files (periodic full run)"
+    assert not analyzer.select(["pkg/other.py"]).full
+
+
+def test_changes_outside_the_map_select_full_suite(tmp_path):
+    make_project(tmp_path)
+    (tmp_path / "pkg" / "orphan.py").write_text("X = 1\n")
+    analyzer = TestImpactAnalyzer(str(tmp_path), package="pkg", full_run_every=0)
+    assert analyzer.select(["conftest.py"]).full
+    assert analyzer.select(["setup.py"]).full
+    selection = analyzer.select(["pkg/orphan.py"])
+    assert selection.full
+    assert selection.reason == "no tests import pkg/orphan.py"
+
+
+def test_select_reads_sources_from_given_tree(tmp_path):
+    make_project(tmp_path)
+    mirror = tmp_path / "mirror"
+    mirror.mkdir()
+    make_project(mirror)
+    (mirror / "tests" / "test_other.py").write_text("import pkg.base\n")
+    analyzer = TestImpactAnalyzer(str(tmp_path), package="pkg", full_run_every=0)
+    selection = analyzer.select(["pkg/base.py"], source_root=str(mirror))
+    assert "tests/test_other.py" in selection.tests
+    assert analyzer.source_root == str(tmp_path)
+    assert "tests/test_other.py" not in analyzer.select(["pkg/base.py"]).tests
@@ -0,0 +1,83 @@
+import os
+import sys
+import threading
+
+import pytest
+
+# Ensure project root is on sys.path for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from selfgrow.memory import Memory
+from selfgrow.usage import BudgetExceeded, UsageTracker
+
+
+def test_usage_is_totalled_per_stage_and_tied_to_tasks():
+    memory = Memory(":memory:")
+    tracker = UsageTracker(memory)
+    with tracker.task(7):
+        tracker.record("execution", "gpt-4", 100, 40, 1.5)
+    tracker.record("planning", "gpt-3.5-turbo", 20, 10, 0.25)
+
+    assert tracker.totals("execution")["total_tokens"] == 140
+    counters = tracker.counters()
+    assert counters["run_calls"] == 2
+    assert counters["run_total_tokens"] == 170
+    assert counters["run_latency_ms"] == 1750
+    assert counters["planning_prompt_tokens"] == 20
+    assert memory.get_task_usage(7) == {"execution": (1, 100, 40, 1500)}
+
+
+def test_clearing_tasks_keeps_usage_unless_asked():
+    memory = Memory(":memory:")
+    memory.add_task("first")
+    memory.record_usage(1, "execution", "gpt-4", 100, 40, 1500)
+    memory.clear_all_tasks()
+    (count,) = memory.conn.execute("SELECT COUNT(*) FROM llm_usage").fetchone()
+    assert count == 1
+    # The kept record no longer counts towards a new task reusing the ID
+    memory.add_task("second")
+    assert memory.get_task_usage(1) == {}
+
+    memory.clear_all_tasks(clear_usage=True)
+    (count,) = memory.conn.execute("SELECT COUNT(*) FROM llm_usage").fetchone()
+    assert count == 0
+
+
+def test_task_context_is_per_thread():
+    memory = Memory(":memory:")
+    tracker = UsageTracker(memory)
+
+    def other_thread():
+        tracker.record("refinement", "gpt-3.5-turbo", 5, 5, 0.0)
+
+    with tracker.task(1):
+        worker = threading.Thread(target=other_thread)
+        worker.start()
+        worker.join()
+    rows = memory.conn.execute("SELECT task_id, stage FROM llm_usage").fetchall()
+    assert rows == [(None, "refinement")]
+
+
+def test_soft_and_hard_budgets():
+    tracker = UsageTracker(
+        budgets={
+            "run": {"soft_tokens": 100, "hard_tokens": None},
+            "execution": {"hard_tokens": 150},
+            "planning": {"hard_seconds": 1},
+        }
+    )
+    assert tracker.status() == (None, None)
+    tracker.record("execution", "gpt-4", 80, 40, 0.1)
+    level, reason = tracker.status()
+    assert level == "soft" and "run" in reason
+    tracker.check("execution")
+
+    tracker.record("execution", "gpt-4", 30, 0, 0.1)
+    assert tracker.status()[0] == "hard"
+    with pytest.raises(BudgetExceeded):
+        tracker.check("execution")
+    # Other stages are only bound by their own and the run's hard budgets
+    tracker.check("planning")
+    tracker.record("planning", "gpt-3.5-turbo", 1, 1, 1.2)
+    with pytest.raises(BudgetExceeded, match="planning hard budget of 1 seconds"):
+        tracker.check("planning")
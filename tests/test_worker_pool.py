@@ -0,0 +1,186 @@
+import os
+import subprocess
+import sys
+import threading
+
+import pytest
+
+# Ensure project root is on sys.path for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from selfgrow.git_backend import GitBackend
+from selfgrow.memory import Memory
+from selfgrow.worker_pool import WorktreePool, IntegrationConflict
+
+
+@pytest.fixture
+def repo(tmp_path, make_repo):
+    return make_repo(tmp_path / "repo", {"shared.txt": "base\n"})
+
+
+class FileExecutor:
+    """Executor that handles 'write <file> <text>' tasks with a git commit."""
+
+    active = 0
+    peak = 0
+    lock = threading.Lock()
+    barrier = None
+
+    def __init__(self, work_directory):
+        self.work_directory = work_directory
+
+    def execute(self, task_description):
+        with FileExecutor.lock:
+            FileExecutor.active += 1
+            FileExecutor.peak = max(FileExecutor.peak, FileExecutor.active)
+        try:
+            if FileExecutor.barrier:
+                FileExecutor.barrier.wait(timeout=5)
+            _, name, text = task_description.split(" ", 2)
+            if text == "fail":
+                raise RuntimeError("tests failed")
+            with open(os.path.join(self.work_directory, name), "w") as f:
+                f.write(text + "\n")
+            backend = GitBackend(self.work_directory)
+            backend.run("add", name)
+            backend.run("commit", "-q", "-m", task_description)
+            return f"wrote {name}"
+        finally:
+            with FileExecutor.lock:
+                FileExecutor.active -= 1
+
+
+class Tasks:
+    def __init__(self, memory):
+        self.memory = memory
+
+    def get_next_task(self):
+        return self.memory.claim_next_task()
+
+
+def test_parallel_worktrees_integrate_in_order(tmp_path, repo, git):
+    memory = Memory(str(tmp_path / "memory.db"), dedup_threshold=None)
+    memory.add_tasks(["write a.txt alpha", "write b.txt beta", "write c.txt fail"])
+    FileExecutor.barrier = threading.Barrier(3)
+
+    pool = WorktreePool(FileExecutor, workers=3, repo_dir=str(repo))
+    outcomes = list(pool.run(Tasks(memory), max_tasks=10))
+    FileExecutor.barrier = None
+
+    assert FileExecutor.peak == 3
+    assert [o.task_id for o in outcomes] == [1, 2, 3]
+    assert [o.result for o in outcomes[:2]] == ["wrote a.txt", "wrote b.txt"]
+    assert isinstance(outcomes[2].error, RuntimeError)
+    assert pool.exhausted
+    log = git(repo, "log", "--format=%s").split("\n")
+    assert log[:3] == ["write b.txt beta", "write a.txt alpha", "base"]
+    assert (repo / "a.txt").read_text() == "alpha\n"
+    # Throwaway branches and worktrees are cleaned up
+    assert git(repo, "branch", "--list", "selfgrow/*") == ""
+    assert len(git(repo, "worktree", "list").splitlines()) == 1
+
+
+def test_conflicting_task_is_requeued_then_applied(tmp_path, repo, git):
+    memory = Memory(str(tmp_path / "memory.db"), dedup_threshold=None)
+    memory.add_tasks(["write shared.txt first", "write shared.txt second"])
+    FileExecutor.barrier = threading.Barrier(2)
+    pool = WorktreePool(FileExecutor, workers=2, repo_dir=str(repo))
+    tasks = Tasks(memory)
+    runner = pool.run(tasks, max_tasks=2)
+    first = next(runner)
+    FileExecutor.barrier = None
+    second = next(runner)
+
+    assert first.result == "wrote shared.txt" and second.result == "wrote shared.txt"
+    assert (repo / "shared.txt").read_text() == "second\n"
+    assert git(repo, "status", "--porcelain") == ""
+
+
+def test_repeated_conflict_is_reported(repo, git):
+    pool = WorktreePool(FileExecutor, workers=1, repo_dir=str(repo))
+    base = git(repo, "rev-parse", "HEAD")
+    git(repo, "checkout", "-q", "-b", "selfgrow/task-7")
+    (repo / "shared.txt").write_text("branch\n")
+    git(repo, "commit", "-q", "-am", "branch")
+    git(repo, "checkout", "-q", "main")
+    (repo / "shared.txt").write_text("main\n")
+    git(repo, "commit", "-q", "-am", "main")
+
+    pool._requeued.add(7)
+    outcome = pool._integrate(7, "task", ("ok", None, "selfgrow/task-7", base))
+    assert isinstance(outcome.error, IntegrationConflict)
+    assert (repo / "shared.txt").read_text() == "main\n"
+
+
+class Validator:
+    """Main-tree executor stand-in whose tests fail once shared.txt is broken."""
+
+    def __init__(self, repo):
+        self.repo = repo
+        self.seen = []
+
+    def run_tests(self, changed_files):
+        self.seen.append(changed_files)
+        if (self.repo / "shared.txt").read_text() == "broken\n":
+            raise subprocess.CalledProcessError(1, ["pytest"], "1 failed", "")
+        return "tests passed"
+
+
+def test_integrated_commits_are_retested_on_new_head(repo, git):
+    validator = Validator(repo)
+    pool = WorktreePool(
+        FileExecutor, workers=1, repo_dir=str(repo), validator=validator
+    )
+    base = git(repo, "rev-parse", "HEAD")
+
+    def branch(name, content):
+        git(repo, "checkout", "-q", "-b", "selfgrow/task-7", base)
+        (repo / name).write_text(content)
+        git(repo, "add", name)
+        git(repo, "commit", "-q", "-m", name)
+        git(repo, "checkout", "-q", "main")
+
+    execution = ("ok", None, "selfgrow/task-7", base)
+    branch("shared.txt", "broken\n")
+    # Failing on top of HEAD: undone and requeued once, then reported
+    assert pool._integrate(7, "task", execution) is None
+    assert git(repo, "rev-parse", "HEAD") == base
+    branch("shared.txt", "broken\n")
+    outcome = pool._integrate(7, "task", execution)
+    assert isinstance(outcome.error, IntegrationConflict)
+    assert "1 failed" in str(outcome.error)
+    assert git(repo, "rev-parse", "HEAD") == base
+    assert git(repo, "status", "--porcelain") == ""
+
+    branch("other.txt", "x\n")
+    assert pool._integrate(8, "task", execution).result == "ok"
+    assert validator.seen == [["shared.txt"], ["shared.txt"], ["other.txt"]]
+    assert (repo / "other.txt").exists()
+
+
+class CountingExecutor(FileExecutor):
+    """FileExecutor with CodeExecutor's counters and close()."""
+
+    closed = []
+
+    def __init__(self, work_directory):
+        super().__init__(work_directory)
+        self.edit_stats = {"full_files": 1}
+        self.local_stats = {"handled": 0}
+
+    def close(self):
+        CountingExecutor.closed.append(self.work_directory)
+
+
+def test_worktree_executors_are_closed_and_counted(tmp_path, repo):
+    memory = Memory(str(tmp_path / "memory.db"), dedup_threshold=None)
+    memory.add_tasks(["write a.txt alpha", "write b.txt fail"])
+    CountingExecutor.closed = []
+
+    pool = WorktreePool(CountingExecutor, workers=2, repo_dir=str(repo))
+    list(pool.run(Tasks(memory), max_tasks=10))
+
+    # Failed tasks are counted and closed too
+    assert len(CountingExecutor.closed) == 2
+    assert pool.edit_stats == {"full_files": 2}
+    assert pool.local_stats == {"handled": 0}